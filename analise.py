@@ -0,0 +1,211 @@
+import os
+
+import pandas as pd
+
+from consultas import evolucao_diaria, performance_por_status, periodo_disponivel, resumo_periodo
+from desempenho import medir
+from snapshot import gravar_snapshot, ler_tabela_snapshot
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Motores dos relatórios gerenciais (período, evolução diária e performance por status):
+#   sqlite: consultas às tabelas de resumo, atualizadas a cada importação (padrão)
+#   duckdb: consultas vetorizadas e paralelas sobre o snapshot Arrow das ordens
+#           (snapshot.py), mapeado em memória e lido sem cópia, sem passar pelos resumos
+# O motor é escolhido pela variável de ambiente PAINEL_ANALISE. Sem o duckdb
+# instalado ou sem snapshot da versão atual dos dados, os relatórios saem do SQLite.
+
+# Motores disponíveis
+MOTORES_ANALISE = ('sqlite', 'duckdb')
+
+# Motor configurado
+MOTOR_ANALISE = os.environ.get('PAINEL_ANALISE', 'sqlite')
+
+# Tolerância na comparação dos valores entre os motores: os relatórios não são arredondados
+# (só a página arredonda, para exibir), e as somas feitas em outra ordem (ou pelas variações
+# gravadas nos resumos a cada importação) só mudam os últimos dígitos do float
+# A absoluta cobre os valores que deveriam ser zero; as duas ficam muito abaixo de um centavo
+TOLERANCIA_RELATIVA = 1e-9
+TOLERANCIA_ABSOLUTA = 1e-6
+
+# Resultado da comparação dos motores sem snapshot da versão atual dos dados
+SNAPSHOT_INDISPONIVEL = 'snapshot indisponível'
+
+# Data das ordens no snapshot (timestamp) e filtro do período
+DIA_DUCKDB = "CAST(criado_em AS DATE)"
+PERIODO_DUCKDB = f"{DIA_DUCKDB} BETWEEN CAST(? AS DATE) AND CAST(? AS DATE)"
+
+
+# Primeiro e último dia com ordens
+def _periodo_disponivel_duckdb(consulta):
+    return consulta(f'''
+        SELECT strftime(MIN({DIA_DUCKDB}), '%Y-%m-%d'), strftime(MAX({DIA_DUCKDB}), '%Y-%m-%d')
+        FROM ordens
+    ''').fetchone()
+
+# Quantidade, valor total e ticket médio de um período
+def _resumo_periodo_duckdb(consulta, data_inicio, data_fim):
+    quantidade, quantidade_valor, valor_total = consulta(f'''
+        SELECT COUNT(*), COUNT(valor_pedido_bruto), COALESCE(SUM(valor_pedido_bruto), 0)
+        FROM ordens
+        WHERE {PERIODO_DUCKDB}
+    ''', (str(data_inicio), str(data_fim))).fetchone()
+    return {
+        'quantidade': quantidade,
+        'valor_total': valor_total,
+        'ticket_medio': valor_total / quantidade_valor if quantidade_valor else 0.0,
+    }
+
+# Quantidade e valor por dia em um período
+def _evolucao_diaria_duckdb(consulta, data_inicio, data_fim):
+    # Agrupa pela data e só formata o resultado (um texto por dia, não por ordem)
+    return consulta(f'''
+        SELECT strftime(dia, '%Y-%m-%d') AS criado_em, quantidade, valor_total
+        FROM (
+            SELECT {DIA_DUCKDB} AS dia, COUNT(*) AS quantidade,
+                   COALESCE(SUM(valor_pedido_bruto), 0) AS valor_total
+            FROM ordens
+            WHERE {PERIODO_DUCKDB}
+            GROUP BY dia
+        )
+        ORDER BY dia
+    ''', (str(data_inicio), str(data_fim))).df()
+
+# Performance por status e status de cotação
+def _performance_por_status_duckdb(consulta):
+    performance = consulta('''
+        SELECT CAST(status AS VARCHAR) AS status,
+               CAST(status_cotacao AS VARCHAR) AS status_cotacao,
+               COUNT(*) AS quantidade,
+               COALESCE(SUM(valor_pedido_bruto), 0) AS valor_total,
+               SUM(valor_pedido_bruto) / NULLIF(COUNT(valor_pedido_bruto), 0) AS ticket_medio
+        FROM ordens
+        WHERE status IS NOT NULL AND status_cotacao IS NOT NULL
+        GROUP BY ALL
+        ORDER BY status, status_cotacao
+    ''').df()
+    return performance.set_index(['status', 'status_cotacao'])
+
+
+# Implementação de cada relatório em cada motor (mesmos argumentos e mesmo formato de resultado)
+RELATORIOS = {
+    'periodo_disponivel': {'sqlite': periodo_disponivel, 'duckdb': _periodo_disponivel_duckdb},
+    'resumo_periodo': {'sqlite': resumo_periodo, 'duckdb': _resumo_periodo_duckdb},
+    'evolucao_diaria': {'sqlite': evolucao_diaria, 'duckdb': _evolucao_diaria_duckdb},
+    'performance_por_status': {'sqlite': performance_por_status, 'duckdb': _performance_por_status_duckdb},
+}
+
+
+# Função para executar um relatório do duckdb sobre a tabela Arrow das ordens
+def _executar_duckdb(funcao, tabela, *args):
+    conexao = duckdb.connect()
+    try:
+        conexao.register('ordens', tabela)
+        return funcao(conexao.execute, *args)
+    finally:
+        conexao.close()
+
+# Função para verificar se o duckdb está instalado
+def duckdb_instalado():
+    return duckdb is not None
+
+# Função para obter a tabela lida pelo duckdb (None se o motor não puder ser usado agora)
+def tabela_duckdb(conn):
+    if duckdb is None:
+        return None
+    return ler_tabela_snapshot(conn)
+
+# Função para informar o motor que os relatórios estão usando
+def motor_em_uso(conn, motor=None):
+    motor = motor or MOTOR_ANALISE
+    if motor == 'duckdb' and tabela_duckdb(conn) is None:
+        return 'sqlite'
+    return motor
+
+# Função para executar um relatório no motor informado (padrão: MOTOR_ANALISE)
+def executar_relatorio(conn, relatorio, *args, motor=None):
+    motor = motor or MOTOR_ANALISE
+    if motor not in MOTORES_ANALISE:
+        raise ValueError(f"Motor de análise inválido: {motor}")
+
+    implementacoes = RELATORIOS[relatorio]
+    if motor == 'duckdb':
+        tabela = tabela_duckdb(conn)
+        if tabela is not None:
+            with medir(f"analise.{relatorio}.duckdb", 'analise'):
+                return _executar_duckdb(implementacoes['duckdb'], tabela, *args)
+    with medir(f"analise.{relatorio}.sqlite", 'analise'):
+        return implementacoes['sqlite'](conn, *args)
+
+# Função para verificar se dois resultados de um relatório são iguais (None) ou descrever a diferença
+def _diferenca(esperado, obtido):
+    if isinstance(esperado, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(
+                esperado.reset_index(), obtido.reset_index(), check_dtype=False,
+                rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA
+            )
+        except AssertionError as e:
+            return str(e)
+        return None
+
+    esperado = list(esperado.values()) if isinstance(esperado, dict) else list(esperado)
+    obtido = list(obtido.values()) if isinstance(obtido, dict) else list(obtido)
+    for valor_esperado, valor_obtido in zip(esperado, obtido):
+        if isinstance(valor_esperado, float) or isinstance(valor_obtido, float):
+            if not abs(valor_esperado - valor_obtido) <= max(
+                TOLERANCIA_ABSOLUTA, TOLERANCIA_RELATIVA * abs(valor_esperado)
+            ):
+                return f"{esperado} != {obtido}"
+        elif valor_esperado != valor_obtido:
+            return f"{esperado} != {obtido}"
+    return None
+
+# Função para comparar os relatórios dos dois motores, nos mesmos dados
+# Grava o snapshot se estiver desatualizado; retorna {relatório: diferença ou None},
+# SNAPSHOT_INDISPONIVEL se não houver snapshot da versão atual para o duckdb
+# (gravação falhou ou não é possível) e None se o duckdb não estiver instalado
+def comparar_motores(conn, data_inicio=None, data_fim=None):
+    if duckdb is None:
+        return None
+
+    # As consultas ao SQLite leem a mesma versão dos dados do snapshot, mesmo que uma importação
+    # termine durante a comparação
+    transacao_propria = not conn.in_transaction
+    if transacao_propria:
+        conn.execute("BEGIN")
+    try:
+        tabela = ler_tabela_snapshot(conn)
+        if tabela is None:
+            try:
+                gravar_snapshot(conn)
+            except OSError:
+                return SNAPSHOT_INDISPONIVEL
+            tabela = ler_tabela_snapshot(conn)
+            if tabela is None:
+                return SNAPSHOT_INDISPONIVEL
+
+        primeiro_dia, ultimo_dia = periodo_disponivel(conn)
+        periodo = (data_inicio or primeiro_dia, data_fim or ultimo_dia)
+        argumentos = {
+            'periodo_disponivel': (),
+            'resumo_periodo': periodo,
+            'evolucao_diaria': periodo,
+            'performance_por_status': (),
+        }
+
+        diferencas = {}
+        for relatorio, implementacoes in RELATORIOS.items():
+            if None in argumentos[relatorio]:
+                # Sem ordens com data não há período para comparar
+                continue
+            esperado = implementacoes['sqlite'](conn, *argumentos[relatorio])
+            obtido = _executar_duckdb(implementacoes['duckdb'], tabela, *argumentos[relatorio])
+            diferencas[relatorio] = _diferenca(esperado, obtido)
+        return diferencas
+    finally:
+        if transacao_propria:
+            conn.rollback()
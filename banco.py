@@ -0,0 +1,369 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from busca import criar_indice_busca, reconstruir_indice_busca, remover_gatilhos_busca
+from desempenho import fabrica_conexao
+from manutencao import criar_tabela_manutencao, registrar_manutencao
+from resumos import criar_tabelas_resumo, reconstruir_resumos
+from tarefas import criar_tabela_tarefas
+
+# Arquivo do banco usado pelo painel
+CAMINHO_BANCO = 'ordens_servico_completo.db'
+
+# Chave de negócio de uma linha da planilha
+COLUNAS_CHAVE = ('numero_cotacao', 'item_sd')
+
+# Índices usados pelas agregações do painel
+INDICES = {
+    'idx_ordens_status': 'status',
+    'idx_ordens_status_cotacao': 'status_cotacao, valor_pedido_bruto',
+    'idx_ordens_criado_em': 'criado_em',
+    'idx_ordens_cliente': 'nome_emissor_ordem',
+    'idx_ordens_produto': 'denominacao_produto',
+    'idx_ordens_data_importacao': 'data_importacao',
+    'idx_ordens_versao_importacao': 'versao_importacao',
+}
+
+# Colunas de controle interno de ordens_servico (hash do conteúdo e importação da versão atual),
+# que não fazem parte dos dados da planilha: ficam fora das exportações
+COLUNAS_CONTROLE = ('hash_conteudo', 'versao_importacao')
+
+# Pragmas aplicados a cada conexão
+# auto_vacuum INCREMENTAL: só vale para bancos novos (precisa vir antes do WAL, que cria o
+# arquivo); bancos existentes mudam de modo no primeiro VACUUM (ver manutencao.py)
+# WAL: leitores não bloqueiam a escrita e continuam lendo durante uma importação;
+# synchronous NORMAL é seguro em WAL (só perde a última transação em queda de energia)
+PRAGMAS_CONEXAO = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16384,          # 16 MB por conexão
+    'mmap_size': 268435456,        # 256 MB lidos direto do cache do sistema
+    'temp_store': 'MEMORY',
+    'journal_size_limit': 67108864,  # trunca o WAL em 64 MB após cada checkpoint
+}
+
+# Pragmas gravados no arquivo do banco
+PRAGMAS_ARQUIVO = ('auto_vacuum', 'journal_mode')
+
+# Tempo máximo (segundos) esperando por uma trava do banco
+TEMPO_ESPERA_TRAVA = 30
+
+
+# Função para conectar ao banco e garantir o schema
+def conectar(caminho=CAMINHO_BANCO):
+    conn = sqlite3.connect(
+        caminho, timeout=TEMPO_ESPERA_TRAVA, check_same_thread=False, factory=fabrica_conexao()
+    )
+    configurar_conexao(conn)
+    criar_schema(conn)
+    return conn
+
+# Função para abrir uma conexão somente leitura (o schema já deve existir)
+def conectar_leitura(caminho=CAMINHO_BANCO):
+    uri = f"{Path(caminho).absolute().as_uri()}?mode=ro"
+    conn = sqlite3.connect(
+        uri, uri=True, timeout=TEMPO_ESPERA_TRAVA, check_same_thread=False, factory=fabrica_conexao()
+    )
+    configurar_conexao(conn, somente_leitura=True)
+    return conn
+
+# Função para aplicar os pragmas de conexão
+# (o modo do journal e o auto_vacuum ficam gravados no arquivo e só são definidos pelas conexões de escrita)
+def configurar_conexao(conn, somente_leitura=False):
+    for pragma, valor in PRAGMAS_CONEXAO.items():
+        if pragma in PRAGMAS_ARQUIVO and somente_leitura:
+            continue
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+
+
+# Pool de conexões: cada thread usa uma conexão própria, devolvida ao pool ao terminar.
+# O número de conexões abertas é limitado a `tamanho`; além disso, a thread espera.
+class PoolConexoes:
+    def __init__(self, caminho=CAMINHO_BANCO, tamanho=8, somente_leitura=False):
+        self.caminho = caminho
+        self.somente_leitura = somente_leitura
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._local = threading.local()
+
+    # Conexão da thread atual durante o bloco `with` (reentrante na mesma thread)
+    @contextmanager
+    def conexao(self):
+        atual = getattr(self._local, 'conn', None)
+        if atual is not None:
+            yield atual
+            return
+
+        self._vagas.acquire()
+        try:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                conn = conectar_leitura(self.caminho) if self.somente_leitura else conectar(self.caminho)
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                if conn.in_transaction:
+                    conn.rollback()
+                self._livres.put(conn)
+        finally:
+            self._vagas.release()
+
+    # Fecha as conexões livres
+    def fechar(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+# Função para criar (ou atualizar) as tabelas e índices
+def criar_schema(conn):
+    cursor = conn.cursor()
+
+    # Criar tabela com todas as colunas da planilha
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ordens_servico (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descricao_operacao TEXT,
+            numero_oportunidade TEXT,
+            numero_vta TEXT,
+            numero_cotacao TEXT,
+            numero_circuito TEXT,
+            status_cotacao TEXT,
+            denominacao_produto TEXT,
+            quantidade INTEGER,
+            status TEXT,
+            valor_pedido_bruto REAL,
+            criado_em DATE,
+            emissor_ordem TEXT,
+            nome_emissor_ordem TEXT,
+            nome_gerente_contas TEXT,
+            organizacao_vendas TEXT,
+            canal_distribuicao TEXT,
+            setor_atividade TEXT,
+            item_sd TEXT,
+            id_produto TEXT,
+            tempo_contrato TEXT,
+            hash_conteudo INTEGER,
+            versao_importacao INTEGER,
+            data_importacao DATETIME DEFAULT CURRENT_TIMESTAMP,
+            data_atualizacao DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Bancos criados por versões anteriores
+    adicionar_coluna(conn, 'ordens_servico', 'hash_conteudo', 'INTEGER')
+    adicionar_coluna(conn, 'ordens_servico', 'versao_importacao', 'INTEGER')
+    criar_indice_chave(conn)
+
+    for nome, colunas in INDICES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON ordens_servico ({colunas})")
+
+    # Versão dos dados, incrementada a cada importação ou limpeza
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS controle (
+            chave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO controle (chave, valor) VALUES ('versao_dados', 0)")
+
+    criar_tabelas_historico(conn)
+
+    criar_tabelas_resumo(conn)
+    criar_indice_busca(conn)
+    criar_tabela_tarefas(conn)
+    criar_tabela_manutencao(conn)
+    migrar_chaves_decimais(conn)
+
+    conn.commit()
+
+# Função para adicionar uma coluna caso ela ainda não exista
+def adicionar_coluna(conn, tabela, coluna, tipo):
+    colunas = [linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")]
+    if coluna not in colunas:
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+
+# Função para criar o índice único da chave de negócio
+def criar_indice_chave(conn):
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_ordens_chave'"
+    ).fetchone()
+    if existe:
+        return
+
+    # Importações antigas no modo "adicionar" podiam duplicar a chave; mantém a mais recente.
+    # As cópias removidas ficam na tabela ordens_chave_duplicada e a quantidade, na manutenção do banco
+    chave = ', '.join(COLUNAS_CHAVE)
+    duplicadas = f'''
+        id NOT IN (
+            SELECT MAX(id) FROM ordens_servico GROUP BY {chave}
+        )
+        AND {' AND '.join(f'{coluna} IS NOT NULL' for coluna in COLUNAS_CHAVE)}
+    '''
+    executada_em = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    inicio = time.perf_counter()
+    conn.execute(f"CREATE TEMP TABLE chave_duplicada AS SELECT id FROM ordens_servico WHERE {duplicadas}")
+    removidas = conn.execute("SELECT COUNT(*) FROM temp.chave_duplicada").fetchone()[0]
+    if removidas:
+        conn.execute("CREATE TABLE IF NOT EXISTS ordens_chave_duplicada AS SELECT * FROM ordens_servico WHERE 0")
+        conn.execute(
+            "INSERT INTO ordens_chave_duplicada SELECT * FROM ordens_servico WHERE id IN temp.chave_duplicada"
+        )
+        conn.execute("DELETE FROM ordens_servico WHERE id IN temp.chave_duplicada")
+    conn.execute("DROP TABLE temp.chave_duplicada")
+    conn.execute(f"CREATE UNIQUE INDEX idx_ordens_chave ON ordens_servico ({chave})")
+
+    if removidas:
+        criar_tabela_manutencao(conn)
+        registrar_manutencao(
+            conn, 'remocao_chave_duplicada', executada_em, (time.perf_counter() - inicio) * 1000,
+            {'removidas': removidas, 'copia': 'ordens_chave_duplicada'}
+        )
+
+# Expressão SQL do texto da coluna sem o '.0' de um número inteiro ('12345.0' -> '12345')
+def _sem_decimal(coluna):
+    inteiro = f"ltrim(substr({coluna}, 1, length({coluna}) - 2), '-')"
+    return f'''CASE WHEN {coluna} GLOB '*.0' AND {inteiro} != '' AND {inteiro} NOT GLOB '*[^0-9]*'
+        THEN substr({coluna}, 1, length({coluna}) - 2) ELSE {coluna} END'''
+
+# Função para tirar o '.0' das chaves gravadas por versões anteriores (uma única vez por banco)
+# A leitura pelo pandas de uma coluna de chave com células vazias gravava '12345.0', e a
+# importação atual grava '12345'; sem a migração, as chaves antigas não casam com as novas.
+# Se a chave migrada já existir (importação "adicionar" após a atualização), fica a ordem
+# mais recente, e a outra vai para ordens_chave_duplicada, como em criar_indice_chave.
+def migrar_chaves_decimais(conn):
+    migrada = conn.execute("SELECT valor FROM controle WHERE chave = 'chaves_sem_decimal'").fetchone()
+    if migrada and migrada[0]:
+        return
+
+    if conn.in_transaction:
+        conn.commit()
+    executada_em = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    inicio = time.perf_counter()
+    chave = ', '.join(COLUNAS_CHAVE)
+    migrar = ' OR '.join(f"{coluna} IS NOT {_sem_decimal(coluna)}" for coluna in COLUNAS_CHAVE)
+
+    # Uma única transação: com os gatilhos da busca desligados, uma falha no meio não pode ser gravada
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f'''
+            CREATE TEMP TABLE chave_decimal AS
+            SELECT id, {', '.join(f'{_sem_decimal(coluna)} AS {coluna}' for coluna in COLUNAS_CHAVE)}
+            FROM ordens_servico WHERE {migrar}
+        ''')
+        migradas = conn.execute("SELECT COUNT(*) FROM temp.chave_decimal").fetchone()[0]
+        removidas = 0
+        if migradas:
+            # Ordens migradas e as que já têm a chave sem o '.0': por chave, só fica a de maior id
+            conn.execute(f'''
+                CREATE TEMP TABLE chave_decimal_duplicada AS
+                WITH chaves AS (
+                    SELECT id, {chave} FROM temp.chave_decimal
+                    UNION
+                    SELECT o.id, {', '.join(f'o.{coluna}' for coluna in COLUNAS_CHAVE)}
+                    FROM ordens_servico o JOIN temp.chave_decimal USING ({chave})
+                )
+                SELECT id FROM (
+                    SELECT id, MAX(id) OVER (PARTITION BY {chave}) AS mantida
+                    FROM chaves WHERE {' AND '.join(f'{coluna} IS NOT NULL' for coluna in COLUNAS_CHAVE)}
+                )
+                WHERE id < mantida
+            ''')
+            removidas = conn.execute("SELECT COUNT(*) FROM temp.chave_decimal_duplicada").fetchone()[0]
+
+            # O índice de busca é reconstruído no fim, em vez de linha a linha
+            remover_gatilhos_busca(conn)
+            if removidas:
+                conn.execute("CREATE TABLE IF NOT EXISTS ordens_chave_duplicada AS SELECT * FROM ordens_servico WHERE 0")
+                conn.execute(
+                    "INSERT INTO ordens_chave_duplicada SELECT * FROM ordens_servico WHERE id IN temp.chave_decimal_duplicada"
+                )
+                conn.execute("DELETE FROM ordens_servico WHERE id IN temp.chave_decimal_duplicada")
+                reconstruir_resumos(conn)
+            conn.execute(f'''
+                UPDATE ordens_servico SET {', '.join(f'{coluna} = m.{coluna}' for coluna in COLUNAS_CHAVE)}
+                FROM temp.chave_decimal m WHERE m.id = ordens_servico.id
+            ''')
+            # As versões antigas continuam ligadas à ordem pela chave
+            conn.execute(f'''
+                UPDATE historico_ordens SET {', '.join(f'{coluna} = {_sem_decimal(coluna)}' for coluna in COLUNAS_CHAVE)}
+                WHERE {migrar}
+            ''')
+            reconstruir_indice_busca(conn)
+            incrementar_versao_dados(conn)
+        conn.execute("INSERT OR REPLACE INTO controle (chave, valor) VALUES ('chaves_sem_decimal', 1)")
+        if migradas:
+            # Grava o registro e faz o commit da migração
+            registrar_manutencao(
+                conn, 'migracao_chave_decimal', executada_em, (time.perf_counter() - inicio) * 1000,
+                {'migradas': migradas, 'removidas': removidas, 'copia': 'ordens_chave_duplicada'}
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.chave_decimal")
+        conn.execute("DROP TABLE IF EXISTS temp.chave_decimal_duplicada")
+
+# Colunas de ordens_servico que não são copiadas para o histórico
+# (a importação da versão é o início da validade, valido_de)
+COLUNAS_FORA_HISTORICO = ('versao_importacao',)
+
+# Função para criar o registro das importações e o histórico das versões das ordens (ver historico.py)
+# Cada linha do histórico é uma versão substituída ou removida de uma ordem, válida da importação
+# valido_de (inclusive) até valido_ate (exclusive); a versão atual de cada ordem fica em
+# ordens_servico, com a importação que a gravou em versao_importacao (NULL: antes do histórico)
+def criar_tabelas_historico(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS importacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            realizada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            modo TEXT,
+            origem TEXT,
+            inseridos INTEGER,
+            atualizados INTEGER,
+            inalterados INTEGER,
+            removidos INTEGER
+        )
+    ''')
+
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'historico_ordens'"
+    ).fetchone()
+    if not existe:
+        # Mesmas colunas (e tipos) das ordens
+        colunas = [
+            f"{nome} {tipo}"
+            for _, nome, tipo, *_ in conn.execute("PRAGMA table_info(ordens_servico)")
+            if nome not in COLUNAS_FORA_HISTORICO
+        ]
+        conn.execute(f'''
+            CREATE TABLE historico_ordens (
+                valido_de INTEGER NOT NULL,
+                valido_ate INTEGER NOT NULL,
+                {', '.join(colunas)}
+            )
+        ''')
+
+    # Versões encerradas em um intervalo de importações / iniciadas em um intervalo / de uma ordem
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_historico_valido_ate ON historico_ordens (valido_ate, valido_de)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_historico_valido_de ON historico_ordens (valido_de, valido_ate)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_historico_chave ON historico_ordens ({', '.join(COLUNAS_CHAVE)})")
+
+# Função para obter a versão atual dos dados
+def versao_dados(conn):
+    return conn.execute("SELECT valor FROM controle WHERE chave = 'versao_dados'").fetchone()[0]
+
+# Função para marcar que os dados mudaram (na transação de quem chama)
+def incrementar_versao_dados(conn):
+    conn.execute("UPDATE controle SET valor = valor + 1 WHERE chave = 'versao_dados'")
@@ -0,0 +1,706 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from analise import SNAPSHOT_INDISPONIVEL, comparar_motores, duckdb_instalado, executar_relatorio
+from banco import PoolConexoes, conectar, conectar_leitura
+from compactacao import carregar_ordens_compactas
+from consultas import (
+    COLUNAS_FILTRO,
+    contar_ordens,
+    contar_por_status,
+    cursor_da_pagina,
+    evolucao_diaria,
+    mais_frequentes,
+    ordens_por_mes,
+    pagina_ordens,
+    performance_por_status,
+    periodo_disponivel,
+    resumo_periodo,
+    totais_gerais,
+    valor_por_status_cotacao,
+    valores_distintos,
+)
+from exportacao import FORMATOS_EXPORTACAO, exportar_ordens
+from importacao import COLUNAS_ESPERADAS, inserir_blocos, ler_planilha
+from desempenho import INSTRUMENTACAO_ATIVA
+from snapshot import carregar_snapshot, gravar_snapshot
+
+# Benchmark dos caminhos críticos do painel, fora do Streamlit.
+# Gera planilhas CARGA_PAINEL.xlsx sintéticas (com células sujas, como as reais)
+# e mede importação, carga do DataFrame, agregações do dashboard, filtros da
+# consulta e exportação, gravando tempo e pico de memória em um JSON que pode
+# ser comparado entre commits:
+#
+#   python benchmark.py executar --linhas 10000 100000 --saida benchmarks/atual.json
+#   python benchmark.py comparar benchmarks/base.json benchmarks/atual.json
+#
+# e mede as leituras do dashboard durante uma importação grande (WAL e pool somente leitura):
+#
+#   python benchmark.py concorrencia --linhas-base 200000 --linhas-carga 500000
+
+# Pasta das planilhas geradas e dos bancos temporários
+PASTA_BENCHMARK = 'benchmarks'
+
+# Tamanhos medidos por padrão (linhas da planilha)
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+
+# Linhas geradas por vez
+TAMANHO_BLOCO_GERACAO = 50_000
+
+# Intervalo (segundos) entre duas leituras da memória durante uma etapa
+INTERVALO_AMOSTRA_MEMORIA = 0.005
+
+# Leituras simultâneas a uma importação: fases medidas, pausa de cada leitor entre duas
+# leituras e duração (segundos) das fases sem importação
+FASES_CONCORRENCIA = ('antes', 'preparacao', 'aplicacao', 'depois')
+INTERVALO_LEITURA = 0.05
+SEGUNDOS_BASE_CONCORRENCIA = 2
+
+# Distribuições usadas na geração (valor: peso)
+STATUS = {
+    'Concluído': 45, 'Pendente': 20, 'Aberto': 10, 'Liberado': 10, 'Em Andamento': 8, 'Aprovado': 5,
+}
+# Grafias encontradas nas planilhas reais para o mesmo status
+VARIANTES_STATUS = {
+    'Concluído': ['concluido', 'CONCLUÍDO', 'finalizado', ' Concluído '],
+    'Pendente': ['pendente', 'PENDENTE '],
+    'Liberado': ['liberada', 'Liberada'],
+    'Em Andamento': ['em andamento', 'processando'],
+}
+STATUS_COTACAO = {
+    'Aprovada': 50, 'Em Análise': 20, 'Enviada': 12, 'Reprovada': 8, 'Cancelada': 6, 'Expirada': 4,
+}
+TIPOS_PRODUTO = [
+    'Link Dedicado', 'Internet Empresarial', 'MPLS', 'SIP Trunk', 'Fibra Apagada',
+    'SD-WAN', 'Lan to Lan', 'Wi-Fi Gerenciado', 'Firewall Gerenciado', 'Colocation',
+]
+VELOCIDADES = ['10 Mbps', '50 Mbps', '100 Mbps', '200 Mbps', '500 Mbps', '1 Gbps', '10 Gbps']
+RAZOES_SOCIAIS = [
+    'Comércio', 'Indústria', 'Transportes', 'Logística', 'Hospital', 'Supermercados',
+    'Construtora', 'Prefeitura Municipal de', 'Banco', 'Escola', 'Agropecuária', 'Tecnologia',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Almeida',
+    'Ribeiro', 'Carvalho', 'Gomes', 'Martins', 'Araújo', 'Rocha', 'Barbosa', 'Cardoso', 'Teixeira',
+]
+SUFIXOS_EMPRESA = ['Ltda', 'S.A.', 'ME', 'EIRELI', '']
+NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+    'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sabrina', 'Tiago',
+]
+TEMPOS_CONTRATO = {'12': 25, '24': 35, '36': 30, '60': 10}
+
+# Período das datas de criação (mais ordens nos meses recentes e nos dias úteis)
+INICIO_CRIACAO = pd.Timestamp('2022-01-01')
+DIAS_CRIACAO = 3 * 365
+
+
+# ---------------------------------------------------------------------------
+# Geração da planilha sintética
+# ---------------------------------------------------------------------------
+
+# Sorteia valores de um dicionário {valor: peso}
+def _sortear(rng, pesos, quantidade):
+    valores = list(pesos)
+    probabilidades = np.array(list(pesos.values()), dtype='float64')
+    return rng.choice(np.array(valores, dtype=object), quantidade, p=probabilidades / probabilidades.sum())
+
+# Sorteia índices com distribuição de cauda longa (poucos clientes/produtos concentram as ordens)
+def _sortear_zipf(rng, tamanho, quantidade, expoente=1.1):
+    pesos = 1 / np.arange(1, tamanho + 1) ** expoente
+    return rng.choice(tamanho, quantidade, p=pesos / pesos.sum())
+
+# Substitui uma fração dos valores pelo resultado de sujeira(quantidade)
+def _sujar(rng, valores, fracao, sujeira):
+    posicoes = np.flatnonzero(rng.random(len(valores)) < fracao)
+    if len(posicoes):
+        valores[posicoes] = sujeira(len(posicoes))
+    return valores
+
+# Monta os cadastros fixos (clientes, produtos e gerentes) de uma semente
+def _cadastros(rng):
+    clientes = np.array([
+        f"{rng.choice(RAZOES_SOCIAIS)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SUFIXOS_EMPRESA)}".strip()
+        for _ in range(5000)
+    ], dtype=object)
+    produtos = np.array([f"{tipo} {velocidade}" for tipo in TIPOS_PRODUTO for velocidade in VELOCIDADES], dtype=object)
+    gerentes = np.array([f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}" for _ in range(60)], dtype=object)
+    return clientes, produtos, gerentes
+
+# Gera as datas de criação com tendência de crescimento e menos ordens nos fins de semana
+def _datas_criacao(rng, quantidade):
+    dias = np.floor(DIAS_CRIACAO * np.sqrt(rng.random(quantidade))).astype('int64')
+    datas = INICIO_CRIACAO + pd.to_timedelta(dias, unit='D') + pd.to_timedelta(rng.integers(8 * 3600, 19 * 3600, quantidade), unit='s')
+    fim_de_semana = datas.dayofweek >= 5
+    adiadas = fim_de_semana & (rng.random(quantidade) < 0.8)
+    datas = datas.where(~adiadas, datas + pd.to_timedelta(7 - datas.dayofweek, unit='D'))
+    return datas
+
+# Escreve as datas nos formatos encontrados nas planilhas reais
+def _formatar_datas(rng, datas):
+    valores = np.array(datas.to_pydatetime(), dtype=object)
+    sorteio = rng.random(len(valores))
+    texto_ponto = sorteio < 0.15
+    texto_barra = (sorteio >= 0.15) & (sorteio < 0.20)
+    serial = (sorteio >= 0.20) & (sorteio < 0.23)
+    valores[texto_ponto] = datas[texto_ponto].strftime('%d.%m.%Y %H:%M:%S').to_numpy(dtype=object)
+    valores[texto_barra] = datas[texto_barra].strftime('%d/%m/%Y').to_numpy(dtype=object)
+    valores[serial] = ((datas[serial] - pd.Timestamp('1899-12-30')).days).to_numpy().astype(float)
+    _sujar(rng, valores, 0.01, lambda n: rng.choice(np.array([None, '', 'sem data', '#N/A', '00.00.0000'], dtype=object), n))
+    return valores
+
+# Gera um bloco de linhas da planilha, a partir da linha `inicio`
+def _gerar_bloco(rng, cadastros, inicio, quantidade):
+    clientes, produtos, gerentes = cadastros
+    colunas = {}
+
+    # Chave: cada cotação tem três itens (10, 20 e 30); uma parte das chaves se repete
+    numero_linha = np.arange(inicio, inicio + quantidade)
+    cotacao = 2_000_000 + numero_linha // 3
+    item = (numero_linha % 3 + 1) * 10
+    repetidas = rng.random(quantidade) < 0.005
+    cotacao[repetidas] = np.maximum(cotacao[repetidas] - rng.integers(1, 50, repetidas.sum()), 2_000_000)
+    # A cotação costuma vir como número; uma parte vem como texto
+    numero_cotacao = cotacao.astype(object)
+    como_texto = rng.random(quantidade) < 0.1
+    numero_cotacao[como_texto] = cotacao[como_texto].astype(str)
+    colunas['Número da Cotação'] = numero_cotacao
+    colunas['Item (SD)'] = item.astype(object)
+
+    indice_cliente = _sortear_zipf(rng, len(clientes), quantidade)
+    indice_produto = _sortear_zipf(rng, len(produtos), quantidade, expoente=0.8)
+    nome_cliente = clientes[indice_cliente].copy()
+    colunas['Descrição d/operação'] = np.array(
+        [f"Ativação {produto} - {cliente}" for produto, cliente in zip(produtos[indice_produto], nome_cliente)],
+        dtype=object
+    )
+    colunas['Número da Oportunidade'] = _sujar(
+        rng, np.char.add('OP-', (700_000 + numero_linha // 3).astype(str)).astype(object), 0.05, lambda n: [None] * n
+    )
+    colunas['Número da VTA'] = _sujar(rng, rng.integers(10**6, 10**7, quantidade).astype(object), 0.3, lambda n: [None] * n)
+    colunas['Número do Circuito'] = _sujar(
+        rng, np.char.add('CIR/', rng.integers(10**5, 10**6, quantidade).astype(str)).astype(object), 0.2, lambda n: [''] * n
+    )
+    colunas['Status cotação'] = _sujar(rng, _sortear(rng, STATUS_COTACAO, quantidade), 0.01, lambda n: [None] * n)
+    colunas['Denominação produto'] = _sujar(
+        rng, produtos[indice_produto].copy(), 0.02, lambda n: np.char.add(produtos[rng.integers(0, len(produtos), n)].astype(str), '  ').astype(object)
+    )
+
+    # Quantidade: quase sempre 1; às vezes texto, decimal ou vazia
+    quantidade_itens = (rng.poisson(0.4, quantidade) + 1).astype(object)
+    _sujar(rng, quantidade_itens, 0.02, lambda n: rng.choice(np.array(['1', '2', 2.0, None, '', 'dois'], dtype=object), n))
+    colunas['Quantidade'] = quantidade_itens
+
+    status = _sortear(rng, STATUS, quantidade)
+    for oficial, variantes in VARIANTES_STATUS.items():
+        mudar = (status == oficial) & (rng.random(quantidade) < 0.1)
+        status[mudar] = rng.choice(np.array(variantes, dtype=object), mudar.sum())
+    colunas['Status'] = _sujar(rng, status, 0.02, lambda n: rng.choice(np.array([None, '', '#N/A'], dtype=object), n))
+
+    # Valor: distribuição log-normal (mediana ~R$ 3 mil), com textos, vazios e alguns valores fora da curva
+    valor = np.round(rng.lognormal(8, 1.2, quantidade), 2).astype(object)
+    _sujar(rng, valor, 0.02, lambda n: rng.choice(np.array(['1500.00', ' 320.5 ', None, '', 'R$ 1.200,00', 0], dtype=object), n))
+    _sujar(rng, valor, 0.001, lambda n: np.round(rng.uniform(1e6, 5e6, n), 2).astype(object))
+    colunas['Valor pedido bruto'] = valor
+
+    colunas['Criado em'] = _formatar_datas(rng, _datas_criacao(rng, quantidade))
+    colunas['Emissor da Ordem'] = (100_000 + indice_cliente).astype(object)
+    colunas['Nome do Emissor da Ordem'] = _sujar(
+        rng, nome_cliente, 0.03, lambda n: np.char.add(' ', clientes[rng.integers(0, len(clientes), n)].astype(str)).astype(object)
+    )
+    colunas['Nome do Gerente de Contas'] = _sujar(
+        rng, gerentes[indice_cliente % len(gerentes)].copy(), 0.02, lambda n: [None] * n
+    )
+    colunas['Organização de Vendas'] = np.char.add('BR', (indice_cliente % 12 + 1).astype(str)).astype(object)
+    colunas['Canal de distribuição'] = rng.choice(np.array([10, 20, 30], dtype=object), quantidade, p=[0.6, 0.3, 0.1])
+    colunas['Setor de atividade'] = rng.choice(np.array(['01', '02', '03', '04', '05'], dtype=object), quantidade)
+    colunas['ID produto'] = np.char.add('PRD', (1000 + indice_produto).astype(str)).astype(object)
+    colunas['Tempo de Contrato'] = _sujar(
+        rng, _sortear(rng, TEMPOS_CONTRATO, quantidade), 0.05, lambda n: rng.choice(np.array([12, 36, None], dtype=object), n)
+    )
+
+    return [colunas[coluna].tolist() for coluna in COLUNAS_ESPERADAS]
+
+# Função para gerar uma planilha CARGA_PAINEL.xlsx sintética
+# (o openpyxl grava os textos na própria célula, sem a tabela de textos compartilhados do
+# Excel; a leitura dessas planilhas é um pouco mais lenta que a de um arquivo salvo no Excel)
+def gerar_planilha(caminho, linhas, semente=0):
+    rng = np.random.default_rng(semente)
+    cadastros = _cadastros(rng)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('CARGA_PAINEL')
+    # O Excel grava a dimensão da aba (o total de linhas usado no progresso da importação);
+    # a aba write-only do openpyxl não grava, então a dimensão é informada aqui
+    ws.calculate_dimension = lambda: f"A1:{get_column_letter(len(COLUNAS_ESPERADAS))}{linhas + 1}"
+    ws.append(list(COLUNAS_ESPERADAS))
+    for inicio in range(0, linhas, TAMANHO_BLOCO_GERACAO):
+        colunas = _gerar_bloco(rng, cadastros, inicio, min(TAMANHO_BLOCO_GERACAO, linhas - inicio))
+        for linha in zip(*colunas):
+            ws.append(linha)
+
+    temporario = f"{caminho}.parcial"
+    wb.save(temporario)
+    os.replace(temporario, caminho)
+    return caminho
+
+# Função para gerar as mesmas ordens sintéticas em um DataFrame, com as colunas da planilha
+# (sem gravar o arquivo: usada nos testes, que importam direto do DataFrame)
+def gerar_dataframe(linhas, semente=0):
+    rng = np.random.default_rng(semente)
+    colunas = _gerar_bloco(rng, _cadastros(rng), 0, linhas)
+    return pd.DataFrame(dict(zip(COLUNAS_ESPERADAS, colunas)))
+
+# Função para obter a planilha de um tamanho (gerada uma única vez por semente)
+def obter_planilha(linhas, semente=0, pasta=PASTA_BENCHMARK):
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"CARGA_PAINEL_{linhas}_s{semente}.xlsx")
+    if not os.path.exists(caminho):
+        print(f"Gerando {caminho}...", flush=True)
+        gerar_planilha(caminho, linhas, semente)
+    return caminho
+
+
+# ---------------------------------------------------------------------------
+# Medição
+# ---------------------------------------------------------------------------
+
+# Função para obter a memória residente do processo em bytes (None fora do Linux)
+def memoria_residente():
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# Acompanha o pico da memória residente durante uma etapa, lendo-a periodicamente
+# (picos mais curtos que o intervalo de amostragem podem não ser vistos)
+class MonitorMemoria:
+    def __init__(self, intervalo=INTERVALO_AMOSTRA_MEMORIA):
+        self.intervalo = intervalo
+        self.inicial = None
+        self.pico = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.inicial = self.pico = memoria_residente()
+        if self.inicial is not None:
+            self._thread = threading.Thread(target=self._amostrar, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._registrar()
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            self._registrar()
+
+    def _registrar(self):
+        atual = memoria_residente()
+        if atual is not None and atual > self.pico:
+            self.pico = atual
+
+# Função para medir uma etapa: executa `funcao` `repeticoes` vezes e registra tempo e memória
+# preparar() roda antes de cada repetição, fora da medição
+def medir_etapa(resultados, etapa, funcao, repeticoes=1, preparar=None):
+    tempos = []
+    retorno = None
+    gc.collect()
+    with MonitorMemoria() as memoria:
+        for _ in range(repeticoes):
+            if preparar:
+                preparar()
+            inicio = time.perf_counter()
+            retorno = funcao()
+            tempos.append(time.perf_counter() - inicio)
+
+    resultado = {
+        'etapa': etapa,
+        'segundos': min(tempos),
+        'segundos_mediana': statistics.median(tempos),
+        'repeticoes': repeticoes,
+        'memoria_pico_mb': _megabytes(memoria.pico - memoria.inicial) if memoria.inicial is not None else None,
+        'rss_pico_mb': _megabytes(memoria.pico) if memoria.pico is not None else None,
+    }
+    resultados.append(resultado)
+    print(f"  {etapa:<40} {resultado['segundos']:>9.3f}s  {_formatar_memoria(resultado['memoria_pico_mb'])}", flush=True)
+    return retorno, resultado
+
+def _megabytes(valor):
+    return round(valor / 1024 ** 2, 1)
+
+def _formatar_memoria(valor):
+    return f"+{valor:.1f} MB" if valor is not None else ''
+
+
+# ---------------------------------------------------------------------------
+# Etapas medidas
+# ---------------------------------------------------------------------------
+
+# Função para importar a planilha como na página Atualizar Planilha
+def importar_planilha(caminho_banco, caminho_planilha, modo='sincronizar'):
+    conn = conectar(caminho_banco)
+    try:
+        colunas_encontradas, _, total_linhas, blocos = ler_planilha(caminho_planilha)
+        return inserir_blocos(conn, blocos, colunas_encontradas, modo=modo, total_linhas=total_linhas)
+    finally:
+        conn.close()
+
+# Filtros da página Consultar Dados (o padrão da página marca todos os status)
+def filtros_consulta(conn):
+    status = valores_distintos(conn, 'status')
+    status_cotacao = valores_distintos(conn, 'status_cotacao')
+    produto = mais_frequentes(conn, 'denominacao_produto', 1)
+    cliente = mais_frequentes(conn, 'nome_emissor_ordem', 1)
+    produto = produto.iloc[0, 0] if not produto.empty else None
+    cliente = cliente.iloc[0, 0].split()[0] if not cliente.empty else None
+
+    base = {'status': status, 'status_cotacao': status_cotacao, 'produto': None, 'cliente': None}
+    return {
+        'padrao': base,
+        'status': {**base, 'status': status[:1]},
+        'produto': {**base, 'produto': produto},
+        'cliente': {**base, 'cliente': cliente},
+        'combinado': {**base, 'status': status[:2], 'produto': produto, 'cliente': cliente},
+    }
+
+# Função para medir todas as etapas com uma planilha de `linhas` linhas
+def executar_benchmark(linhas, semente=0, repeticoes=3, pasta=PASTA_BENCHMARK, formatos=None):
+    caminho_planilha = obter_planilha(linhas, semente, pasta)
+    resultados = []
+    print(f"{linhas} linhas ({caminho_planilha})", flush=True)
+
+    with tempfile.TemporaryDirectory(dir=pasta) as trabalho:
+        caminho_banco = os.path.join(trabalho, 'painel.db')
+
+        (resumo, erros), resultado = medir_etapa(
+            resultados, 'importacao', lambda: importar_planilha(caminho_banco, caminho_planilha)
+        )
+        resultado['detalhes'] = {**resumo, 'erros': len(erros)}
+        (resumo, erros), resultado = medir_etapa(
+            resultados, 'reimportacao_sem_alteracoes', lambda: importar_planilha(caminho_banco, caminho_planilha)
+        )
+        resultado['detalhes'] = {**resumo, 'erros': len(erros)}
+
+        conn = conectar_leitura(caminho_banco)
+        try:
+            # Carga do DataFrame usado pelo painel: do banco e do snapshot Arrow
+            medir_etapa(resultados, 'carregar_dados_banco', lambda: carregar_ordens_compactas(conn), repeticoes)
+            medir_etapa(resultados, 'gravar_snapshot', lambda: gravar_snapshot(conn))
+            medir_etapa(resultados, 'carregar_dados_snapshot', lambda: carregar_snapshot(conn), repeticoes)
+
+            # Agregações do dashboard e dos relatórios
+            inicio, fim = periodo_disponivel(conn)
+            agregacoes = {
+                'totais_gerais': lambda: totais_gerais(conn),
+                'contar_por_status': lambda: contar_por_status(conn),
+                'valor_por_status_cotacao': lambda: valor_por_status_cotacao(conn),
+                'ordens_por_mes': lambda: ordens_por_mes(conn),
+                'top_clientes': lambda: mais_frequentes(conn, 'nome_emissor_ordem'),
+                'top_produtos': lambda: mais_frequentes(conn, 'denominacao_produto'),
+                'periodo_disponivel': lambda: periodo_disponivel(conn),
+                'resumo_periodo': lambda: resumo_periodo(conn, inicio, fim),
+                'evolucao_diaria': lambda: evolucao_diaria(conn, inicio, fim),
+                'performance_por_status': lambda: performance_por_status(conn),
+            }
+            for nome, funcao in agregacoes.items():
+                medir_etapa(resultados, f"agregacao_{nome}", funcao, repeticoes)
+
+            # Relatórios pelo duckdb (sobre o snapshot gravado acima) e paridade com o SQLite
+            if duckdb_instalado():
+                relatorios = {
+                    'periodo_disponivel': (),
+                    'resumo_periodo': (inicio, fim),
+                    'evolucao_diaria': (inicio, fim),
+                    'performance_por_status': (),
+                }
+                for nome, argumentos in relatorios.items():
+                    medir_etapa(
+                        resultados, f"agregacao_{nome}_duckdb",
+                        lambda: executar_relatorio(conn, nome, *argumentos, motor='duckdb'), repeticoes
+                    )
+                diferencas, resultado = medir_etapa(resultados, 'paridade_motores', lambda: comparar_motores(conn))
+                if diferencas == SNAPSHOT_INDISPONIVEL:
+                    resultado['detalhes'] = {'divergentes': None, 'motivo': diferencas}
+                    print(f"  paridade dos motores não verificada: {diferencas}")
+                else:
+                    resultado['detalhes'] = {'divergentes': [nome for nome, diferenca in diferencas.items() if diferenca]}
+                if resultado['detalhes']['divergentes']:
+                    print(f"  relatórios divergentes entre os motores: {resultado['detalhes']['divergentes']}")
+
+            # Filtros da consulta: opções, contagem, primeira página e a seguinte
+            for coluna in COLUNAS_FILTRO:
+                medir_etapa(resultados, f"opcoes_filtro_{coluna}", lambda: valores_distintos(conn, coluna), repeticoes)
+            for nome, filtros in filtros_consulta(conn).items():
+                medir_etapa(resultados, f"filtro_{nome}_contagem", lambda: contar_ordens(conn, filtros), repeticoes)
+                pagina, _ = medir_etapa(
+                    resultados, f"filtro_{nome}_pagina", lambda: pagina_ordens(conn, filtros), repeticoes
+                )
+                if not pagina.empty:
+                    apos = cursor_da_pagina(pagina)
+                    medir_etapa(
+                        resultados, f"filtro_{nome}_pagina_seguinte",
+                        lambda: pagina_ordens(conn, filtros, apos=apos), repeticoes
+                    )
+
+            # Exportação de todas as ordens (sem reaproveitar arquivos de medições anteriores)
+            filtros = filtros_consulta(conn)['padrao']
+            pasta_exportacao = os.path.join(trabalho, 'exportacoes')
+            for formato in formatos or FORMATOS_EXPORTACAO:
+                caminho, resultado = medir_etapa(
+                    resultados, f"exportacao_{formato}",
+                    lambda: exportar_ordens(conn, filtros, formato, pasta_exportacao),
+                    preparar=lambda: shutil.rmtree(pasta_exportacao, ignore_errors=True)
+                )
+                resultado['detalhes'] = {'tamanho_mb': _megabytes(os.path.getsize(caminho))}
+        finally:
+            conn.close()
+
+    return {'linhas': linhas, 'etapas': resultados}
+
+
+# ---------------------------------------------------------------------------
+# Leituras durante uma importação
+# ---------------------------------------------------------------------------
+
+# Função para medir as leituras do dashboard enquanto uma importação grava no banco
+# Com o WAL e o pool somente leitura, as leituras não esperam pela transação da carga:
+# os tempos durante a gravação ('aplicacao') devem ficar próximos dos de antes da importação.
+# Fases: antes (base, sem importação), preparacao (leitura da planilha para a tabela de carga),
+# aplicacao (transação da carga, com a trava de escrita) e depois
+def medir_leituras_durante_importacao(linhas_base, linhas_carga, leitores=4, semente=0, pasta=PASTA_BENCHMARK):
+    planilha_base = obter_planilha(linhas_base, semente, pasta)
+    # Outra semente: as chaves se repetem (atualizações) e as linhas a mais são inserções
+    planilha_carga = obter_planilha(linhas_carga, semente + 1, pasta)
+    print(f"{leitores} leitores durante a importação de {linhas_carga} linhas sobre {linhas_base}", flush=True)
+
+    with tempfile.TemporaryDirectory(dir=pasta) as trabalho:
+        caminho_banco = os.path.join(trabalho, 'painel.db')
+        importar_planilha(caminho_banco, planilha_base)
+
+        pool = PoolConexoes(caminho_banco, tamanho=leitores, somente_leitura=True)
+        with pool.conexao() as conn:
+            filtros = filtros_consulta(conn)['padrao']
+
+        fase = ['antes']
+        latencias = {nome: [] for nome in FASES_CONCORRENCIA}
+        erros = []
+        parar = threading.Event()
+
+        def ler():
+            while not parar.is_set():
+                fase_leitura = fase[0]
+                inicio = time.perf_counter()
+                try:
+                    with pool.conexao() as conn:
+                        totais_gerais(conn)
+                        contar_por_status(conn)
+                        pagina_ordens(conn, filtros)
+                    latencias[fase_leitura].append(time.perf_counter() - inicio)
+                except sqlite3.Error as e:
+                    erros.append(f"{fase_leitura}: {e}")
+                parar.wait(INTERVALO_LEITURA)
+
+        threads = [threading.Thread(target=ler, daemon=True) for _ in range(leitores)]
+        for thread in threads:
+            thread.start()
+        try:
+            time.sleep(SEGUNDOS_BASE_CONCORRENCIA)
+
+            fase[0] = 'preparacao'
+            conn = conectar(caminho_banco)
+            try:
+                colunas_encontradas, _, total_linhas, blocos = ler_planilha(planilha_carga)
+                inicio = time.perf_counter()
+                resumo, erros_importacao = inserir_blocos(
+                    conn, blocos, colunas_encontradas, modo='sincronizar', total_linhas=total_linhas,
+                    ao_aplicar=lambda _: fase.__setitem__(0, 'aplicacao')
+                )
+                segundos = time.perf_counter() - inicio
+            finally:
+                conn.close()
+
+            fase[0] = 'depois'
+            time.sleep(SEGUNDOS_BASE_CONCORRENCIA)
+        finally:
+            parar.set()
+            for thread in threads:
+                thread.join()
+            pool.fechar()
+
+    fases = {}
+    for nome, tempos in latencias.items():
+        tempos = sorted(tempos)
+        fases[nome] = {
+            'leituras': len(tempos),
+            'p50_ms': round(statistics.median(tempos) * 1000, 1) if tempos else None,
+            'p95_ms': round(tempos[max(int(len(tempos) * 0.95) - 1, 0)] * 1000, 1) if tempos else None,
+            'max_ms': round(tempos[-1] * 1000, 1) if tempos else None,
+        }
+        if tempos:
+            print(
+                f"  {nome:<12} {len(tempos):>6} leituras  p50 {fases[nome]['p50_ms']:>8.1f} ms  "
+                f"p95 {fases[nome]['p95_ms']:>8.1f} ms  máx {fases[nome]['max_ms']:>8.1f} ms",
+                flush=True
+            )
+    print(f"  importação em {segundos:.1f}s, {len(erros)} leituras com erro", flush=True)
+
+    return {
+        'linhas_base': linhas_base,
+        'linhas_carga': linhas_carga,
+        'leitores': leitores,
+        'importacao_segundos': round(segundos, 2),
+        'importacao': {**resumo, 'erros': len(erros_importacao)},
+        'fases': fases,
+        'erros_leitura': len(erros),
+        'mensagens_erro': sorted(set(erros))[:10],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Resultados
+# ---------------------------------------------------------------------------
+
+# Função para identificar o commit medido (None fora de um repositório git)
+def versao_codigo():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        alterado = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}+alterado" if alterado else commit
+
+# Função para medir os tamanhos pedidos e montar o relatório
+def executar(tamanhos=TAMANHOS_PADRAO, semente=0, repeticoes=3, pasta=PASTA_BENCHMARK, formatos=None):
+    return {
+        'commit': versao_codigo(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'versoes': {'pandas': pd.__version__, 'numpy': np.__version__},
+        'semente': semente,
+        'instrumentacao': INSTRUMENTACAO_ATIVA,
+        'execucoes': [
+            executar_benchmark(linhas, semente, repeticoes, pasta, formatos) for linhas in tamanhos
+        ],
+    }
+
+# Função para comparar dois relatórios (razão > 1: o atual é mais lento)
+def comparar_resultados(base, atual):
+    def indexar(relatorio):
+        return {
+            (execucao['linhas'], etapa['etapa']): etapa
+            for execucao in relatorio['execucoes'] for etapa in execucao['etapas']
+        }
+
+    etapas_base = indexar(base)
+    linhas = []
+    for chave, etapa in indexar(atual).items():
+        anterior = etapas_base.get(chave)
+        if anterior is None:
+            continue
+        linhas.append({
+            'linhas': chave[0],
+            'etapa': chave[1],
+            'segundos_base': anterior['segundos'],
+            'segundos_atual': etapa['segundos'],
+            'razao_tempo': etapa['segundos'] / anterior['segundos'] if anterior['segundos'] else None,
+            'memoria_base_mb': anterior.get('memoria_pico_mb'),
+            'memoria_atual_mb': etapa.get('memoria_pico_mb'),
+        })
+    return pd.DataFrame(linhas)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark do painel de ordens de serviço")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    gerar = comandos.add_parser('gerar', help="gera as planilhas sintéticas")
+    gerar.add_argument('--linhas', type=int, nargs='+', default=list(TAMANHOS_PADRAO))
+    gerar.add_argument('--semente', type=int, default=0)
+    gerar.add_argument('--pasta', default=PASTA_BENCHMARK)
+
+    medir = comandos.add_parser('executar', help="mede as etapas e grava o JSON de resultados")
+    medir.add_argument('--linhas', type=int, nargs='+', default=list(TAMANHOS_PADRAO))
+    medir.add_argument('--semente', type=int, default=0)
+    medir.add_argument('--repeticoes', type=int, default=3)
+    medir.add_argument('--formatos', nargs='+', choices=list(FORMATOS_EXPORTACAO))
+    medir.add_argument('--pasta', default=PASTA_BENCHMARK)
+    medir.add_argument('--saida', help="arquivo JSON (padrão: <pasta>/resultados_<commit>.json)")
+
+    concorrencia = comandos.add_parser(
+        'concorrencia', help="mede as leituras do dashboard durante uma importação grande"
+    )
+    concorrencia.add_argument('--linhas-base', type=int, default=200_000)
+    concorrencia.add_argument('--linhas-carga', type=int, default=500_000)
+    concorrencia.add_argument('--leitores', type=int, default=4)
+    concorrencia.add_argument('--semente', type=int, default=0)
+    concorrencia.add_argument('--pasta', default=PASTA_BENCHMARK)
+    concorrencia.add_argument('--saida', help="arquivo JSON (opcional)")
+
+    comparar = comandos.add_parser('comparar', help="compara dois arquivos de resultados")
+    comparar.add_argument('base')
+    comparar.add_argument('atual')
+
+    args = parser.parse_args(argumentos)
+
+    if args.comando == 'gerar':
+        for linhas in args.linhas:
+            print(obter_planilha(linhas, args.semente, args.pasta))
+
+    elif args.comando == 'executar':
+        relatorio = executar(args.linhas, args.semente, args.repeticoes, args.pasta, args.formatos)
+        saida = args.saida or os.path.join(args.pasta, f"resultados_{relatorio['commit'] or 'local'}.json")
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {saida}")
+
+    elif args.comando == 'concorrencia':
+        resultado = medir_leituras_durante_importacao(
+            args.linhas_base, args.linhas_carga, args.leitores, args.semente, args.pasta
+        )
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as arquivo:
+                json.dump({'commit': versao_codigo(), **resultado}, arquivo, ensure_ascii=False, indent=2)
+            print(f"Resultados gravados em {args.saida}")
+
+    elif args.comando == 'comparar':
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        with open(args.atual, encoding='utf-8') as arquivo:
+            atual = json.load(arquivo)
+        comparacao = comparar_resultados(base, atual)
+        if comparacao.empty:
+            print("Nenhuma etapa em comum entre os dois resultados.")
+        else:
+            print(comparacao.round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
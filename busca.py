@@ -0,0 +1,90 @@
+import re
+import sqlite3
+
+# Índice de texto completo (FTS5) para a busca de clientes/operações.
+# A tabela usa o conteúdo de ordens_servico (external content) e é mantida
+# por gatilhos, então qualquer INSERT/UPDATE/DELETE nas ordens a atualiza.
+
+# Colunas indexadas na busca
+COLUNAS_BUSCA = (
+    'nome_emissor_ordem',
+    'descricao_operacao',
+    'numero_oportunidade',
+    'numero_cotacao',
+    'numero_circuito',
+)
+
+# Tokenizador sem acentos (José = jose) e prefixos pré-indexados para buscas curtas
+OPCOES_FTS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+
+# Função para criar o índice de busca e os gatilhos que o mantêm sincronizado
+def criar_indice_busca(conn):
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ordens_busca'"
+    ).fetchone()
+
+    if not existe:
+        try:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE ordens_busca USING fts5 (
+                    {', '.join(COLUNAS_BUSCA)},
+                    content = 'ordens_servico', content_rowid = 'id', {OPCOES_FTS}
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite compilado sem FTS5: a busca volta a usar LIKE
+            return
+        # Bancos que já tinham ordens antes do índice
+        conn.execute("INSERT INTO ordens_busca (ordens_busca) VALUES ('rebuild')")
+
+    criar_gatilhos_busca(conn)
+
+# Função para criar os gatilhos que mantêm o índice de busca sincronizado
+def criar_gatilhos_busca(conn):
+    colunas = ', '.join(COLUNAS_BUSCA)
+    novos = ', '.join(f'new.{coluna}' for coluna in COLUNAS_BUSCA)
+    antigos = ', '.join(f'old.{coluna}' for coluna in COLUNAS_BUSCA)
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS ordens_busca_insert AFTER INSERT ON ordens_servico BEGIN
+            INSERT INTO ordens_busca (rowid, {colunas}) VALUES (new.id, {novos});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS ordens_busca_delete AFTER DELETE ON ordens_servico BEGIN
+            INSERT INTO ordens_busca (ordens_busca, rowid, {colunas}) VALUES ('delete', old.id, {antigos});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS ordens_busca_update AFTER UPDATE OF {colunas} ON ordens_servico BEGIN
+            INSERT INTO ordens_busca (ordens_busca, rowid, {colunas}) VALUES ('delete', old.id, {antigos});
+            INSERT INTO ordens_busca (rowid, {colunas}) VALUES (new.id, {novos});
+        END
+    ''')
+
+# Função para desligar os gatilhos durante uma carga em massa (na transação de quem chama)
+# Atualizar o índice linha a linha fica cada vez mais lento conforme a carga cresce;
+# reconstruí-lo de uma vez no fim (reconstruir_indice_busca) custa ~1s a cada 200 mil ordens.
+def remover_gatilhos_busca(conn):
+    for evento in ('insert', 'delete', 'update'):
+        conn.execute(f"DROP TRIGGER IF EXISTS ordens_busca_{evento}")
+
+# Função para reconstruir o índice de busca e religar os gatilhos (na transação de quem chama)
+def reconstruir_indice_busca(conn):
+    if not busca_disponivel(conn):
+        return
+    conn.execute("INSERT INTO ordens_busca (ordens_busca) VALUES ('rebuild')")
+    criar_gatilhos_busca(conn)
+
+# Função para verificar se o índice de busca existe neste banco
+def busca_disponivel(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'ordens_busca'"
+    ).fetchone() is not None
+
+# Função para transformar o texto digitado em uma expressão MATCH por prefixo
+# "jose silv" -> "jose"* "silv"* (todas as palavras, cada uma como prefixo)
+def expressao_busca(termo):
+    palavras = re.findall(r'\w+', termo or '')
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
@@ -0,0 +1,159 @@
+import functools
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Cache das consultas do painel, compartilhado por todas as sessões do processo.
+# Cada entrada é identificada por (consulta, parâmetros, geração dos dados): a
+# importação incrementa a geração (banco.incrementar_versao_dados) e as entradas
+# antigas simplesmente deixam de ser usadas, sem limpar o cache inteiro.
+# Os valores devolvidos são compartilhados entre as sessões e não devem ser alterados.
+
+# Limite padrão de memória do cache
+LIMITE_MEMORIA_CACHE = 512 * 1024 ** 2
+
+
+# Função para estimar a memória ocupada por um valor em cache
+def tamanho_valor(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+# Converte os argumentos de uma chamada em uma chave imutável
+def _chave_argumentos(valor):
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, _chave_argumentos(item)) for chave, item in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_chave_argumentos(item) for item in valor)
+    if isinstance(valor, set):
+        return tuple(sorted(_chave_argumentos(item) for item in valor))
+    return valor
+
+
+# Consulta em andamento: quem pede a mesma chave espera por este resultado
+class _Calculo:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.valor = None
+        self.erro = None
+
+
+# Cache LRU com limite de memória e coalescência de chamadas iguais (single-flight)
+class CacheConsultas:
+    def __init__(self, limite_memoria=LIMITE_MEMORIA_CACHE):
+        self.limite_memoria = limite_memoria
+        self._entradas = OrderedDict()   # chave -> (valor, tamanho)
+        self._em_andamento = {}          # chave -> _Calculo
+        self._trava = threading.Lock()
+        self._geracao = None
+        self.memoria = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.coalescidas = 0
+        self.descartes = 0
+
+    # Função para obter o valor da chave, calculando-o uma única vez se necessário
+    # chave: (consulta, parâmetros, geração dos dados)
+    def obter(self, chave, calcular):
+        with self._trava:
+            self._trocar_geracao(chave[-1])
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return self._entradas[chave][0]
+
+            calculo = self._em_andamento.get(chave)
+            if calculo is not None:
+                self.coalescidas += 1
+                responsavel = False
+            else:
+                calculo = self._em_andamento[chave] = _Calculo()
+                self.falhas += 1
+                responsavel = True
+
+        if not responsavel:
+            calculo.pronto.wait()
+            if calculo.erro is not None:
+                # O cálculo coalescido falhou: tenta de novo, sem guardar
+                return calcular()
+            return calculo.valor
+
+        try:
+            calculo.valor = calcular()
+        except BaseException as e:
+            calculo.erro = e
+            raise
+        finally:
+            with self._trava:
+                del self._em_andamento[chave]
+                if calculo.erro is None:
+                    self._guardar(chave, calculo.valor)
+            calculo.pronto.set()
+        return calculo.valor
+
+    # Descarta as entradas de gerações anteriores quando os dados mudam
+    # (uma chamada que leu a geração antes da mudança não faz o cache voltar atrás)
+    def _trocar_geracao(self, geracao):
+        if self._geracao is not None and geracao <= self._geracao:
+            return
+        self._geracao = geracao
+        for chave in [chave for chave in self._entradas if chave[-1] != geracao]:
+            self.memoria -= self._entradas.pop(chave)[1]
+            self.descartes += 1
+
+    # Guarda o valor e descarta os menos usados até caber no limite de memória
+    def _guardar(self, chave, valor):
+        if chave[-1] != self._geracao:
+            # Os dados mudaram durante o cálculo
+            return
+        tamanho = tamanho_valor(valor)
+        if tamanho > self.limite_memoria:
+            return
+        self._entradas[chave] = (valor, tamanho)
+        self.memoria += tamanho
+        while self.memoria > self.limite_memoria:
+            _, (_, tamanho_antigo) = self._entradas.popitem(last=False)
+            self.memoria -= tamanho_antigo
+            self.descartes += 1
+
+    # Função para esvaziar o cache
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self.memoria = 0
+
+    # Função para obter os contadores do cache
+    def estatisticas(self):
+        with self._trava:
+            return {
+                'entradas': len(self._entradas),
+                'memoria_mb': self.memoria / 1024 ** 2,
+                'limite_mb': self.limite_memoria / 1024 ** 2,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'coalescidas': self.coalescidas,
+                'descartes': self.descartes,
+            }
+
+
+# Decorador que guarda o resultado da função no cache devolvido por obter_cache(),
+# identificado pela função (módulo e nome), pelos argumentos e pela geração atual (obter_geracao())
+def em_cache(obter_cache, obter_geracao):
+    def decorador(funcao):
+        # Páginas diferentes podem ter funções com o mesmo nome
+        nome = (funcao.__module__, funcao.__qualname__)
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            parametros = (_chave_argumentos(args), _chave_argumentos(kwargs))
+            chave = (nome, parametros, obter_geracao())
+            return obter_cache().obter(chave, lambda: funcao(*args, **kwargs))
+        return envoltorio
+    return decorador
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Carga das ordens em um DataFrame com tipos compactos, guiada pelo esquema:
+# colunas de poucos valores viram categoria, inteiros usam o menor tipo que
+# comporta os valores e as datas viram datetime64 em vez de texto.
+
+# Tipo de cada coluna carregada (as de controle interno, COLUNAS_CONTROLE em banco.py, ficam de fora)
+ESQUEMA_ORDENS = {
+    'id': 'inteiro',
+    'descricao_operacao': 'texto',
+    'numero_oportunidade': 'texto',
+    'numero_vta': 'texto',
+    'numero_cotacao': 'texto',
+    'numero_circuito': 'texto',
+    'status_cotacao': 'categoria',
+    'denominacao_produto': 'categoria',
+    'quantidade': 'inteiro',
+    'status': 'categoria',
+    'valor_pedido_bruto': 'decimal',
+    'criado_em': 'data',
+    'emissor_ordem': 'texto',
+    'nome_emissor_ordem': 'texto',
+    'nome_gerente_contas': 'categoria',
+    'organizacao_vendas': 'categoria',
+    'canal_distribuicao': 'categoria',
+    'setor_atividade': 'categoria',
+    'item_sd': 'categoria',
+    'id_produto': 'categoria',
+    'tempo_contrato': 'categoria',
+    'data_importacao': 'data_hora',
+    'data_atualizacao': 'data_hora',
+}
+
+# Linhas lidas do banco por vez
+TAMANHO_BLOCO_CARGA = 50000
+
+
+# Função para converter uma coluna inteira no menor tipo que comporta os valores
+# (com NULL usa os tipos Int8/Int16/... do pandas, que aceitam valores ausentes)
+def compactar_inteiros(serie):
+    serie = pd.to_numeric(serie)
+    if not serie.isna().any():
+        return pd.to_numeric(serie, downcast='integer')
+
+    for tipo in ('int8', 'int16', 'int32'):
+        limites = np.iinfo(tipo)
+        if limites.min <= serie.min() and serie.max() <= limites.max:
+            return serie.astype(tipo.capitalize())
+    return serie.astype('Int64')
+
+# Conversão de cada tipo do esquema
+CONVERSORES = {
+    'inteiro': compactar_inteiros,
+    # Valores em reais ficam em float64: float32 perde centavos acima de ~100 mil
+    'decimal': lambda serie: pd.to_numeric(serie).astype('float64'),
+    # As categorias são sempre texto: um bloco só com NULL teria categorias object e não se uniria aos demais
+    'categoria': lambda serie: serie.astype('string').astype('category'),
+    'texto': lambda serie: serie.astype('string'),
+    'data': lambda serie: pd.to_datetime(serie, format='%Y-%m-%d', errors='coerce'),
+    'data_hora': lambda serie: pd.to_datetime(serie, format='%Y-%m-%d %H:%M:%S', errors='coerce'),
+}
+
+
+# Função para aplicar os tipos do esquema a um bloco de linhas
+def compactar_bloco(df):
+    return pd.DataFrame({
+        coluna: CONVERSORES[ESQUEMA_ORDENS[coluna]](df[coluna]) for coluna in df.columns
+    }, index=df.index)
+
+# Junta os blocos; as categorias de cada bloco são unidas antes para não virarem texto
+def _juntar_blocos(blocos, colunas):
+    if not blocos:
+        return compactar_bloco(pd.DataFrame({coluna: pd.Series(dtype=object) for coluna in colunas}))
+
+    for coluna in colunas:
+        if ESQUEMA_ORDENS[coluna] == 'categoria':
+            categorias = union_categoricals([bloco[coluna] for bloco in blocos]).categories
+            for bloco in blocos:
+                bloco[coluna] = bloco[coluna].cat.set_categories(categorias)
+    return pd.concat(blocos, ignore_index=True)
+
+# Função para carregar todas as ordens com tipos compactos (mais recentes primeiro)
+def carregar_ordens_compactas(conn, tamanho_bloco=TAMANHO_BLOCO_CARGA):
+    colunas = list(ESQUEMA_ORDENS)
+    blocos = [
+        compactar_bloco(bloco)
+        for bloco in pd.read_sql_query(
+            f"SELECT {', '.join(colunas)} FROM ordens_servico ORDER BY id DESC",
+            conn, chunksize=tamanho_bloco
+        )
+    ]
+    return _juntar_blocos(blocos, colunas)
+
+# Função para montar o relatório de memória por coluna (MB, tipo e valores distintos)
+def relatorio_memoria(df):
+    memoria = df.memory_usage(deep=True, index=False)
+    relatorio = pd.DataFrame({
+        'tipo': df.dtypes.astype(str),
+        'memoria_mb': memoria / 1024 ** 2,
+        'valores_distintos': df.nunique(),
+    })
+    relatorio['percentual'] = relatorio['memoria_mb'] / (relatorio['memoria_mb'].sum() or 1) * 100
+    return relatorio.sort_values('memoria_mb', ascending=False).round(2)
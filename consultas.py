@@ -0,0 +1,284 @@
+import pandas as pd
+
+from banco import COLUNAS_CONTROLE
+from busca import busca_disponivel, expressao_busca
+
+# As agregações leem das tabelas de resumo (ver resumos.py); o custo de cada
+# consulta depende do número de dias/grupos, não do número de ordens.
+
+
+# Função para calcular os totais do painel (quantidade, valor e última importação)
+def totais_gerais(conn):
+    total, valor_total = conn.execute('''
+        SELECT COALESCE(SUM(quantidade), 0), COALESCE(SUM(valor_total), 0)
+        FROM resumo_diario
+    ''').fetchone()
+    ultima_importacao = conn.execute("SELECT MAX(data_importacao) FROM ordens_servico").fetchone()[0]
+    return {
+        'total': total,
+        'valor_total': valor_total,
+        'ultima_importacao': ultima_importacao,
+    }
+
+# Função para contar as ordens por status
+def contar_por_status(conn):
+    return pd.read_sql_query('''
+        SELECT status, SUM(quantidade) AS quantidade
+        FROM resumo_diario
+        WHERE status IS NOT NULL
+        GROUP BY status
+        ORDER BY quantidade DESC, status
+    ''', conn)
+
+# Função para somar o valor bruto por status de cotação
+def valor_por_status_cotacao(conn):
+    return pd.read_sql_query('''
+        SELECT status_cotacao, SUM(valor_total) AS valor_total
+        FROM resumo_diario
+        WHERE status_cotacao IS NOT NULL
+        GROUP BY status_cotacao
+        ORDER BY valor_total DESC
+    ''', conn)
+
+# Função para contar as ordens criadas por mês (AAAA-MM)
+def ordens_por_mes(conn):
+    return pd.read_sql_query('''
+        SELECT mes AS mes_ano, SUM(quantidade) AS quantidade
+        FROM resumo_mensal
+        WHERE mes IS NOT NULL
+        GROUP BY mes
+        ORDER BY mes
+    ''', conn)
+
+# Tabela de resumo de cada coluna com ranking (top clientes/produtos)
+RESUMOS_RANKING = {
+    'nome_emissor_ordem': 'resumo_clientes',
+    'denominacao_produto': 'resumo_produtos',
+}
+
+# Função para listar os valores mais frequentes de uma coluna (top clientes/produtos)
+def mais_frequentes(conn, coluna, limite=10):
+    if coluna not in RESUMOS_RANKING:
+        raise ValueError(f"Coluna não suportada: {coluna}")
+
+    return pd.read_sql_query(f'''
+        SELECT {coluna}, quantidade
+        FROM {RESUMOS_RANKING[coluna]}
+        ORDER BY quantidade DESC, {coluna}
+        LIMIT ?
+    ''', conn, params=(limite,))
+
+# Função para obter a primeira e a última data de criação
+def periodo_disponivel(conn):
+    return conn.execute('''
+        SELECT MIN(dia), MAX(dia) FROM resumo_diario WHERE dia IS NOT NULL
+    ''').fetchone()
+
+# Função para calcular quantidade, valor total e ticket médio de um período
+def resumo_periodo(conn, data_inicio, data_fim):
+    quantidade, quantidade_valor, valor_total = conn.execute('''
+        SELECT COALESCE(SUM(quantidade), 0), COALESCE(SUM(quantidade_valor), 0), COALESCE(SUM(valor_total), 0)
+        FROM resumo_diario
+        WHERE dia BETWEEN ? AND ?
+    ''', (str(data_inicio), str(data_fim))).fetchone()
+    return {
+        'quantidade': quantidade,
+        'valor_total': valor_total,
+        'ticket_medio': valor_total / quantidade_valor if quantidade_valor else 0.0,
+    }
+
+# Função para contar as ordens e somar o valor por dia em um período
+def evolucao_diaria(conn, data_inicio, data_fim):
+    return pd.read_sql_query('''
+        SELECT dia AS criado_em, SUM(quantidade) AS quantidade, SUM(valor_total) AS valor_total
+        FROM resumo_diario
+        WHERE dia BETWEEN ? AND ?
+        GROUP BY dia
+        ORDER BY dia
+    ''', conn, params=(str(data_inicio), str(data_fim)))
+
+# Função para calcular a performance por status e status de cotação
+def performance_por_status(conn):
+    performance = pd.read_sql_query('''
+        SELECT status, status_cotacao,
+               SUM(quantidade) AS quantidade,
+               SUM(valor_total) AS valor_total,
+               SUM(valor_total) / NULLIF(SUM(quantidade_valor), 0) AS ticket_medio
+        FROM resumo_diario
+        WHERE status IS NOT NULL AND status_cotacao IS NOT NULL
+        GROUP BY status, status_cotacao
+        ORDER BY status, status_cotacao
+    ''', conn)
+    return performance.set_index(['status', 'status_cotacao'])
+
+# Colunas exibidas na consulta detalhada (e aceitas para ordenação)
+COLUNAS_CONSULTA = [
+    'descricao_operacao', 'denominacao_produto', 'status', 'status_cotacao',
+    'valor_pedido_bruto', 'criado_em', 'nome_emissor_ordem'
+]
+
+# Colunas cujos valores distintos alimentam os filtros
+COLUNAS_FILTRO = ('status', 'status_cotacao', 'denominacao_produto')
+
+
+# Função para contar as ordens de cada valor de uma coluna de filtro ({valor: quantidade}, em ordem de valor)
+# Lê o dicionário de valores (resumo_valores), mantido a cada importação
+def contagem_valores(conn, coluna):
+    if coluna not in COLUNAS_FILTRO:
+        raise ValueError(f"Coluna não suportada: {coluna}")
+
+    return dict(conn.execute('''
+        SELECT valor, quantidade FROM resumo_valores
+        WHERE coluna = ?
+        ORDER BY valor
+    ''', (coluna,)).fetchall())
+
+# Função para listar os valores distintos de uma coluna de filtro
+def valores_distintos(conn, coluna):
+    return list(contagem_valores(conn, coluna))
+
+# Monta a cláusula WHERE a partir dos filtros da consulta
+# filtros: {'status': [...], 'status_cotacao': [...], 'produto': str, 'cliente': str}
+def _clausula_filtros(conn, filtros, incluir_busca=True):
+    condicoes, parametros = [], []
+
+    for coluna in ('status', 'status_cotacao'):
+        valores = filtros.get(coluna)
+        if valores is None:
+            continue
+        if valores:
+            condicoes.append(f"{coluna} IN ({', '.join('?' for _ in valores)})")
+            parametros.extend(valores)
+        else:
+            condicoes.append("0")
+
+    if filtros.get('produto'):
+        condicoes.append("denominacao_produto = ?")
+        parametros.append(filtros['produto'])
+
+    if filtros.get('cliente') and incluir_busca:
+        if busca_disponivel(conn):
+            expressao = expressao_busca(filtros['cliente'])
+            if expressao:
+                condicoes.append("id IN (SELECT rowid FROM ordens_busca WHERE ordens_busca MATCH ?)")
+                parametros.append(expressao)
+        else:
+            termo = filtros['cliente'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condicoes.append("(nome_emissor_ordem LIKE ? ESCAPE '\\' OR descricao_operacao LIKE ? ESCAPE '\\')")
+            parametros.extend([f'%{termo}%', f'%{termo}%'])
+
+    return ' AND '.join(condicoes) or '1', parametros
+
+# Função para contar as ordens que atendem aos filtros
+def contar_ordens(conn, filtros):
+    where, parametros = _clausula_filtros(conn, filtros)
+    return conn.execute(f"SELECT COUNT(*) FROM ordens_servico WHERE {where}", parametros).fetchone()[0]
+
+# Verifica se a ordenação por relevância da busca pode ser usada
+def _ordenar_por_relevancia(conn, filtros, ordenar_por):
+    return (
+        ordenar_por == 'relevancia'
+        and busca_disponivel(conn)
+        and bool(expressao_busca(filtros.get('cliente')))
+    )
+
+# Condição de paginação por chave (keyset) a partir da última linha da página anterior
+def _condicao_apos(ordenar_por, decrescente, apos):
+    valor, ultimo_id = apos
+    if ordenar_por == 'id':
+        return ("id < ?" if decrescente else "id > ?"), [ultimo_id]
+
+    # NULLs vêm primeiro na ordem crescente e por último na decrescente
+    if decrescente:
+        if valor is None:
+            return f"({ordenar_por} IS NULL AND id < ?)", [ultimo_id]
+        return (
+            f"({ordenar_por} < ? OR ({ordenar_por} = ? AND id < ?) OR {ordenar_por} IS NULL)",
+            [valor, valor, ultimo_id]
+        )
+    if valor is None:
+        return f"(({ordenar_por} IS NULL AND id > ?) OR {ordenar_por} IS NOT NULL)", [ultimo_id]
+    return f"({ordenar_por} > ? OR ({ordenar_por} = ? AND id > ?))", [valor, valor, ultimo_id]
+
+# Função para buscar uma página de ordens, ordenada no banco
+# ordenar_por: 'id', 'relevancia' (busca por cliente) ou uma das COLUNAS_CONSULTA
+# apos: (valor da coluna de ordenação, id) da última linha da página anterior
+def pagina_ordens(conn, filtros, ordenar_por='id', decrescente=True, tamanho=50, apos=None):
+    if ordenar_por not in ('id', 'relevancia') and ordenar_por not in COLUNAS_CONSULTA:
+        raise ValueError(f"Coluna de ordenação inválida: {ordenar_por}")
+
+    if _ordenar_por_relevancia(conn, filtros, ordenar_por):
+        return _pagina_por_relevancia(conn, filtros, tamanho, apos)
+    if ordenar_por == 'relevancia':
+        ordenar_por = 'id'
+
+    where, parametros = _clausula_filtros(conn, filtros)
+    if apos is not None:
+        condicao, parametros_apos = _condicao_apos(ordenar_por, decrescente, apos)
+        where = f"{where} AND {condicao}"
+        parametros = parametros + parametros_apos
+
+    direcao = 'DESC' if decrescente else 'ASC'
+    ordem = f"id {direcao}" if ordenar_por == 'id' else f"{ordenar_por} {direcao}, id {direcao}"
+
+    return pd.read_sql_query(f'''
+        SELECT id, {', '.join(COLUNAS_CONSULTA)}
+        FROM ordens_servico
+        WHERE {where}
+        ORDER BY {ordem}
+        LIMIT ?
+    ''', conn, params=parametros + [tamanho])
+
+# Página de resultados da busca, da mais para a menos relevante (bm25)
+def _pagina_por_relevancia(conn, filtros, tamanho, apos):
+    where, parametros = _clausula_filtros(conn, filtros, incluir_busca=False)
+    parametros = [expressao_busca(filtros['cliente'])] + parametros
+    if apos is not None:
+        relevancia, ultimo_id = apos
+        where = f"{where} AND (relevancia > ? OR (relevancia = ? AND id > ?))"
+        parametros += [relevancia, relevancia, ultimo_id]
+
+    return pd.read_sql_query(f'''
+        SELECT id, {', '.join(COLUNAS_CONSULTA)}, relevancia
+        FROM ordens_servico
+        JOIN (
+            SELECT rowid AS id_busca, rank AS relevancia
+            FROM ordens_busca
+            WHERE ordens_busca MATCH ?
+        ) ON id_busca = id
+        WHERE {where}
+        ORDER BY relevancia, id
+        LIMIT ?
+    ''', conn, params=parametros + [tamanho])
+
+# Colunas exportadas (todas, exceto as de controle interno)
+def colunas_exportacao(conn):
+    return [
+        (linha[1], linha[2]) for linha in conn.execute("PRAGMA table_info(ordens_servico)")
+        if linha[1] not in COLUNAS_CONTROLE
+    ]
+
+# Função para percorrer as ordens que atendem aos filtros em blocos de linhas (exportação)
+def iterar_ordens(conn, filtros, tamanho_bloco=5000):
+    where, parametros = _clausula_filtros(conn, filtros)
+    colunas = ', '.join(nome for nome, _ in colunas_exportacao(conn))
+    cursor = conn.execute(
+        f"SELECT {colunas} FROM ordens_servico WHERE {where} ORDER BY id DESC", parametros
+    )
+    while True:
+        linhas = cursor.fetchmany(tamanho_bloco)
+        if not linhas:
+            break
+        yield linhas
+
+# Função para obter o cursor (valor de ordenação, id) da última linha de uma página
+def cursor_da_pagina(pagina, ordenar_por='id'):
+    ultima = pagina.iloc[-1]
+    if ordenar_por not in pagina.columns:
+        ordenar_por = 'id'
+    valor = ultima[ordenar_por]
+    if pd.isna(valor):
+        valor = None
+    elif hasattr(valor, 'item'):
+        valor = valor.item()
+    return valor, int(ultima['id'])
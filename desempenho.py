@@ -0,0 +1,300 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import pandas as pd
+
+# Instrumentação dos caminhos críticos: cada trecho medido (comando SQL, etapa
+# da importação, consulta, gráfico, exportação) é gravado em um log JSON com
+# rotação e guardado em memória para os percentis da página Configurações.
+# Com PAINEL_INSTRUMENTACAO=0 nada é medido: medir() devolve um contexto vazio
+# e as conexões usam a classe padrão do sqlite3.
+
+# Liga/desliga a instrumentação (lido uma vez, na importação do módulo)
+INSTRUMENTACAO_ATIVA = os.environ.get('PAINEL_INSTRUMENTACAO', '1').strip().lower() not in (
+    '0', 'false', 'nao', 'não', 'off'
+)
+
+# Log dos trechos medidos (uma linha JSON por trecho)
+ARQUIVO_LOG_DESEMPENHO = os.environ.get('PAINEL_LOG_DESEMPENHO', os.path.join('logs', 'desempenho.log'))
+TAMANHO_MAXIMO_LOG = 5 * 1024 ** 2
+ARQUIVOS_LOG_ANTIGOS = 5
+
+# Trechos mais rápidos que isto (ms) entram nos percentis, mas não no log
+DURACAO_MINIMA_LOG_MS = float(os.environ.get('PAINEL_LOG_DESEMPENHO_MIN_MS', '0'))
+
+# Durações guardadas por trecho para o cálculo dos percentis
+AMOSTRAS_POR_TRECHO = 1000
+
+# Registros aguardando a gravação no log; além disso, são descartados (e contados)
+LIMITE_FILA_LOG = 50000
+
+_amostras = defaultdict(lambda: deque(maxlen=AMOSTRAS_POR_TRECHO))  # (categoria, nome) -> ms
+_chamadas = defaultdict(int)
+_trava = threading.Lock()
+_local = threading.local()
+
+# Os registros são gravados no log por uma thread própria: quem mede só enfileira
+_fila_log = queue.Queue(maxsize=LIMITE_FILA_LOG)
+_gravador = None
+_descartados = 0
+
+
+# Trecho em medição; `pai` é o trecho em que este está aninhado na mesma thread
+class _Trecho:
+    __slots__ = ('nome', 'categoria', 'atributos', 'pai', 'inicio')
+
+    def __init__(self, nome, categoria, atributos):
+        self.nome = nome
+        self.categoria = categoria
+        self.atributos = atributos
+
+    def __enter__(self):
+        pilha = _pilha()
+        self.pai = pilha[-1].nome if pilha else None
+        pilha.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, excecao, rastro):
+        duracao_ms = (time.perf_counter() - self.inicio) * 1000
+        _pilha().pop()
+        _registrar(self, duracao_ms, tipo.__name__ if tipo else None)
+        return False
+
+    # Acrescenta atributos ao registro do trecho (por exemplo, linhas processadas)
+    def anotar(self, **atributos):
+        self.atributos.update(atributos)
+
+    def renomear(self, nome):
+        self.nome = nome
+
+
+# Trecho usado com a instrumentação desligada (ou fora de qualquer trecho)
+class _TrechoNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, excecao, rastro):
+        return False
+
+    def anotar(self, **atributos):
+        pass
+
+    def renomear(self, nome):
+        pass
+
+_NULO = _TrechoNulo()
+
+
+def _pilha():
+    pilha = getattr(_local, 'pilha', None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    return pilha
+
+# Função para medir um trecho: `with medir('importacao.leitura', 'importacao', linhas=n):`
+def medir(nome, categoria='geral', **atributos):
+    if not INSTRUMENTACAO_ATIVA:
+        return _NULO
+    return _Trecho(nome, categoria, atributos)
+
+# Função para obter o trecho em medição na thread atual
+def trecho_atual():
+    pilha = _pilha() if INSTRUMENTACAO_ATIVA else None
+    return pilha[-1] if pilha else _NULO
+
+# Decorador que mede cada chamada da função (sem efeito com a instrumentação desligada)
+def medido(categoria, nome=None):
+    def decorador(funcao):
+        if not INSTRUMENTACAO_ATIVA:
+            return funcao
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with _Trecho(rotulo, categoria, {}):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+# Função para medir cada passo de um iterador (por exemplo, a leitura de cada bloco da planilha)
+def medir_iteracao(iteravel, nome, categoria='geral'):
+    if not INSTRUMENTACAO_ATIVA:
+        yield from iteravel
+        return
+
+    iterador = iter(iteravel)
+    while True:
+        with _Trecho(nome, categoria, {}):
+            item = next(iterador, _NULO)
+        if item is _NULO:
+            return
+        yield item
+
+# Guarda a duração para os percentis e envia o trecho para o log
+def _registrar(trecho, duracao_ms, erro):
+    global _descartados
+    chave = (trecho.categoria, trecho.nome)
+    with _trava:
+        _amostras[chave].append(duracao_ms)
+        _chamadas[chave] += 1
+
+    if duracao_ms < DURACAO_MINIMA_LOG_MS:
+        return
+    if _gravador is None:
+        _iniciar_gravador()
+    try:
+        _fila_log.put_nowait((
+            time.time(), trecho.categoria, trecho.nome, duracao_ms, trecho.pai,
+            threading.current_thread().name, erro, trecho.atributos,
+        ))
+    except queue.Full:
+        # Rajada maior do que o log consegue gravar (por exemplo, a carga linha a linha)
+        with _trava:
+            _descartados += 1
+
+# Inicia a thread que grava o log (uma por processo)
+def _iniciar_gravador():
+    global _gravador
+    with _trava:
+        if _gravador is None:
+            _gravador = threading.Thread(target=_gravar_log, name='log_desempenho', daemon=True)
+            _gravador.start()
+            atexit.register(_encerrar_gravador)
+
+# Laço da thread do log: uma linha JSON por trecho, com rotação do arquivo
+def _gravar_log():
+    try:
+        pasta = os.path.dirname(ARQUIVO_LOG_DESEMPENHO)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        manipulador = RotatingFileHandler(
+            ARQUIVO_LOG_DESEMPENHO, maxBytes=TAMANHO_MAXIMO_LOG,
+            backupCount=ARQUIVOS_LOG_ANTIGOS, encoding='utf-8'
+        )
+    except OSError:
+        # Sem permissão de escrita: os percentis em memória continuam disponíveis
+        manipulador = None
+
+    while True:
+        item = _fila_log.get()
+        if item is None:
+            break
+        if manipulador is None:
+            continue
+        momento, categoria, nome, duracao_ms, pai, thread, erro, atributos = item
+        registro = {
+            'momento': datetime.fromtimestamp(momento).isoformat(timespec='milliseconds'),
+            'categoria': categoria,
+            'trecho': nome,
+            'ms': round(duracao_ms, 3),
+            'pai': pai,
+            'thread': thread,
+        }
+        if erro:
+            registro['erro'] = erro
+        registro.update(atributos)
+        manipulador.handle(logging.makeLogRecord({'msg': json.dumps(registro, ensure_ascii=False, default=str)}))
+
+    if manipulador is not None:
+        manipulador.close()
+
+# Grava o que ainda estiver na fila ao encerrar o processo
+def _encerrar_gravador():
+    _fila_log.put(None, timeout=5)
+    _gravador.join(timeout=5)
+
+# Função para montar o resumo dos trechos medidos (percentis em ms das últimas amostras)
+def resumo_desempenho():
+    with _trava:
+        dados = {chave: (np.array(amostras), _chamadas[chave]) for chave, amostras in _amostras.items()}
+
+    linhas = []
+    for (categoria, nome), (amostras, chamadas) in dados.items():
+        p50, p90, p99 = np.percentile(amostras, [50, 90, 99])
+        linhas.append({
+            'categoria': categoria,
+            'trecho': nome,
+            'chamadas': chamadas,
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': amostras.max(),
+            'total_s': amostras.sum() / 1000,
+        })
+
+    colunas = ['categoria', 'trecho', 'chamadas', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'total_s']
+    if not linhas:
+        return pd.DataFrame(columns=colunas)
+    return pd.DataFrame(linhas, columns=colunas).sort_values('total_s', ascending=False).round(3)
+
+# Função para obter quantos registros deixaram de ser gravados no log por excesso na fila
+def descartados_log():
+    return _descartados
+
+# Função para zerar as estatísticas em memória (o log não é alterado)
+def limpar_desempenho():
+    with _trava:
+        _amostras.clear()
+        _chamadas.clear()
+
+
+# ---------------------------------------------------------------------------
+# Comandos SQL
+# ---------------------------------------------------------------------------
+
+# Nome do trecho de um comando SQL: o início do comando, em uma linha
+@functools.lru_cache(maxsize=1024)
+def rotulo_sql(sql):
+    return re.sub(r'\s+', ' ', sql).strip()[:80]
+
+# Cursor que mede cada comando executado
+# (o tempo cobre a preparação e o primeiro passo; as linhas lidas depois com
+# fetchmany/fetchall ficam no trecho de quem as consome)
+class CursorInstrumentado(sqlite3.Cursor):
+    def execute(self, sql, parametros=()):
+        with _Trecho(rotulo_sql(sql), 'sql', {}):
+            return super().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        with _Trecho(rotulo_sql(sql), 'sql', {}):
+            return super().executemany(sql, parametros)
+
+
+# Conexão cujos comandos (inclusive os do pandas, que usa cursor()) são medidos
+class ConexaoInstrumentada(sqlite3.Connection):
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def executescript(self, script):
+        with _Trecho(rotulo_sql(script), 'sql', {}):
+            return super().executescript(script)
+
+    def commit(self):
+        with _Trecho('COMMIT', 'sql', {}):
+            return super().commit()
+
+
+# Função para obter a classe das conexões ao banco (instrumentada ou padrão)
+def fabrica_conexao():
+    return ConexaoInstrumentada if INSTRUMENTACAO_ATIVA else sqlite3.Connection
@@ -0,0 +1,176 @@
+import csv
+import hashlib
+import os
+import threading
+import time
+
+from banco import versao_dados
+from consultas import colunas_exportacao, iterar_ordens
+from desempenho import medir, medir_iteracao
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Exportação dos dados filtrados direto do cursor do banco para o arquivo,
+# bloco a bloco, sem montar DataFrame nem a planilha inteira na memória.
+# Os arquivos prontos ficam em PASTA_EXPORTACOES, identificados pelos
+# filtros e pela versão dos dados, e são reaproveitados enquanto os dados
+# não mudarem.
+
+# Pasta com as exportações já geradas
+PASTA_EXPORTACOES = 'exportacoes'
+
+# Formatos disponíveis: rótulo e tipo MIME
+FORMATOS_EXPORTACAO = {
+    'xlsx': ('Excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('CSV', 'text/csv'),
+}
+if pq is not None:
+    FORMATOS_EXPORTACAO['parquet'] = ('Parquet', 'application/vnd.apache.parquet')
+
+# Limite de linhas de uma aba do Excel (a exportação continua em outra aba)
+LINHAS_POR_ABA = 1_048_575
+
+# Linhas lidas do banco por vez
+TAMANHO_BLOCO_EXPORTACAO = 5000
+
+# Idade (segundos) a partir da qual um arquivo .parcial é considerado abandonado
+IDADE_PARCIAL_ABANDONADO = 3600
+
+
+# Função para montar o caminho do arquivo de uma exportação (filtros + versão dos dados)
+def caminho_exportacao(conn, filtros, formato, pasta=PASTA_EXPORTACOES):
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+
+    chave = hashlib.sha1(repr(sorted(filtros.items())).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(pasta, f"v{versao_dados(conn)}_{chave}.{formato}")
+
+# Função para exportar as ordens filtradas, reaproveitando o arquivo se já existir
+# progresso(linhas_escritas) é chamado a cada bloco
+def exportar_ordens(conn, filtros, formato, pasta=PASTA_EXPORTACOES, progresso=None):
+    caminho = caminho_exportacao(conn, filtros, formato, pasta)
+    if os.path.exists(caminho):
+        return caminho
+
+    os.makedirs(pasta, exist_ok=True)
+    remover_exportacoes_antigas(conn, pasta)
+
+    colunas = colunas_exportacao(conn)
+    # A leitura dos blocos no banco é medida à parte da escrita do arquivo
+    blocos = medir_iteracao(iterar_ordens(conn, filtros, TAMANHO_BLOCO_EXPORTACAO), 'exportacao.leitura', 'exportacao')
+    if progresso:
+        blocos = _com_progresso(blocos, progresso)
+
+    # Grava em um arquivo temporário para nunca servir uma exportação incompleta
+    # (o nome inclui processo e thread: duas sessões podem exportar os mesmos filtros ao mesmo tempo)
+    temporario = f"{caminho}.{os.getpid()}_{threading.get_ident()}.parcial"
+    try:
+        with medir(f"exportacao.{formato}", 'exportacao') as trecho:
+            ESCRITORES[formato](temporario, colunas, blocos)
+            trecho.anotar(tamanho_mb=round(os.path.getsize(temporario) / 1024 ** 2, 2))
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    return caminho
+
+# Função para remover as exportações feitas com versões anteriores dos dados
+# (os .parcial recentes são de exportações ainda em andamento em outra sessão)
+def remover_exportacoes_antigas(conn, pasta=PASTA_EXPORTACOES):
+    if not os.path.isdir(pasta):
+        return
+    prefixo = f"v{versao_dados(conn)}_"
+    limite_parcial = time.time() - IDADE_PARCIAL_ABANDONADO
+    for nome in os.listdir(pasta):
+        if nome.startswith(prefixo):
+            continue
+        caminho = os.path.join(pasta, nome)
+        try:
+            if nome.endswith('.parcial') and os.path.getmtime(caminho) > limite_parcial:
+                continue
+            os.remove(caminho)
+        except FileNotFoundError:
+            # Removido por outra sessão
+            pass
+
+# Repassa os blocos informando quantas linhas já foram escritas
+def _com_progresso(blocos, progresso):
+    escritas = 0
+    for linhas in blocos:
+        yield linhas
+        escritas += len(linhas)
+        progresso(escritas)
+
+# Função para escrever um .xlsx no modo write-only do openpyxl (linhas vão direto para o disco)
+def escrever_xlsx(caminho, colunas, blocos):
+    # Importado só ao gerar um .xlsx (o openpyxl não pesa na abertura da página de consulta)
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    cabecalho = [nome for nome, _ in colunas]
+    workbook = Workbook(write_only=True)
+    aba = None
+    linhas_na_aba = LINHAS_POR_ABA
+
+    for linhas in blocos:
+        for linha in linhas:
+            if linhas_na_aba == LINHAS_POR_ABA:
+                numero = len(workbook.worksheets) + 1
+                aba = workbook.create_sheet('Dados_Filtrados' if numero == 1 else f'Dados_Filtrados_{numero}')
+                aba.append(cabecalho)
+                linhas_na_aba = 0
+            # Caracteres de controle não são aceitos no XML da planilha
+            aba.append([
+                ILLEGAL_CHARACTERS_RE.sub('', valor) if isinstance(valor, str) else valor
+                for valor in linha
+            ])
+            linhas_na_aba += 1
+
+    if aba is None:
+        workbook.create_sheet('Dados_Filtrados').append(cabecalho)
+    workbook.save(caminho)
+
+# Função para escrever um .csv (UTF-8 com BOM, para o Excel reconhecer os acentos)
+def escrever_csv(caminho, colunas, blocos):
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow([nome for nome, _ in colunas])
+        for linhas in blocos:
+            escritor.writerows(linhas)
+
+# Tipo Arrow de cada tipo declarado no SQLite
+TIPOS_ARROW = {
+    'INTEGER': 'int64',
+    'REAL': 'float64',
+}
+
+# Função para escrever um .parquet, um row group por bloco de linhas (sem linhas, só o schema)
+def escrever_parquet(caminho, colunas, blocos):
+    schema = pa.schema([
+        (nome, getattr(pa, TIPOS_ARROW.get(tipo.upper(), 'string'))())
+        for nome, tipo in colunas
+    ])
+
+    with pq.ParquetWriter(caminho, schema) as escritor:
+        for linhas in blocos:
+            valores = list(zip(*linhas))
+            arrays = []
+            for posicao, campo in enumerate(schema):
+                coluna = valores[posicao]
+                # O SQLite aceita qualquer tipo em colunas de texto
+                if pa.types.is_string(campo.type):
+                    coluna = [None if valor is None else str(valor) for valor in coluna]
+                arrays.append(pa.array(coluna, type=campo.type))
+            escritor.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+# Escritor de cada formato
+ESCRITORES = {
+    'xlsx': escrever_xlsx,
+    'csv': escrever_csv,
+    'parquet': escrever_parquet,
+}
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Redução dos dados dos gráficos antes de montar as figuras: nenhuma série
+# passa de LIMITE_PONTOS_SERIE pontos, qualquer que seja o histórico carregado.
+# Séries temporais são agrupadas no menor período (dia, semana ou mês) que cabe
+# no limite; se nem por mês couberem, os pontos são escolhidos pelo LTTB
+# (Largest-Triangle-Three-Buckets), que preserva picos e vales da curva.
+
+# Pontos máximos de uma série em um gráfico
+LIMITE_PONTOS_SERIE = 500
+
+# Categorias máximas de um gráfico de pizza/barras (as demais viram "Outros")
+LIMITE_CATEGORIAS = 20
+
+# Períodos de agrupamento, do mais fino ao mais grosso: (nome, dias aproximados, período do pandas)
+GRANULARIDADES = (
+    ('dia', 1, 'D'),
+    ('semana', 7, 'W-SUN'),
+    ('mes', 30.44, 'M'),
+)
+
+
+# Função para escolher o menor período em que o intervalo de datas cabe no limite de pontos
+def escolher_granularidade(data_inicio, data_fim, limite=LIMITE_PONTOS_SERIE):
+    dias = (pd.Timestamp(data_fim) - pd.Timestamp(data_inicio)).days + 1
+    for nome, dias_periodo, _ in GRANULARIDADES:
+        if dias / dias_periodo <= limite:
+            return nome
+    return GRANULARIDADES[-1][0]
+
+# Função para somar as colunas de valor por período (dia, semana ou mês)
+# O período é identificado pelo seu primeiro dia, no formato da coluna original (AAAA-MM-DD)
+def agregar_por_periodo(df, coluna_data, colunas_valor, granularidade):
+    if granularidade == 'dia' or df.empty:
+        return df[[coluna_data] + colunas_valor]
+    periodo = {nome: codigo for nome, _, codigo in GRANULARIDADES}[granularidade]
+    inicio = pd.to_datetime(df[coluna_data]).dt.to_period(periodo).dt.start_time
+    return (
+        df[colunas_valor]
+        .groupby(inicio.dt.strftime('%Y-%m-%d').rename(coluna_data), sort=True)
+        .sum()
+        .reset_index()
+    )
+
+# Função para escolher `limite` pontos de uma série pelo LTTB; retorna as posições escolhidas
+# (o primeiro e o último ponto sempre ficam)
+def lttb(x, y, limite=LIMITE_PONTOS_SERIE):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    escolhidos = np.empty(limite, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    # Os pontos internos são divididos em limite - 2 faixas; de cada faixa fica o ponto que forma
+    # o maior triângulo com o escolhido na faixa anterior e a média da faixa seguinte
+    limites = np.linspace(1, n - 1, limite - 1).astype(np.int64)
+    anterior = 0
+    for faixa in range(limite - 2):
+        inicio, fim = limites[faixa], limites[faixa + 1]
+        proximo_fim = limites[faixa + 2] if faixa + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean() if proximo_fim > fim else x[-1]
+        media_y = y[fim:proximo_fim].mean() if proximo_fim > fim else y[-1]
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[faixa + 1] = anterior
+    return escolhidos
+
+# Função para reduzir uma série (DataFrame ordenado por x) a no máximo `limite` linhas pelo LTTB
+# x de datas vira número; x de texto usa a posição
+def reduzir_serie(df, coluna_x, coluna_y, limite=LIMITE_PONTOS_SERIE):
+    if len(df) <= limite:
+        return df
+    try:
+        x = pd.to_datetime(df[coluna_x]).astype('int64')
+    except (ValueError, TypeError):
+        x = np.arange(len(df))
+    return df.iloc[lttb(x, df[coluna_y].fillna(0), limite)]
+
+# Função para limitar as categorias de um gráfico: mantém as maiores e soma o resto em "Outros"
+def limitar_categorias(df, coluna, coluna_valor, limite=LIMITE_CATEGORIAS):
+    if len(df) <= limite:
+        return df
+    ordenado = df.sort_values(coluna_valor, ascending=False)
+    outros = pd.DataFrame({coluna: ['Outros'], coluna_valor: [ordenado[coluna_valor].iloc[limite - 1:].sum()]})
+    return pd.concat([ordenado.iloc[:limite - 1][[coluna, coluna_valor]], outros], ignore_index=True)
@@ -0,0 +1,218 @@
+import pandas as pd
+
+from banco import COLUNAS_CHAVE
+
+# Histórico semanal das ordens em intervalos de validade: cada importação
+# recebe um número (tabela importacoes) e, quando uma ordem muda ou sai da
+# planilha, a versão anterior é copiada para historico_ordens com o intervalo
+# de importações em que valeu. Ordens inalteradas não são copiadas, então o
+# histórico cresce com as mudanças, não com o tamanho da planilha.
+#
+# Estado na importação N: ordens atuais gravadas até N + versões do histórico
+# válidas em N. Mudanças entre N e M: só as versões encerradas ou iniciadas
+# entre as duas importações (consultas pelos índices de valido_de/valido_ate).
+
+# Colunas comparadas entre duas importações (antes/depois)
+COLUNAS_COMPARADAS = ['status', 'status_cotacao', 'valor_pedido_bruto']
+
+# Colunas que identificam a ordem nas mudanças
+COLUNAS_DESCRICAO = ['nome_emissor_ordem', 'denominacao_produto']
+
+# Tipos de mudança
+TIPOS_MUDANCA = ('nova', 'alterada', 'removida')
+
+
+# Função para registrar uma importação (na transação de quem chama) e obter seu número
+def registrar_importacao(conn, modo, origem=None):
+    return conn.execute(
+        "INSERT INTO importacoes (modo, origem) VALUES (?, ?)", (modo, origem)
+    ).lastrowid
+
+# Função para gravar as contagens de uma importação
+def finalizar_importacao(conn, importacao, resumo):
+    conn.execute('''
+        UPDATE importacoes
+        SET inseridos = ?, atualizados = ?, inalterados = ?, removidos = ?
+        WHERE id = ?
+    ''', (resumo['inseridos'], resumo['atualizados'], resumo['inalterados'], resumo['removidos'], importacao))
+
+# Função para listar as colunas copiadas para o histórico
+def colunas_historico(conn):
+    return [
+        linha[1] for linha in conn.execute("PRAGMA table_info(historico_ordens)")
+        if linha[1] not in ('valido_de', 'valido_ate')
+    ]
+
+# Função para copiar para o histórico a versão atual das ordens que atendem à condição
+# (encerrada na importação informada); retorna quantas versões foram copiadas
+def arquivar_versoes(conn, importacao, condicao, parametros=()):
+    colunas = ', '.join(colunas_historico(conn))
+    return conn.execute(f'''
+        INSERT INTO historico_ordens (valido_de, valido_ate, {colunas})
+        SELECT COALESCE(versao_importacao, 0), ?, {colunas}
+        FROM ordens_servico
+        WHERE {condicao}
+    ''', (importacao, *parametros)).rowcount
+
+# Consulta dos ids das ordens cuja linha final na carga (de mesma chave) atende à comparação (f: carga, o: ordem)
+def _ordens_da_carga(comparacao):
+    return f'''
+        SELECT o.id FROM temp.carga_final f
+        JOIN ordens_servico o ON {' AND '.join(f'o.{coluna} = f.{coluna}' for coluna in COLUNAS_CHAVE)}
+        WHERE {comparacao}
+    '''
+
+# Função para arquivar as versões que a carga vai substituir (antes de aplicá-la, na mesma transação)
+# Retorna quantas versões foram arquivadas
+def arquivar_versoes_carga(conn, importacao, colunas, modo):
+    if not all(coluna in colunas for coluna in COLUNAS_CHAVE):
+        # Sem a chave na planilha nenhuma ordem é reconhecida: no "substituir", todas saem
+        return arquivar_versoes(conn, importacao, '1') if modo == 'substituir' else 0
+
+    # Linha que vale para cada chave: a última da carga (mesma ordem de aplicação)
+    chave = ', '.join(COLUNAS_CHAVE)
+    conn.execute("DROP TABLE IF EXISTS temp.carga_final")
+    conn.execute(f'''
+        CREATE TEMP TABLE carga_final AS
+        SELECT {chave}, hash_conteudo, COUNT(*) AS linhas, MAX(origem * 4294967296 + linha) AS posicao
+        FROM temp.carga_ordens
+        GROUP BY {chave}
+    ''')
+    conn.execute(f"CREATE INDEX temp.idx_carga_final_chave ON carga_final ({chave})")
+
+    # Ordens que a carga regrava sem mudar o conteúdo final mantêm o início da validade
+    # (ver versao_das_linhas): no "substituir", todas as inalteradas; nos demais modos,
+    # só as de chave repetida na planilha, que mudam e voltam na mesma carga
+    regravadas = 'f.hash_conteudo = o.hash_conteudo' + ('' if modo == 'substituir' else ' AND f.linhas > 1')
+    conn.execute("DROP TABLE IF EXISTS temp.versoes_mantidas")
+    conn.execute(f'''
+        CREATE TEMP TABLE versoes_mantidas AS
+        SELECT {', '.join(f'f.{coluna}' for coluna in COLUNAS_CHAVE)},
+               COALESCE(o.versao_importacao, 0) AS versao_importacao
+        FROM temp.carga_final f
+        JOIN ordens_servico o ON {' AND '.join(f'o.{coluna} = f.{coluna}' for coluna in COLUNAS_CHAVE)}
+        WHERE {regravadas}
+    ''')
+    conn.execute(f"CREATE INDEX temp.idx_versoes_mantidas_chave ON versoes_mantidas ({chave})")
+
+    if modo == 'substituir':
+        return arquivar_versoes(conn, importacao, f'''NOT EXISTS (
+            SELECT 1 FROM temp.versoes_mantidas v
+            WHERE {' AND '.join(f'v.{coluna} = ordens_servico.{coluna}' for coluna in COLUNAS_CHAVE)}
+        )''')
+    return arquivar_versoes(
+        conn, importacao, f"id IN ({_ordens_da_carga('f.hash_conteudo IS NOT o.hash_conteudo')})"
+    )
+
+# Função para montar a junção e a expressão SQL da versão gravada em cada linha da carga (c)
+# A versão é a importação atual (o parâmetro da expressão) ou, nas ordens regravadas sem
+# mudança, a que já tinham; retorna (junção, expressão)
+def versao_das_linhas(colunas):
+    if not all(coluna in colunas for coluna in COLUNAS_CHAVE):
+        return '', '?'
+    return (
+        f"LEFT JOIN temp.versoes_mantidas v ON {' AND '.join(f'v.{coluna} = c.{coluna}' for coluna in COLUNAS_CHAVE)}",
+        'COALESCE(v.versao_importacao, ?)',
+    )
+
+# Função para descartar as tabelas auxiliares da carga
+def limpar_tabelas_historico_carga(conn):
+    conn.execute("DROP TABLE IF EXISTS temp.carga_final")
+    conn.execute("DROP TABLE IF EXISTS temp.versoes_mantidas")
+
+# Função para listar as importações registradas (mais recentes primeiro)
+def listar_importacoes(conn):
+    return pd.read_sql_query('''
+        SELECT id, realizada_em, modo, origem, inseridos, atualizados, inalterados, removidos
+        FROM importacoes
+        ORDER BY id DESC
+    ''', conn)
+
+# Função para montar o estado das ordens em uma importação (como estavam logo após ela)
+def estado_em(conn, importacao, colunas=None):
+    colunas = ', '.join(colunas or colunas_historico(conn))
+    return pd.read_sql_query(f'''
+        SELECT {colunas} FROM ordens_servico
+        WHERE versao_importacao IS NULL OR versao_importacao <= :importacao
+        UNION ALL
+        SELECT {colunas} FROM historico_ordens
+        WHERE valido_de <= :importacao AND valido_ate > :importacao
+    ''', conn, params={'importacao': importacao})
+
+# Função para listar as ordens novas, alteradas e removidas entre duas importações
+# Lê só as versões que começaram ou terminaram entre `de` e `ate`, nunca os dois estados inteiros
+def mudancas_entre(conn, de, ate):
+    if de > ate:
+        de, ate = ate, de
+    chave = list(COLUNAS_CHAVE)
+    colunas = ', '.join(chave + ['hash_conteudo'] + COLUNAS_COMPARADAS + COLUNAS_DESCRICAO)
+    parametros = {'de': de, 'ate': ate}
+
+    # Versões válidas em `de` que deixaram de valer até `ate`
+    antes = pd.read_sql_query(f'''
+        SELECT {colunas} FROM historico_ordens
+        WHERE valido_ate > :de AND valido_ate <= :ate AND valido_de <= :de
+    ''', conn, params=parametros)
+    # Versões válidas em `ate` que passaram a valer depois de `de`
+    depois = pd.read_sql_query(f'''
+        SELECT {colunas} FROM ordens_servico
+        WHERE versao_importacao > :de AND versao_importacao <= :ate
+        UNION ALL
+        SELECT {colunas} FROM historico_ordens
+        WHERE valido_de > :de AND valido_de <= :ate AND valido_ate > :ate
+    ''', conn, params=parametros)
+
+    # Hash como inteiro anulável: no float da junção externa dois hashes poderiam se igualar
+    for df in (antes, depois):
+        df['hash_conteudo'] = df['hash_conteudo'].astype('Int64')
+
+    # Ordens sem chave não são reconhecidas entre importações (e o pandas juntaria as chaves nulas)
+    sem_chave_antes = antes[chave].isna().any(axis=1)
+    sem_chave_depois = depois[chave].isna().any(axis=1)
+    mudancas = pd.concat([
+        antes[~sem_chave_antes].merge(
+            depois[~sem_chave_depois], on=chave, how='outer', suffixes=('_antes', '_depois'), indicator=True
+        ),
+        antes[sem_chave_antes].add_suffix('_antes').rename(columns={f'{c}_antes': c for c in chave}).assign(_merge='left_only'),
+        depois[sem_chave_depois].add_suffix('_depois').rename(columns={f'{c}_depois': c for c in chave}).assign(_merge='right_only'),
+    ], ignore_index=True)
+    mudancas['tipo'] = mudancas['_merge'].astype(str).map(
+        {'left_only': 'removida', 'right_only': 'nova', 'both': 'alterada'}
+    )
+    # Ordem que mudou e voltou ao conteúdo de `de` não conta como alterada
+    mudancas = mudancas[
+        (mudancas['tipo'] != 'alterada')
+        | mudancas['hash_conteudo_antes'].ne(mudancas['hash_conteudo_depois']).fillna(True)
+    ]
+
+    for coluna in COLUNAS_DESCRICAO:
+        mudancas[coluna] = mudancas[f'{coluna}_depois'].fillna(mudancas[f'{coluna}_antes'])
+
+    ordem = chave + ['tipo'] + COLUNAS_DESCRICAO + [
+        f'{coluna}_{momento}' for coluna in COLUNAS_COMPARADAS for momento in ('antes', 'depois')
+    ]
+    return mudancas[ordem].sort_values(['tipo'] + chave).reset_index(drop=True)
+
+# Função para resumir as mudanças: quantidade por tipo e variação do valor bruto
+def resumo_mudancas(mudancas):
+    resumo = {tipo: int((mudancas['tipo'] == tipo).sum()) for tipo in TIPOS_MUDANCA}
+    resumo['variacao_valor'] = float(
+        mudancas['valor_pedido_bruto_depois'].fillna(0).sum() - mudancas['valor_pedido_bruto_antes'].fillna(0).sum()
+    )
+    return resumo
+
+# Função para contar as transições de uma coluna (ex.: status) entre as ordens alteradas
+def transicoes(mudancas, coluna='status'):
+    alteradas = mudancas[
+        (mudancas['tipo'] == 'alterada')
+        & (mudancas[f'{coluna}_antes'].fillna('') != mudancas[f'{coluna}_depois'].fillna(''))
+    ]
+    return (
+        alteradas.groupby([f'{coluna}_antes', f'{coluna}_depois'], dropna=False)
+        .size()
+        .rename('quantidade')
+        .reset_index()
+        .rename(columns={f'{coluna}_antes': 'de', f'{coluna}_depois': 'para'})
+        .sort_values('quantidade', ascending=False)
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,450 @@
+import sqlite3
+from contextlib import contextmanager
+from itertools import repeat
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from banco import COLUNAS_CHAVE, incrementar_versao_dados
+from busca import reconstruir_indice_busca, remover_gatilhos_busca
+from desempenho import medir, medir_iteracao
+from historico import (
+    arquivar_versoes,
+    arquivar_versoes_carga,
+    finalizar_importacao,
+    limpar_tabelas_historico_carga,
+    registrar_importacao,
+    versao_das_linhas,
+)
+from resumos import atualizar_resumos, reconstruir_resumos
+from normalizacao import (
+    normalizar_datas_iso,
+    normalizar_quantidade,
+    normalizar_status,
+    normalizar_texto,
+    normalizar_valor,
+)
+
+# Mapeamento das colunas da planilha CARGA_PAINEL.xlsx para o banco
+COLUNAS_ESPERADAS = {
+    'Descrição d/operação': 'descricao_operacao',
+    'Número da Oportunidade': 'numero_oportunidade',
+    'Número da VTA': 'numero_vta',
+    'Número da Cotação': 'numero_cotacao',
+    'Número do Circuito': 'numero_circuito',
+    'Status cotação': 'status_cotacao',
+    'Denominação produto': 'denominacao_produto',
+    'Quantidade': 'quantidade',
+    'Status': 'status',
+    'Valor pedido bruto': 'valor_pedido_bruto',
+    'Criado em': 'criado_em',
+    'Emissor da Ordem': 'emissor_ordem',
+    'Nome do Emissor da Ordem': 'nome_emissor_ordem',
+    'Nome do Gerente de Contas': 'nome_gerente_contas',
+    'Organização de Vendas': 'organizacao_vendas',
+    'Canal de distribuição': 'canal_distribuicao',
+    'Setor de atividade': 'setor_atividade',
+    'Item (SD)': 'item_sd',
+    'ID produto': 'id_produto',
+    'Tempo de Contrato': 'tempo_contrato'
+}
+
+# Normalização aplicada a cada coluna do banco (as demais são tratadas como texto)
+NORMALIZADORES = {
+    'criado_em': normalizar_datas_iso,
+    'status': normalizar_status,
+    'quantidade': normalizar_quantidade,
+    'valor_pedido_bruto': normalizar_valor,
+}
+
+# Quantidade de linhas enviadas por executemany
+TAMANHO_LOTE = 5000
+
+# Quantidade de linhas lidas da planilha por bloco na importação em streaming
+TAMANHO_BLOCO = 20000
+
+# Modos de importação
+# substituir: apaga todos os registros e insere a planilha
+# sincronizar: insere/atualiza pela chave e remove o que não veio na planilha
+# adicionar: insere/atualiza pela chave, mantendo os demais registros
+MODOS_IMPORTACAO = ('substituir', 'sincronizar', 'adicionar')
+
+
+# Função para mapear as colunas da planilha para as colunas do banco
+def mapear_colunas(colunas_planilha):
+    colunas_encontradas = {}
+    for col_excel, col_db in COLUNAS_ESPERADAS.items():
+        if col_excel in colunas_planilha:
+            colunas_encontradas[col_db] = col_excel
+    return colunas_encontradas
+
+# Função para converter o DataFrame coluna a coluna
+def normalizar_bloco(df, colunas_encontradas):
+    normalizado = {}
+    for col_db, col_excel in colunas_encontradas.items():
+        normalizador = NORMALIZADORES.get(col_db, normalizar_texto)
+        normalizado[col_db] = normalizador(df[col_excel])
+    return pd.DataFrame(normalizado, index=df.index)
+
+# Hash do conteúdo de cada linha, usado para pular linhas inalteradas
+def calcular_hashes(normalizado):
+    hashes = pd.util.hash_pandas_object(normalizado, index=False)
+    return hashes.to_numpy().view('int64')
+
+# Função para preparar as colunas (listas de valores) e os hashes do bloco
+def preparar_colunas(df, colunas_encontradas):
+    normalizado = normalizar_bloco(df, colunas_encontradas)
+    colunas = [normalizado[col_db].tolist() for col_db in colunas_encontradas]
+    return colunas, calcular_hashes(normalizado).tolist()
+
+# Pragmas ajustados para carga em massa, restaurados ao final
+@contextmanager
+def pragmas_carga(conn):
+    sincrono = conn.execute("PRAGMA synchronous").fetchone()[0]
+    cache = conn.execute("PRAGMA cache_size").fetchone()[0]
+
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA cache_size = -65536")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA synchronous = {int(sincrono)}")
+        conn.execute(f"PRAGMA cache_size = {int(cache)}")
+
+# Função para ler a planilha: .xlsx em blocos (memória constante), .xls inteiro via pandas
+# aba: nome da aba a ler (padrão: a primeira)
+def ler_planilha(arquivo_excel, tamanho_bloco=TAMANHO_BLOCO, aba=None):
+    if _eh_xlsx(arquivo_excel):
+        return ler_planilha_em_blocos(arquivo_excel, tamanho_bloco, aba)
+
+    df = pd.read_excel(arquivo_excel, sheet_name=aba if aba is not None else 0)
+    return mapear_colunas(df.columns), list(df.columns), len(df), dividir_em_blocos(df, tamanho_bloco)
+
+# Função para listar as abas da planilha
+def listar_abas(arquivo_excel):
+    if _eh_xlsx(arquivo_excel):
+        wb = load_workbook(arquivo_excel, read_only=True)
+        try:
+            return wb.sheetnames
+        finally:
+            wb.close()
+    return pd.ExcelFile(arquivo_excel).sheet_names
+
+def _eh_xlsx(arquivo_excel):
+    return getattr(arquivo_excel, 'name', str(arquivo_excel)).lower().endswith('.xlsx')
+
+# Função para dividir um DataFrame já carregado em blocos de linhas
+def dividir_em_blocos(df, tamanho_bloco=TAMANHO_BLOCO):
+    return (df.iloc[inicio:inicio + tamanho_bloco] for inicio in range(0, len(df), tamanho_bloco))
+
+# Função para ler a planilha em blocos de linhas, com memória limitada
+def ler_planilha_em_blocos(arquivo_excel, tamanho_bloco=TAMANHO_BLOCO, aba=None):
+    wb = load_workbook(arquivo_excel, read_only=True, data_only=True)
+    ws = wb[aba] if aba is not None else wb.worksheets[0]
+    linhas = ws.iter_rows(values_only=True)
+
+    # O mapeamento de colunas é resolvido uma única vez, a partir do cabeçalho
+    cabecalho = list(next(linhas, None) or [])
+    colunas_encontradas = mapear_colunas(cabecalho)
+    posicoes = {col_excel: cabecalho.index(col_excel) for col_excel in colunas_encontradas.values()}
+    total_linhas = ws.max_row - 1 if ws.max_row else None
+
+    def gerar_blocos():
+        try:
+            bloco, indices = [], []
+            # A primeira linha de dados é a linha 2 da planilha (índice 0)
+            for indice, linha in enumerate(linhas):
+                if not any(valor is not None for valor in linha):
+                    continue
+                bloco.append(linha)
+                indices.append(indice)
+                if len(bloco) == tamanho_bloco:
+                    yield _montar_bloco(bloco, indices, posicoes)
+                    bloco, indices = [], []
+            if bloco:
+                yield _montar_bloco(bloco, indices, posicoes)
+        finally:
+            wb.close()
+
+    return colunas_encontradas, cabecalho, total_linhas, gerar_blocos()
+
+# Monta o DataFrame de um bloco apenas com as colunas mapeadas
+def _montar_bloco(linhas, indices, posicoes):
+    dados = {}
+    for col_excel, posicao in posicoes.items():
+        valores = [linha[posicao] if posicao < len(linha) else None for linha in linhas]
+        # dtype object evita que a inferência de tipos varie de um bloco para outro
+        coluna = pd.Series(valores, index=indices, dtype=object)
+        dados[col_excel] = coluna.mask(coluna.isin(ERROR_CODES))
+    return pd.DataFrame(dados, index=indices)
+
+# Função para importar o DataFrame em lotes dentro de uma única transação
+def inserir_dataframe(conn, df, colunas_encontradas, modo='adicionar',
+                      tamanho_lote=TAMANHO_LOTE, progresso=None):
+    return inserir_blocos(
+        conn, dividir_em_blocos(df), colunas_encontradas,
+        modo=modo,
+        tamanho_lote=tamanho_lote,
+        progresso=progresso,
+        total_linhas=len(df)
+    )
+
+# Função para importar blocos de linhas: grava na tabela de carga e aplica de uma vez
+# Retorna o resumo ({'inseridos', 'atualizados', 'inalterados', 'removidos'}) e os erros por linha
+# progresso(processados, total) é chamado a cada bloco lido; ao_aplicar(processados), no início da gravação
+# nome_carga: descrição da carga no registro das importações (por exemplo, o nome do arquivo)
+def inserir_blocos(conn, blocos, colunas_encontradas, modo='adicionar',
+                   tamanho_lote=TAMANHO_LOTE, progresso=None, total_linhas=None, ao_aplicar=None,
+                   nome_carga=None):
+    if modo not in MODOS_IMPORTACAO:
+        raise ValueError(f"Modo de importação inválido: {modo}")
+    if not colunas_encontradas:
+        raise ValueError("Nenhuma das colunas esperadas foi encontrada na planilha")
+
+    colunas = list(colunas_encontradas) + ['hash_conteudo']
+    with medir('importacao', 'importacao', modo=modo) as trecho:
+        try:
+            processados = preparar_carga(conn, blocos, colunas_encontradas, tamanho_lote, progresso, total_linhas)
+            trecho.anotar(linhas=processados)
+            if ao_aplicar:
+                ao_aplicar(processados)
+            resumo, erros = aplicar_carga(conn, colunas, modo, nome_carga=nome_carga)
+            trecho.anotar(**resumo, erros=len(erros))
+            return resumo, erros
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp.carga_ordens")
+            conn.commit()
+
+# Função para gravar as linhas normalizadas na tabela temporária de carga (staging)
+# A leitura e a normalização da planilha, que são a parte demorada, acontecem aqui,
+# sem nenhum bloqueio na tabela de ordens: os painéis continuam lendo normalmente.
+def preparar_carga(conn, blocos, colunas_encontradas, tamanho_lote=TAMANHO_LOTE,
+                   progresso=None, total_linhas=None):
+    colunas = list(colunas_encontradas) + ['hash_conteudo']
+
+    if conn.in_transaction:
+        conn.commit()
+
+    criar_tabela_carga(conn, colunas)
+    processados = gravar_blocos_carga(
+        conn, blocos, colunas_encontradas,
+        tamanho_lote=tamanho_lote, progresso=progresso, total_linhas=total_linhas
+    )
+    indexar_tabela_carga(conn, colunas)
+    return processados
+
+# Função para criar a tabela de carga (temporária, ou em um banco de rascunho com temporaria=False)
+# origem: número do arquivo/aba na carga; linha: posição na planilha
+# (as duas definem a ordem de aplicação e aparecem nas mensagens de erro)
+def criar_tabela_carga(conn, colunas, temporaria=True):
+    conn.execute(f"DROP TABLE IF EXISTS {'temp.' if temporaria else ''}carga_ordens")
+    conn.execute(f'''
+        CREATE {'TEMP ' if temporaria else ''}TABLE carga_ordens (origem INTEGER, linha INTEGER, {', '.join(colunas)})
+    ''')
+
+# Função para ler, normalizar e gravar os blocos na tabela de carga (retorna as linhas gravadas)
+def gravar_blocos_carga(conn, blocos, colunas_encontradas, tabela='temp.carga_ordens', origem=0,
+                        tamanho_lote=TAMANHO_LOTE, progresso=None, total_linhas=None):
+    colunas = list(colunas_encontradas) + ['hash_conteudo']
+    query = f"INSERT INTO {tabela} VALUES (?, {', '.join('?' for _ in range(len(colunas) + 1))})"
+
+    processados = 0
+    # A leitura de cada bloco acontece no gerador da planilha
+    for df in medir_iteracao(blocos, 'importacao.leitura', 'importacao'):
+        with medir('importacao.normalizacao', 'importacao', linhas=len(df)):
+            valores_colunas, hashes = preparar_colunas(df, colunas_encontradas)
+            valores_colunas.append(hashes)
+            linhas = (df.index + 2).tolist()
+
+        with medir('importacao.gravacao_carga', 'importacao', linhas=len(df)):
+            for inicio in range(0, len(df), tamanho_lote):
+                conn.executemany(query, zip(
+                    repeat(origem),
+                    linhas[inicio:inicio + tamanho_lote],
+                    *(coluna[inicio:inicio + tamanho_lote] for coluna in valores_colunas)
+                ))
+            # Só a base temporária é escrita; o commit por bloco não segura nenhuma trava
+            conn.commit()
+
+        processados += len(df)
+        if progresso:
+            progresso(processados, max(total_linhas or 0, processados))
+
+    return processados
+
+# Função para indexar a tabela de carga pela chave (remoção dos ausentes no modo "sincronizar")
+def indexar_tabela_carga(conn, colunas):
+    if all(coluna in colunas for coluna in COLUNAS_CHAVE):
+        conn.execute(f"CREATE INDEX temp.idx_carga_chave ON carga_ordens ({', '.join(COLUNAS_CHAVE)})")
+    conn.commit()
+
+# Função para tirar da carga as linhas cuja chave se repete mais adiante (vale a última, como no upsert)
+# Cada linha descartada vira um erro; sem isso, elas seriam contadas como atualizadas
+def remover_chaves_repetidas(conn, colunas, origens=None):
+    if not all(coluna in colunas for coluna in COLUNAS_CHAVE):
+        return []
+
+    chave = ', '.join(COLUNAS_CHAVE)
+    preenchida = ' AND '.join(f'{coluna} IS NOT NULL' for coluna in COLUNAS_CHAVE)
+    particao = ', '.join(f'c.{coluna}' for coluna in COLUNAS_CHAVE)
+    # As chaves repetidas saem do índice da carga; só as linhas delas são ordenadas
+    repetidas = conn.execute(f'''
+        WITH chaves AS (
+            SELECT {chave} FROM temp.carga_ordens WHERE {preenchida}
+            GROUP BY {chave} HAVING COUNT(*) > 1
+        )
+        SELECT rowid, origem, linha, origem_mantida, linha_mantida FROM (
+            SELECT c.rowid, c.origem, c.linha,
+                   ROW_NUMBER() OVER ultima AS posicao,
+                   FIRST_VALUE(c.origem) OVER ultima AS origem_mantida,
+                   FIRST_VALUE(c.linha) OVER ultima AS linha_mantida
+            FROM chaves JOIN temp.carga_ordens c USING ({chave})
+            WINDOW ultima AS (PARTITION BY {particao} ORDER BY c.origem DESC, c.linha DESC)
+        )
+        WHERE posicao > 1
+        ORDER BY origem, linha
+    ''').fetchall()
+    if not repetidas:
+        return []
+
+    conn.executemany("DELETE FROM temp.carga_ordens WHERE rowid = ?", ((rowid,) for rowid, *_ in repetidas))
+    conn.commit()
+
+    erros = []
+    for _, origem, linha, origem_mantida, linha_mantida in repetidas:
+        prefixo = f"{origens[origem]}, linha" if origens else "Linha"
+        mantida = f"{origens[origem_mantida]}, linha" if origens else "linha"
+        erros.append(f"{prefixo} {linha}: chave repetida na carga, ignorada (vale a {mantida} {linha_mantida})")
+    return erros
+
+# Função para aplicar a tabela de carga às ordens em uma única transação (troca atômica)
+# Até o commit, quem lê o banco continua vendo os dados anteriores à carga.
+# origens: nome de cada origem da carga, usado nas mensagens de erro (carga com vários arquivos)
+# nome_carga: descrição da carga no registro das importações (ver historico.py)
+def aplicar_carga(conn, colunas, modo='adicionar', origens=None, nome_carga=None):
+    colunas_sql = ', '.join(colunas)
+    # Cada linha gravada leva o número da importação (início da validade da versão)
+    atualizacoes = ', '.join(f'{coluna} = excluded.{coluna}' for coluna in colunas + ['versao_importacao'])
+
+    # Linhas com a mesma chave são atualizadas apenas se o conteúdo mudou
+    conflito = f'''
+        ON CONFLICT ({', '.join(COLUNAS_CHAVE)}) DO UPDATE SET
+            {atualizacoes},
+            data_atualizacao = CURRENT_TIMESTAMP
+        WHERE ordens_servico.hash_conteudo IS NOT excluded.hash_conteudo
+    '''
+    juncao_versao, versao = versao_das_linhas(colunas)
+    colunas_carga = ', '.join(f'c.{coluna}' for coluna in colunas)
+    # "WHERE 1" evita que o ON CONFLICT seja lido como parte do SELECT
+    query_carga = f'''
+        INSERT INTO ordens_servico ({colunas_sql}, versao_importacao)
+        SELECT {colunas_carga}, {versao} FROM temp.carga_ordens c {juncao_versao}
+        WHERE 1 ORDER BY c.origem, c.linha
+        {conflito}
+    '''
+    query_linha = f'''
+        INSERT INTO ordens_servico ({colunas_sql}, versao_importacao)
+        VALUES ({', '.join('?' for _ in colunas)}, ?)
+        {conflito}
+    '''
+
+    resumo = {'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'removidos': 0}
+
+    if conn.in_transaction:
+        conn.commit()
+
+    # Só a tabela de carga é alterada: feito antes de travar o banco
+    with medir('importacao.chaves_repetidas', 'importacao'):
+        erros = remover_chaves_repetidas(conn, colunas, origens)
+
+    with pragmas_carga(conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # O índice de busca é reconstruído no fim, em vez de linha a linha
+            remover_gatilhos_busca(conn)
+
+            # Versões que a carga vai substituir ou remover vão para o histórico
+            importacao = registrar_importacao(conn, modo, nome_carga)
+            with medir('importacao.historico', 'importacao'):
+                arquivar_versoes_carga(conn, importacao, colunas, modo)
+
+            if modo == 'substituir':
+                resumo['removidos'] = conn.execute("DELETE FROM ordens_servico").rowcount
+
+            total_antes, id_maximo_antes = conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM ordens_servico"
+            ).fetchone()
+            carregadas = conn.execute("SELECT COUNT(*) FROM temp.carga_ordens").fetchone()[0]
+
+            # rowcount conta só as linhas gravadas pelo próprio comando (sem gatilhos):
+            # 1 para inserção ou atualização, 0 para linha inalterada
+            conn.execute("SAVEPOINT carga")
+            with medir('importacao.aplicacao', 'importacao', linhas=carregadas):
+                try:
+                    mudancas = conn.execute(query_carga, (importacao,)).rowcount
+                    gravadas = carregadas
+                except sqlite3.Error:
+                    # Refaz a carga linha a linha para identificar as linhas com erro
+                    conn.execute("ROLLBACK TO carga")
+                    mudancas, gravadas = 0, 0
+                    linhas = conn.execute(f'''
+                        SELECT c.origem, c.linha, {colunas_carga}, {versao} FROM temp.carga_ordens c {juncao_versao}
+                        ORDER BY c.origem, c.linha
+                    ''', (importacao,))
+                    for origem, linha, *valores in linhas.fetchall():
+                        try:
+                            mudancas += conn.execute(query_linha, valores).rowcount
+                            gravadas += 1
+                        except sqlite3.Error as e:
+                            prefixo = f"{origens[origem]}, linha" if origens else "Linha"
+                            erros.append(f"{prefixo} {linha}: {str(e)}")
+            conn.execute("RELEASE carga")
+
+            total_depois = conn.execute("SELECT COUNT(*) FROM ordens_servico").fetchone()[0]
+            resumo['inseridos'] = total_depois - total_antes
+            resumo['atualizados'] = mudancas - resumo['inseridos']
+            resumo['inalterados'] = gravadas - mudancas
+
+            if modo == 'sincronizar':
+                # Remove o que existia antes da carga e não veio na planilha
+                # (sem as colunas da chave na planilha, nenhuma linha antiga é reconhecida)
+                if all(coluna in colunas for coluna in COLUNAS_CHAVE):
+                    condicao = f'''NOT EXISTS (
+                        SELECT 1 FROM temp.carga_ordens c
+                        WHERE c.{COLUNAS_CHAVE[0]} = ordens_servico.{COLUNAS_CHAVE[0]}
+                        AND c.{COLUNAS_CHAVE[1]} = ordens_servico.{COLUNAS_CHAVE[1]}
+                    )'''
+                else:
+                    condicao = '1'
+                with medir('importacao.remocao_ausentes', 'importacao'):
+                    arquivar_versoes(conn, importacao, f"id <= ? AND {condicao}", (id_maximo_antes,))
+                    resumo['removidos'] = conn.execute(
+                        f"DELETE FROM ordens_servico WHERE id <= ? AND {condicao}", (id_maximo_antes,)
+                    ).rowcount
+
+            finalizar_importacao(conn, importacao, resumo)
+            limpar_tabelas_historico_carga(conn)
+
+            # Resumos dos gráficos atualizados na mesma transação: no "substituir" todas as ordens
+            # mudaram; nos demais modos, entram as versões gravadas pela importação e saem as que
+            # ela encerrou (alteradas e removidas, copiadas para o histórico)
+            with medir('importacao.resumos', 'importacao'):
+                if modo == 'substituir':
+                    reconstruir_resumos(conn)
+                else:
+                    atualizar_resumos(conn, [
+                        ('ordens_servico', 'versao_importacao = ?', 1),
+                        ('historico_ordens', 'valido_ate = ?', -1),
+                    ], (importacao, importacao))
+            with medir('importacao.indice_busca', 'importacao'):
+                reconstruir_indice_busca(conn)
+            incrementar_versao_dados(conn)
+
+            with medir('importacao.commit', 'importacao'):
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return resumo, erros
@@ -0,0 +1,200 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from banco import CAMINHO_BANCO, conectar
+from desempenho import medir
+from importacao import (
+    MODOS_IMPORTACAO,
+    aplicar_carga,
+    criar_tabela_carga,
+    gravar_blocos_carga,
+    indexar_tabela_carga,
+    ler_planilha,
+    listar_abas,
+)
+from manutencao import manter_banco
+from snapshot import gravar_snapshot
+
+# Importação pela linha de comando (para agendar no cron), com o mesmo
+# mapeamento de colunas e a mesma normalização da página Atualizar Planilha.
+# Cada planilha (ou aba) é lida e normalizada em um processo próprio, que
+# grava as linhas em um banco de rascunho; um único processo junta os
+# rascunhos na tabela de carga e aplica tudo ao banco em uma transação,
+# como se fosse uma única planilha:
+#
+#   python importar.py norte.xlsx sul.xlsx centro.xlsx --modo sincronizar
+#   python importar.py CARGA_PAINEL.xlsx --todas-abas --processos 4
+
+
+# Função para ler, normalizar e gravar uma planilha/aba em um banco de rascunho
+# (executada nos processos do pool; retorna as colunas encontradas e as linhas gravadas)
+def preparar_origem(caminho, aba, origem, pasta):
+    inicio = time.perf_counter()
+    colunas_encontradas, _, _, blocos = ler_planilha(caminho, aba=aba)
+    if not colunas_encontradas:
+        blocos.close()
+        return {'origem': origem, 'colunas': None, 'linhas': 0, 'rascunho': None, 'segundos': 0.0}
+
+    rascunho = os.path.join(pasta, f"origem_{origem}.db")
+    conn = sqlite3.connect(rascunho)
+    try:
+        # O rascunho é descartável: sem journal e sem esperar o disco
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        criar_tabela_carga(conn, list(colunas_encontradas) + ['hash_conteudo'], temporaria=False)
+        linhas = gravar_blocos_carga(conn, blocos, colunas_encontradas, tabela='carga_ordens', origem=origem)
+    finally:
+        conn.close()
+
+    return {
+        'origem': origem,
+        'colunas': list(colunas_encontradas),
+        'linhas': linhas,
+        'rascunho': rascunho,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+# Função para copiar as linhas de um banco de rascunho para a tabela de carga
+def juntar_rascunho(conn, rascunho):
+    conn.execute("ATTACH DATABASE ? AS rascunho", (rascunho,))
+    try:
+        conn.execute("INSERT INTO temp.carga_ordens SELECT * FROM rascunho.carga_ordens")
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE rascunho")
+
+# Função para montar a lista de origens (arquivo, aba) a importar
+# abas: nomes das abas de cada arquivo; todas_abas: lê todas (as que não têm as colunas esperadas são ignoradas)
+def listar_origens(arquivos, abas=None, todas_abas=False):
+    origens = []
+    for caminho in arquivos:
+        if todas_abas:
+            origens.extend((caminho, aba) for aba in listar_abas(caminho))
+        elif abas:
+            origens.extend((caminho, aba) for aba in abas)
+        else:
+            origens.append((caminho, None))
+    return origens
+
+# Nome de uma origem nas mensagens
+def nome_origem(caminho, aba):
+    nome = os.path.basename(caminho)
+    return f"{nome} [{aba}]" if aba is not None else nome
+
+# Função para importar várias planilhas/abas de uma vez
+# Retorna o resumo ({'inseridos', 'atualizados', 'inalterados', 'removidos'}) e os erros por linha
+def importar_origens(origens, modo='sincronizar', caminho_banco=CAMINHO_BANCO, processos=None, saida=print):
+    if modo not in MODOS_IMPORTACAO:
+        raise ValueError(f"Modo de importação inválido: {modo}")
+
+    nomes = [nome_origem(caminho, aba) for caminho, aba in origens]
+    conn = conectar(caminho_banco)
+    # Os rascunhos ficam ao lado do banco (podem ser grandes demais para a pasta temporária do sistema)
+    pasta = tempfile.mkdtemp(prefix='carga_', dir=os.path.dirname(os.path.abspath(caminho_banco)))
+    colunas = None
+    try:
+        with medir('importacao', 'importacao', modo=modo, origens=len(origens)) as trecho:
+            total = 0
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                futuros = [
+                    executor.submit(preparar_origem, caminho, aba, origem, pasta)
+                    for origem, (caminho, aba) in enumerate(origens)
+                ]
+                try:
+                    # Cada rascunho é juntado assim que fica pronto, enquanto os demais são lidos
+                    for concluidas, futuro in enumerate(as_completed(futuros), 1):
+                        resultado = futuro.result()
+                        nome = nomes[resultado['origem']]
+                        if resultado['colunas'] is None:
+                            saida(f"[{concluidas}/{len(futuros)}] {nome}: nenhuma coluna esperada, ignorada")
+                            continue
+
+                        if colunas is None:
+                            colunas = resultado['colunas'] + ['hash_conteudo']
+                            criar_tabela_carga(conn, colunas)
+                        elif resultado['colunas'] + ['hash_conteudo'] != colunas:
+                            raise ValueError(
+                                f"{nome}: colunas diferentes das demais planilhas "
+                                f"({', '.join(sorted(set(resultado['colunas']) ^ set(colunas[:-1])))})"
+                            )
+
+                        with medir('importacao.juntar_rascunho', 'importacao', linhas=resultado['linhas']):
+                            juntar_rascunho(conn, resultado['rascunho'])
+                        os.remove(resultado['rascunho'])
+                        total += resultado['linhas']
+                        saida(
+                            f"[{concluidas}/{len(futuros)}] {nome}: "
+                            f"{resultado['linhas']} linhas lidas em {resultado['segundos']:.1f}s"
+                        )
+                except BaseException:
+                    for futuro in futuros:
+                        futuro.cancel()
+                    raise
+
+            if colunas is None:
+                raise ValueError("Nenhuma das colunas esperadas foi encontrada nas planilhas")
+
+            trecho.anotar(linhas=total)
+            saida(f"Gravando {total} registros no banco...")
+            indexar_tabela_carga(conn, colunas)
+            resumo, erros = aplicar_carga(conn, colunas, modo, origens=nomes, nome_carga=', '.join(nomes))
+            trecho.anotar(**resumo, erros=len(erros))
+
+        # Os dados já estão no banco; o snapshot só acelera a próxima partida do painel
+        try:
+            gravar_snapshot(conn)
+        except Exception as e:
+            saida(f"Aviso: snapshot não gravado ({e})")
+        try:
+            for tarefa in manter_banco(conn):
+                saida(f"Manutenção: {tarefa['tarefa']} em {tarefa['duracao_ms'] / 1000:.1f}s")
+        except Exception as e:
+            saida(f"Aviso: manutenção do banco não executada ({e})")
+        return resumo, erros
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.carga_ordens")
+        conn.commit()
+        conn.close()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importa planilhas CARGA_PAINEL para o banco do painel")
+    parser.add_argument('arquivos', nargs='+', help="planilhas .xlsx/.xls")
+    parser.add_argument(
+        '--modo', choices=MODOS_IMPORTACAO, default='sincronizar',
+        help="sincronizar (padrão): remove o que não veio nas planilhas; "
+             "adicionar: mantém os demais registros; substituir: apaga tudo antes"
+    )
+    parser.add_argument('--aba', action='append', help="aba a importar de cada arquivo (pode repetir)")
+    parser.add_argument('--todas-abas', action='store_true', help="importa todas as abas com as colunas esperadas")
+    parser.add_argument('--processos', type=int, default=None, help="processos de leitura (padrão: núcleos da máquina)")
+    parser.add_argument('--banco', default=CAMINHO_BANCO)
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    try:
+        origens = listar_origens(args.arquivos, args.aba, args.todas_abas)
+        resumo, erros = importar_origens(origens, args.modo, args.banco, args.processos)
+    except Exception as e:
+        print(f"Erro ao importar: {e}", file=sys.stderr)
+        return 1
+
+    print(
+        f"Importação concluída em {time.perf_counter() - inicio:.1f}s! "
+        f"{resumo['inseridos']} inseridos, {resumo['atualizados']} atualizados, "
+        f"{resumo['inalterados']} inalterados, {resumo['removidos']} removidos. Erros: {len(erros)}"
+    )
+    for erro in erros:
+        print(erro, file=sys.stderr)
+    return 2 if erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
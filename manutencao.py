@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from desempenho import medir
+
+# Manutenção do banco após cada importação: estatísticas do planejador
+# (ANALYZE / PRAGMA optimize) e devolução das páginas livres ao sistema
+# (incremental_vacuum) quando a fragmentação passa do limite. Cada tarefa
+# executada fica registrada na tabela manutencao_banco, com a duração.
+
+# Fração de páginas livres a partir da qual o vacuum é executado
+LIMITE_FRAGMENTACAO = 0.2
+
+# Páginas livres mínimas para o vacuum valer a pena (bancos pequenos não são compactados)
+PAGINAS_LIVRES_MINIMAS = 1024
+
+# Linhas amostradas por índice no ANALYZE (0 analisa tudo; ~1000 já dá boas estimativas)
+LIMITE_ANALISE = 1000
+
+# Registros de manutenção mantidos na tabela
+REGISTROS_MANTIDOS = 1000
+
+# Modos do PRAGMA auto_vacuum
+MODOS_AUTO_VACUUM = {0: 'nenhum', 1: 'completo', 2: 'incremental'}
+
+
+# Função para criar a tabela de registro da manutenção
+def criar_tabela_manutencao(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS manutencao_banco (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarefa TEXT NOT NULL,
+            executada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            duracao_ms REAL,
+            detalhes TEXT
+        )
+    ''')
+
+# Função para obter as estatísticas de armazenamento do banco
+def estatisticas_armazenamento(conn):
+    caminho = conn.execute("PRAGMA database_list").fetchone()[2]
+    tamanho_pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    tamanho_wal = 0
+    if caminho and os.path.exists(f"{caminho}-wal"):
+        tamanho_wal = os.path.getsize(f"{caminho}-wal")
+
+    return {
+        'arquivo_bytes': os.path.getsize(caminho) if caminho else paginas * tamanho_pagina,
+        'wal_bytes': tamanho_wal,
+        'tamanho_pagina': tamanho_pagina,
+        'paginas': paginas,
+        'paginas_livres': livres,
+        'fragmentacao': livres / paginas if paginas else 0.0,
+        'auto_vacuum': MODOS_AUTO_VACUUM.get(auto_vacuum, auto_vacuum),
+    }
+
+# Função para obter o espaço ocupado por cada tabela e índice
+# (None se o SQLite não tiver a tabela virtual dbstat)
+def tamanhos_objetos(conn):
+    try:
+        linhas = conn.execute('''
+            SELECT s.name, COALESCE(m.type, 'interno'), COALESCE(m.tbl_name, s.name),
+                   s.pageno, s.pgsize, s.pgsize - s.unused
+            FROM dbstat AS s
+            LEFT JOIN sqlite_master AS m ON m.name = s.name
+            WHERE s.aggregate = 1
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        return None
+
+    df = pd.DataFrame(linhas, columns=['objeto', 'tipo', 'tabela', 'paginas', 'bytes', 'bytes_usados'])
+    df['mb'] = (df['bytes'] / 1024 ** 2).round(2)
+    df['ocupacao'] = (df['bytes_usados'] / df['bytes'].where(df['bytes'] > 0)).round(3)
+    return df.sort_values('bytes', ascending=False).reset_index(drop=True)
+
+# Função para executar uma tarefa de manutenção e registrá-la
+def executar_tarefa_manutencao(conn, tarefa, comandos, **detalhes):
+    if conn.in_transaction:
+        conn.commit()
+
+    # Em UTC, como o CURRENT_TIMESTAMP das demais tabelas
+    executada_em = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    inicio = time.perf_counter()
+    with medir(f"manutencao.{tarefa}", 'manutencao'):
+        for comando in comandos:
+            # executescript executa o comando até o fim (com execute, o
+            # incremental_vacuum do módulo sqlite3 libera só uma página)
+            conn.executescript(comando)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    registrar_manutencao(conn, tarefa, executada_em, duracao_ms, detalhes)
+    return {'tarefa': tarefa, 'duracao_ms': duracao_ms, **detalhes}
+
+# Função para registrar uma tarefa de manutenção (mantém só os registros mais recentes)
+def registrar_manutencao(conn, tarefa, executada_em, duracao_ms, detalhes):
+    conn.execute('''
+        INSERT INTO manutencao_banco (tarefa, executada_em, duracao_ms, detalhes)
+        VALUES (?, ?, ?, ?)
+    ''', (tarefa, executada_em, duracao_ms, json.dumps(detalhes, ensure_ascii=False) if detalhes else None))
+    conn.execute(
+        "DELETE FROM manutencao_banco WHERE id <= (SELECT MAX(id) FROM manutencao_banco) - ?",
+        (REGISTROS_MANTIDOS,)
+    )
+    conn.commit()
+
+# Função para atualizar as estatísticas usadas pelo planejador de consultas
+def analisar_banco(conn):
+    return [
+        executar_tarefa_manutencao(conn, 'analyze', [
+            f"PRAGMA analysis_limit = {LIMITE_ANALISE}",
+            "ANALYZE",
+        ]),
+        executar_tarefa_manutencao(conn, 'optimize', ["PRAGMA optimize"]),
+    ]
+
+# Função para devolver as páginas livres ao sistema quando a fragmentação passa do limite
+# forcar: executa mesmo abaixo do limite (botão da página Configurações)
+def compactar_banco(conn, forcar=False):
+    antes = estatisticas_armazenamento(conn)
+    if not antes['paginas_livres']:
+        return []
+    if not forcar and (
+        antes['fragmentacao'] < LIMITE_FRAGMENTACAO or antes['paginas_livres'] < PAGINAS_LIVRES_MINIMAS
+    ):
+        return []
+
+    if antes['auto_vacuum'] == 'incremental':
+        tarefa, comandos = 'vacuum_incremental', ["PRAGMA incremental_vacuum"]
+    else:
+        # Bancos criados antes do auto_vacuum: o VACUUM completo reescreve o arquivo
+        # uma vez, já no modo incremental (o pragma foi definido pela conexão)
+        tarefa, comandos = 'vacuum', ["PRAGMA auto_vacuum = INCREMENTAL", "VACUUM"]
+
+    # Em WAL o arquivo só diminui no checkpoint
+    comandos.append("PRAGMA wal_checkpoint(TRUNCATE)")
+    return [executar_tarefa_manutencao(
+        conn, tarefa, comandos,
+        paginas_livres=antes['paginas_livres'],
+        fragmentacao=round(antes['fragmentacao'], 4),
+        arquivo_bytes_antes=antes['arquivo_bytes'],
+    )]
+
+# Função para executar a manutenção após uma importação ou limpeza
+# Retorna as tarefas executadas ({'tarefa', 'duracao_ms', ...})
+def manter_banco(conn, forcar_vacuum=False):
+    with medir('manutencao', 'manutencao'):
+        executadas = analisar_banco(conn)
+        executadas += compactar_banco(conn, forcar_vacuum)
+    return executadas
+
+# Função para listar as últimas tarefas de manutenção
+def historico_manutencao(conn, limite=50):
+    return pd.read_sql_query('''
+        SELECT executada_em, tarefa, duracao_ms, detalhes
+        FROM manutencao_banco
+        ORDER BY id DESC
+        LIMIT ?
+    ''', conn, params=(limite,))
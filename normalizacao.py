@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from pandas.api.types import (
+    infer_dtype,
+    is_bool_dtype,
+    is_datetime64_any_dtype,
+    is_integer_dtype,
+    is_numeric_dtype,
+)
+
+# Formatos de data aceitos, na ordem em que converter_data tenta aplicá-los
+FORMATOS_DATA = ['%d.%m.%Y %H:%M:%S', '%d/%m/%Y', '%Y-%m-%d', '%d.%m.%Y']
+
+# Origem das datas seriais do Excel (1900-01-01 menos os dois dias de ajuste)
+ORIGEM_EXCEL = pd.Timestamp('1899-12-30')
+
+# Tamanho da amostra usada para detectar o formato da coluna de datas
+TAMANHO_AMOSTRA_DATA = 1000
+
+
+# Função para mapear status
+def mapear_status(status_excel):
+    if pd.isna(status_excel) or status_excel == '':
+        return 'Pendente'
+
+    status = str(status_excel).strip()
+    status_map = {
+        'concluído': 'Concluído',
+        'concluido': 'Concluído',
+        'finalizado': 'Concluído',
+        'completo': 'Concluído',
+        'pendente': 'Pendente',
+        'aberto': 'Aberto',
+        'liberado': 'Liberado',
+        'liberada': 'Liberado',
+        'aprovado': 'Aprovado',
+        'em andamento': 'Em Andamento',
+        'processando': 'Em Andamento'
+    }
+
+    return status_map.get(status.lower(), status)
+
+# Função para converter data
+def converter_data(data_excel):
+    if pd.isna(data_excel) or data_excel == '':
+        return None
+
+    try:
+        if isinstance(data_excel, str):
+            # Tentar diferentes formatos de data
+            for fmt in FORMATOS_DATA:
+                try:
+                    return datetime.strptime(data_excel, fmt).date()
+                except:
+                    continue
+        elif isinstance(data_excel, (int, float)):
+            # Data do Excel (número de dias desde 1900-01-01)
+            return (pd.to_datetime('1900-01-01') + pd.Timedelta(days=data_excel-2)).date()
+
+        return pd.to_datetime(data_excel).date()
+    except:
+        return None
+
+# Função para converter quantidade
+def converter_quantidade(valor):
+    try:
+        return int(valor) if not pd.isna(valor) else 0
+    except:
+        return 0
+
+# Função para converter valor monetário
+def converter_valor(valor):
+    try:
+        return float(valor) if not pd.isna(valor) else 0.0
+    except:
+        return 0.0
+
+# Função para converter campos de texto
+# Número inteiro lido como float (coluna numérica com células vazias no pandas) vira '12345', não '12345.0':
+# o mesmo texto da leitura em blocos do .xlsx, que recebe o inteiro
+def converter_texto(valor):
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip() if valor else None
+
+
+# ---------------------------------------------------------------------------
+# Normalização por coluna: mesmo resultado das funções acima, aplicado à
+# Series inteira. Valores que escapam do caminho vetorizado caem na função
+# escalar correspondente, garantindo a paridade.
+# ---------------------------------------------------------------------------
+
+# Verifica se a coluna contém apenas textos (ou valores ausentes)
+def _somente_texto(serie):
+    if is_numeric_dtype(serie) or is_datetime64_any_dtype(serie):
+        return False
+    return infer_dtype(serie, skipna=True) in ('string', 'empty')
+
+# Aplica a função escalar uma vez por valor distinto e expande o resultado
+def _aplicar_por_valor_unico(serie, funcao):
+    if serie.dtype == object and not _somente_texto(serie):
+        # Tipos misturados (1, 1.0 e True se confundem no factorize)
+        return pd.Series([funcao(valor) for valor in serie.tolist()], index=serie.index, dtype=object)
+
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    # O código -1 (valor ausente) aponta para o último elemento
+    resultados = np.array([funcao(valor) for valor in unicos.tolist()] + [funcao(None)], dtype=object)
+    return pd.Series(resultados[codigos], index=serie.index, dtype=object)
+
+# Função para normalizar a coluna de status
+def normalizar_status(serie):
+    return _aplicar_por_valor_unico(serie, mapear_status)
+
+# Função para normalizar colunas de texto
+def normalizar_texto(serie):
+    if _somente_texto(serie):
+        limpo = serie.str.strip()
+        ausente = serie.isna() | (serie == '')
+        return pd.Series(np.where(ausente, None, limpo.astype(object)), index=serie.index, dtype=object)
+
+    if is_integer_dtype(serie) and not is_bool_dtype(serie):
+        texto = serie.astype(str).astype(object)
+        return texto.where(serie != 0, None)
+
+    return _aplicar_por_valor_unico(serie, converter_texto)
+
+# Converte a coluna para número; o que o caminho vetorizado não converte (ou, nos textos,
+# não casa com padrao_texto) cai na função escalar, uma vez por valor distinto
+# Valores ausentes ficam NaN
+def _numeros(serie, padrao_texto, converter):
+    if is_bool_dtype(serie) or is_numeric_dtype(serie):
+        return serie.astype('float64')
+
+    numeros = pd.Series(np.nan, index=serie.index, dtype='float64')
+    if _somente_texto(serie):
+        textos = serie
+        outros = None
+    else:
+        eh_texto = serie.map(type) == str
+        textos = serie[eh_texto]
+        outros = serie[~eh_texto & serie.notna()]
+
+    textos = textos.dropna().str.strip()
+    if padrao_texto is not None:
+        textos = textos[textos.str.fullmatch(padrao_texto)]
+    numeros.loc[textos.index] = pd.to_numeric(textos, errors='coerce').astype('float64')
+
+    if outros is not None and not outros.empty:
+        numeros.loc[outros.index] = pd.to_numeric(outros, errors='coerce').astype('float64')
+
+    # Ex.: 'nan' (NaN no escalar, não 0), dígitos não ASCII ('٣') e '1_000', que int()/float() aceitam
+    falhas = numeros.isna() & serie.notna()
+    if falhas.any():
+        numeros[falhas] = _aplicar_por_valor_unico(serie[falhas], converter).astype('float64')
+    return numeros
+
+# Função para normalizar a coluna de quantidade
+def normalizar_quantidade(serie):
+    numeros = _numeros(serie, r'[+-]?\d+', converter_quantidade)
+    numeros = numeros.replace([np.inf, -np.inf], np.nan).fillna(0)
+    return np.trunc(numeros).astype('int64')
+
+# Função para normalizar a coluna de valor monetário
+# (só os valores ausentes viram 0.0: o texto 'nan' continua NaN e é gravado como NULL)
+def normalizar_valor(serie):
+    return _numeros(serie, None, converter_valor).mask(serie.isna(), 0.0)
+
+# Detecta o formato predominante em uma amostra de datas em texto
+def detectar_formato_data(textos):
+    amostra = textos.head(TAMANHO_AMOSTRA_DATA)
+    melhor_formato, melhor_contagem = FORMATOS_DATA[0], 0
+    for formato in FORMATOS_DATA:
+        contagem = pd.to_datetime(amostra, format=formato, errors='coerce').notna().sum()
+        if contagem > melhor_contagem:
+            melhor_formato, melhor_contagem = formato, contagem
+    return melhor_formato
+
+# Converte datas seriais do Excel com um único deslocamento vetorizado
+def _datas_seriais(numeros):
+    numeros = numeros.astype('float64')
+    dias_validos = numeros.between(-100_000, 100_000)
+    datas = ORIGEM_EXCEL + pd.to_timedelta(numeros.where(dias_validos), unit='D')
+    return datas
+
+# Converte textos aplicando os formatos conhecidos, começando pelo detectado
+def _datas_texto(textos):
+    partes = []
+    pendentes = textos[textos != '']
+    if pendentes.empty:
+        return partes, pendentes
+
+    formato = detectar_formato_data(pendentes)
+    for fmt in [formato] + [f for f in FORMATOS_DATA if f != formato]:
+        convertidas = pd.to_datetime(pendentes, format=fmt, errors='coerce')
+        ok = convertidas.notna()
+        partes.append(convertidas[ok])
+        pendentes = pendentes[~ok]
+        if pendentes.empty:
+            break
+    return partes, pendentes
+
+# Converte a coluna de datas em partes datetime64, separando o que só o escalar resolve
+def _converter_coluna_datas(serie):
+    if is_datetime64_any_dtype(serie):
+        return [serie.dropna()], serie.iloc[0:0]
+
+    if is_numeric_dtype(serie) and not is_bool_dtype(serie):
+        datas = _datas_seriais(serie)
+        residuo = serie[datas.isna() & serie.notna()]
+        return [datas.dropna()], residuo
+
+    if _somente_texto(serie):
+        return _datas_texto(serie.dropna())
+
+    tipos = serie.map(type)
+    partes = []
+    residuos = []
+
+    textos = serie[tipos == str]
+    if not textos.empty:
+        partes_texto, residuo = _datas_texto(textos)
+        partes.extend(partes_texto)
+        residuos.append(residuo)
+
+    seriais = serie[tipos.isin([int, float]) & serie.notna()]
+    if not seriais.empty:
+        datas_seriais = _datas_seriais(seriais)
+        partes.append(datas_seriais.dropna())
+        residuos.append(seriais[datas_seriais.isna()])
+
+    eh_data = tipos.isin([datetime, date, pd.Timestamp])
+    objetos = serie[eh_data]
+    if not objetos.empty:
+        datas_objeto = pd.to_datetime(objetos, errors='coerce')
+        partes.append(datas_objeto.dropna())
+        residuos.append(objetos[datas_objeto.isna()])
+
+    residuos.append(serie[~tipos.isin([str, int, float]) & ~eh_data & serie.notna()])
+    return partes, pd.concat(residuos)
+
+# Converte cada data distinta uma única vez e expande o resultado para a coluna
+def _datas_por_valor_unico(serie, formatar, formatar_escalar):
+    if serie.dtype == object and not _somente_texto(serie):
+        # Tipos misturados (1, 1.0, True e Decimal('1') se confundem no factorize): converte valor a valor
+        codigos, unicos = np.arange(len(serie)), serie.reset_index(drop=True)
+    else:
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        unicos = pd.Series(unicos)
+    partes, residuo = _converter_coluna_datas(unicos)
+
+    resultados = np.full(len(unicos) + 1, None, dtype=object)
+    for datas in partes:
+        if not datas.empty:
+            resultados[datas.index.to_numpy()] = formatar(datas).to_numpy(dtype=object)
+    for indice, valor in residuo.items():
+        resultados[indice] = formatar_escalar(converter_data(valor))
+    # O código -1 (valor ausente) aponta para o último elemento, que é None
+    return pd.Series(resultados[codigos], index=serie.index, dtype=object)
+
+# Função para normalizar a coluna de datas (datetime.date ou None)
+def normalizar_datas(serie):
+    return _datas_por_valor_unico(
+        serie,
+        lambda datas: datas.dt.date,
+        lambda data: data
+    )
+
+# Função para normalizar a coluna de datas no formato gravado no banco (AAAA-MM-DD)
+def normalizar_datas_iso(serie):
+    return _datas_por_valor_unico(
+        serie,
+        lambda datas: datas.dt.strftime('%Y-%m-%d'),
+        lambda data: data.isoformat() if data is not None else None
+    )
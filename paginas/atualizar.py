@@ -0,0 +1,123 @@
+import streamlit as st
+
+from paginas.comum import avisar_banco_ocupado, carregar_totais, conexao_escrita, conexao_leitura
+from servico_importacao import enfileirar_importacao
+from tarefas import SITUACOES_FINAIS, obter_tarefa, tarefa_em_andamento, tarefas_recentes
+
+# Página Atualizar Planilha: envio para a fila de importação e acompanhamento
+# (a leitura da planilha, com o openpyxl, acontece no serviço de importação)
+
+
+# Função para acompanhar uma importação em andamento (atualizada a cada segundo)
+@st.fragment(run_every=1)
+def acompanhar_importacao(id_tarefa):
+    with conexao_leitura() as conn:
+        tarefa = obter_tarefa(conn, id_tarefa)
+    if tarefa['situacao'] in SITUACOES_FINAIS:
+        # Recarrega a página inteira para exibir o resultado e os dados novos
+        st.rerun()
+    
+    if tarefa['situacao'] == 'pendente':
+        st.info(f"⏳ {tarefa['nome_arquivo']}: aguardando na fila de importação...")
+        return
+    
+    processados, total = tarefa['processados'], tarefa['total']
+    if tarefa['mensagem']:
+        # Leitura concluída: a carga está sendo aplicada ao banco
+        st.progress(1.0)
+        st.text(f"💾 {tarefa['nome_arquivo']}: {tarefa['mensagem']}")
+    elif total:
+        st.progress(min(processados / total, 1.0))
+        st.text(f"🔄 {tarefa['nome_arquivo']}: processando... {processados}/{total} registros")
+    else:
+        st.text(f"🔄 {tarefa['nome_arquivo']}: processando... {processados} registros")
+    st.caption("A importação continua mesmo que esta página seja fechada.")
+
+# Função para exibir o resultado de uma importação finalizada
+def exibir_resultado_importacao(tarefa):
+    if tarefa['situacao'] == 'erro':
+        st.error(tarefa['mensagem'])
+        return
+    
+    if tarefa['removidos']:
+        st.info(f"🗑️ {tarefa['removidos']} registros ausentes da planilha foram removidos")
+    st.success(tarefa['mensagem'])
+    
+    if tarefa['erros']:
+        erros = tarefa['erros'].split('\n')
+        with st.expander(f"⚠️ {len(erros)} linhas com erro"):
+            st.text(tarefa['erros'])
+
+# Função para exibir a página
+def exibir():
+    st.header("📁 Atualização Semanal da Planilha")
+    
+    st.info("""
+    🔄 **Processo de Atualização Semanal**
+    
+    1. Faça upload da planilha CARGA_PAINEL.xlsx atualizada
+    2. Os registros são identificados pelo Número da Cotação + Item (SD); se a chave se repete na planilha, vale a última linha e as anteriores aparecem nos erros
+    3. Apenas registros novos ou alterados são gravados; os inalterados são mantidos
+    4. Recomendado: Fazer backup antes da atualização
+    """)
+    
+    totais = carregar_totais()
+    if totais['total'] > 0:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Registros Atuais", totais['total'])
+        with col2:
+            ultima_atualizacao = totais['ultima_importacao'] or 'N/A'
+            st.metric("Última Atualização", str(ultima_atualizacao)[:10] if ultima_atualizacao != 'N/A' else 'N/A')
+        with col3:
+            st.metric("Status", "✅ Dados Carregados")
+    
+    arquivo_excel = st.file_uploader(
+        "📎 Selecione a planilha CARGA_PAINEL.xlsx atualizada",
+        type=['xlsx', 'xls'],
+        help="Faça upload da planilha completa para atualização semanal"
+    )
+    
+    if arquivo_excel is not None:
+        st.success(f"📁 Arquivo carregado: {arquivo_excel.name}")
+        
+        remover_ausentes = st.checkbox(
+            "🗑️ Remover registros que não estão na planilha",
+            value=True,
+            help="Na atualização completa, apaga os registros cuja cotação/item não aparece na nova planilha"
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🔄 Atualizar Dados Completos", type="primary", use_container_width=True):
+                with avisar_banco_ocupado(), conexao_escrita() as conn:
+                    st.session_state.tarefa_importacao = enfileirar_importacao(
+                        conn, arquivo_excel, arquivo_excel.name,
+                        modo='sincronizar' if remover_ausentes else 'adicionar'
+                    )
+        
+        with col2:
+            if st.button("➕ Adicionar aos Dados Existentes", type="secondary", use_container_width=True):
+                with avisar_banco_ocupado(), conexao_escrita() as conn:
+                    st.session_state.tarefa_importacao = enfileirar_importacao(
+                        conn, arquivo_excel, arquivo_excel.name, modo='adicionar'
+                    )
+    
+    # Importação desta sessão ou, após recarregar a página, a que estiver em andamento
+    with conexao_leitura() as conn:
+        id_tarefa = st.session_state.get('tarefa_importacao') or tarefa_em_andamento(conn)
+        tarefa = obter_tarefa(conn, id_tarefa) if id_tarefa else None
+        recentes = tarefas_recentes(conn)
+    
+    if tarefa:
+        st.session_state.tarefa_importacao = id_tarefa
+        if tarefa['situacao'] in SITUACOES_FINAIS:
+            exibir_resultado_importacao(tarefa)
+            if tarefa['situacao'] == 'concluida' and st.session_state.get('importacao_comemorada') != id_tarefa:
+                st.session_state.importacao_comemorada = id_tarefa
+                st.balloons()
+        else:
+            acompanhar_importacao(id_tarefa)
+    
+    with st.expander("🗂️ Importações Recentes"):
+        st.dataframe(recentes, use_container_width=True, hide_index=True)
@@ -0,0 +1,71 @@
+import sqlite3
+from contextlib import contextmanager
+
+import streamlit as st
+
+from banco import PoolConexoes, conectar, versao_dados
+from cache_consultas import CacheConsultas, em_cache
+from consultas import totais_gerais
+from desempenho import medido
+
+# Estado compartilhado pelas páginas: pools de conexões, cache de consultas e
+# as consultas usadas por mais de uma página. Os módulos são importados uma vez
+# por processo (não a cada rerun do script), e os resultados ficam no cache
+# enquanto a geração dos dados não muda.
+
+# Função para conectar ao banco de dados (garante o schema e cria os pools de conexões)
+@st.cache_resource
+def init_database():
+    conectar().close()
+    return {
+        'leitura': PoolConexoes(tamanho=8, somente_leitura=True),
+        'escrita': PoolConexoes(tamanho=2),
+    }
+
+# Conexão somente leitura da thread atual (páginas de consulta)
+def conexao_leitura():
+    return init_database()['leitura'].conexao()
+
+# Conexão de escrita da thread atual
+def conexao_escrita():
+    return init_database()['escrita'].conexao()
+
+# Aviso exibido quando uma escrita da página não consegue a trava do banco
+AVISO_BANCO_OCUPADO = "⏳ Importação em andamento: o banco está sendo atualizado. Tente novamente quando ela terminar."
+
+# Exibe o aviso em vez do erro quando o banco continua travado por outra escrita
+# (a gravação de uma importação grande pode segurar a trava por mais que TEMPO_ESPERA_TRAVA)
+@contextmanager
+def avisar_banco_ocupado():
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if 'locked' not in str(e) and 'busy' not in str(e):
+            raise
+        st.warning(AVISO_BANCO_OCUPADO)
+
+# Cache das consultas, compartilhado pelas sessões (uma instância por processo)
+@st.cache_resource
+def cache_consultas():
+    return CacheConsultas()
+
+# Geração atual dos dados: muda a cada importação ou limpeza e invalida o cache
+def geracao_dados():
+    with conexao_leitura() as conn:
+        return versao_dados(conn)
+
+# Guarda o resultado no cache de consultas, por argumentos e geração dos dados
+# (o tempo medido inclui os acertos do cache, que aparecem como chamadas rápidas)
+def consulta_em_cache(funcao):
+    return medido('consulta')(em_cache(cache_consultas, geracao_dados)(funcao))
+
+# Guarda a figura de um gráfico pronta no cache, por gráfico, filtros e geração dos dados
+# (a figura é compartilhada entre as sessões: o st.plotly_chart só a lê para serializar)
+def figura_em_cache(funcao):
+    return em_cache(cache_consultas, geracao_dados)(funcao)
+
+# Totais do painel (usados por todas as páginas para saber se há dados)
+@consulta_em_cache
+def carregar_totais():
+    with conexao_leitura() as conn:
+        return totais_gerais(conn)
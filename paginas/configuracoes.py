@@ -0,0 +1,247 @@
+import sqlite3
+
+import streamlit as st
+
+from analise import MOTORES_ANALISE, SNAPSHOT_INDISPONIVEL, comparar_motores, duckdb_instalado, motor_em_uso
+from banco import incrementar_versao_dados
+from busca import reconstruir_indice_busca, remover_gatilhos_busca
+from compactacao import relatorio_memoria
+from desempenho import (
+    ARQUIVO_LOG_DESEMPENHO,
+    INSTRUMENTACAO_ATIVA,
+    descartados_log,
+    limpar_desempenho,
+    resumo_desempenho,
+)
+from historico import arquivar_versoes, finalizar_importacao, registrar_importacao
+from manutencao import (
+    LIMITE_FRAGMENTACAO,
+    estatisticas_armazenamento,
+    historico_manutencao,
+    manter_banco,
+    tamanhos_objetos,
+)
+from paginas.comum import (
+    avisar_banco_ocupado,
+    cache_consultas,
+    conexao_escrita,
+    conexao_leitura,
+    consulta_em_cache,
+    geracao_dados,
+)
+from resumos import limpar_resumos, verificar_resumos
+from snapshot import carregar_ordens
+
+# Página Configurações: armazenamento, cache, desempenho, resumos e limpeza dos dados
+
+
+# Função para carregar dados (tipos compactos, lidos do snapshot Arrow quando atualizado)
+@consulta_em_cache
+def carregar_dados():
+    with conexao_leitura() as conn:
+        return carregar_ordens(conn)
+
+# Função para limpar dados antigos
+def limpar_dados_antigos():
+    with conexao_escrita() as conn:
+        cursor = conn.cursor()
+        if conn.in_transaction:
+            conn.commit()
+        # Uma única transação (como na importação): se algo falhar, os gatilhos da busca voltam
+        # com o rollback, em vez de ficarem desligados
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            remover_gatilhos_busca(conn)
+            # As ordens apagadas continuam no histórico, encerradas nesta "importação"
+            importacao = registrar_importacao(conn, 'limpeza')
+            removidos = arquivar_versoes(conn, importacao, '1')
+            finalizar_importacao(conn, importacao, {'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'removidos': removidos})
+            cursor.execute("DELETE FROM ordens_servico")
+            limpar_resumos(conn)
+            reconstruir_indice_busca(conn)
+            incrementar_versao_dados(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        # Devolve ao sistema o espaço das linhas apagadas (se uma importação começou, fica para depois dela)
+        try:
+            manter_banco(conn)
+        except sqlite3.OperationalError:
+            pass
+
+# Função para exibir a página
+def exibir():
+    st.header("⚙️ Configurações do Sistema")
+    
+    df = carregar_dados()
+    
+    st.subheader("📊 Informações do Banco de Dados")
+    if not df.empty:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total de Registros", len(df))
+        with col2:
+            tamanho_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+            st.metric("Memória em Cache", f"{tamanho_mb:.2f} MB")
+        with col3:
+            colunas_count = len(df.columns)
+            st.metric("Colunas", colunas_count)
+        
+        with st.expander("🧠 Memória por Coluna"):
+            st.dataframe(relatorio_memoria(df), use_container_width=True)
+    
+    st.subheader("💾 Armazenamento")
+    with conexao_leitura() as conn:
+        armazenamento = estatisticas_armazenamento(conn)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Arquivo do Banco", f"{armazenamento['arquivo_bytes'] / 1024 ** 2:.1f} MB")
+    with col2:
+        st.metric("WAL", f"{armazenamento['wal_bytes'] / 1024 ** 2:.1f} MB")
+    with col3:
+        st.metric("Páginas", f"{armazenamento['paginas']:,}".replace(',', '.'))
+    with col4:
+        st.metric(
+            "Páginas Livres",
+            f"{armazenamento['paginas_livres']:,}".replace(',', '.'),
+            f"{armazenamento['fragmentacao']:.1%} do arquivo",
+            delta_color="off"
+        )
+    st.caption(
+        f"Páginas de {armazenamento['tamanho_pagina']} bytes; auto_vacuum {armazenamento['auto_vacuum']}. "
+        f"Após cada importação o banco é analisado (ANALYZE / PRAGMA optimize) e, com mais de "
+        f"{LIMITE_FRAGMENTACAO:.0%} de páginas livres, compactado."
+    )
+    
+    if st.checkbox("Mostrar espaço por tabela e índice"):
+        with conexao_leitura() as conn:
+            objetos = tamanhos_objetos(conn)
+        if objetos is None:
+            st.info("Esta versão do SQLite não informa o espaço por objeto (dbstat).")
+        else:
+            st.dataframe(objetos, use_container_width=True, hide_index=True)
+    
+    with st.expander("🛠️ Histórico de Manutenção"):
+        with conexao_leitura() as conn:
+            historico = historico_manutencao(conn)
+        if historico.empty:
+            st.info("Nenhuma manutenção executada ainda.")
+        else:
+            st.dataframe(historico, use_container_width=True, hide_index=True)
+    
+    if st.button("🧹 Executar Manutenção Agora"):
+        with avisar_banco_ocupado():
+            with conexao_escrita() as conn:
+                executadas = manter_banco(conn, forcar_vacuum=True)
+            st.success("✅ " + ", ".join(
+                f"{tarefa['tarefa']} ({tarefa['duracao_ms']:.0f} ms)" for tarefa in executadas
+            ))
+    
+    st.subheader("⚡ Cache de Consultas")
+    estatisticas = cache_consultas().estatisticas()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Entradas", estatisticas['entradas'])
+    with col2:
+        st.metric("Memória", f"{estatisticas['memoria_mb']:.1f} / {estatisticas['limite_mb']:.0f} MB")
+    with col3:
+        st.metric("Acertos / Consultas", f"{estatisticas['acertos']} / {estatisticas['falhas']}")
+    with col4:
+        st.metric("Chamadas Coalescidas", estatisticas['coalescidas'])
+    st.caption(f"Geração dos dados: {geracao_dados()} (incrementada a cada importação)")
+    
+    st.subheader("⏱️ Desempenho")
+    if INSTRUMENTACAO_ATIVA:
+        st.caption(
+            "Tempos (ms) das últimas execuções neste processo: comandos SQL, etapas da importação, "
+            f"consultas, gráficos e exportações. Registro completo em {ARQUIVO_LOG_DESEMPENHO}."
+        )
+        if descartados_log():
+            st.caption(f"⚠️ {descartados_log()} registros não foram gravados no log (fila cheia).")
+        resumo = resumo_desempenho()
+        if resumo.empty:
+            st.info("Nenhum trecho medido ainda.")
+        else:
+            categorias = st.multiselect(
+                "Categorias",
+                options=sorted(resumo['categoria'].unique()),
+                default=sorted(resumo['categoria'].unique())
+            )
+            st.dataframe(
+                resumo[resumo['categoria'].isin(categorias)],
+                use_container_width=True,
+                hide_index=True
+            )
+        if st.button("🔄 Zerar Estatísticas de Desempenho"):
+            limpar_desempenho()
+            st.rerun()
+    else:
+        st.info("Instrumentação desligada (variável de ambiente PAINEL_INSTRUMENTACAO=0).")
+    
+    st.subheader("🧮 Resumos dos Gráficos")
+    st.caption("Os gráficos leem tabelas de resumo atualizadas a cada importação.")
+    
+    if st.button("🔁 Verificar e Reconstruir Resumos"):
+        with avisar_banco_ocupado():
+            with conexao_escrita() as conn:
+                divergencias = verificar_resumos(conn)
+                if any(divergencias.values()):
+                    incrementar_versao_dados(conn)
+                    conn.commit()
+            if any(divergencias.values()):
+                st.warning("⚠️ Resumos reconstruídos: " + ", ".join(
+                    f"{tabela} ({quantidade} linhas divergentes)"
+                    for tabela, quantidade in divergencias.items() if quantidade
+                ))
+            else:
+                st.success("✅ Resumos consistentes com os dados.")
+    
+    with conexao_leitura() as conn:
+        motor = motor_em_uso(conn)
+    st.caption(
+        f"Relatórios gerenciais calculados pelo motor {motor} "
+        f"(variável de ambiente PAINEL_ANALISE: {' ou '.join(MOTORES_ANALISE)})."
+    )
+    if duckdb_instalado() and st.button("⚖️ Comparar Motores de Análise"):
+        with conexao_leitura() as conn:
+            diferencas = comparar_motores(conn)
+        if diferencas == SNAPSHOT_INDISPONIVEL:
+            st.info("ℹ️ Comparação indisponível: não foi possível gravar o snapshot da versão atual dos dados.")
+        else:
+            divergentes = {relatorio: diferenca for relatorio, diferenca in diferencas.items() if diferenca}
+            if divergentes:
+                st.warning("⚠️ Relatórios divergentes entre SQLite e duckdb: " + ", ".join(divergentes))
+                with st.expander("Diferenças"):
+                    for relatorio, diferenca in divergentes.items():
+                        st.text(f"{relatorio}:\n{diferenca}")
+            else:
+                st.success("✅ Os dois motores retornam os mesmos números: " + ", ".join(diferencas))
+    
+    st.subheader("🗑️ Limpeza de Dados")
+    st.warning("⚠️ Atenção: Esta ação é irreversível!")
+    
+    if st.button("🗑️ Limpar Todos os Dados", type="secondary"):
+        if st.session_state.get('confirmar_limpeza'):
+            with avisar_banco_ocupado():
+                limpar_dados_antigos()
+                st.success("✅ Todos os dados foram removidos!")
+                st.rerun()
+        else:
+            st.session_state.confirmar_limpeza = True
+            st.warning("⚠️ Clique novamente para confirmar a limpeza completa.")
+    
+    st.subheader("📋 Estrutura da Planilha Esperada")
+    colunas_esperadas = [
+        "Descrição d/operação", "Número da Oportunidade", "Número da VTA",
+        "Número da Cotação", "Número do Circuito", "Status cotação",
+        "Denominação produto", "Quantidade", "Status", "Valor pedido bruto",
+        "Criado em", "Emissor da Ordem", "Nome do Emissor da Ordem",
+        "Nome do Gerente de Contas", "Organização de Vendas",
+        "Canal de distribuição", "Setor de atividade", "Item (SD)",
+        "ID produto", "Tempo de Contrato"
+    ]
+    
+    st.info("📋 Colunas esperadas na planilha CARGA_PAINEL.xlsx:")
+    for i, col in enumerate(colunas_esperadas, 1):
+        st.text(f"{i:2d}. {col}")
@@ -0,0 +1,178 @@
+import os
+from datetime import datetime
+
+import streamlit as st
+
+from consultas import COLUNAS_CONSULTA, contagem_valores, contar_ordens, cursor_da_pagina, pagina_ordens
+from desempenho import medir
+from exportacao import FORMATOS_EXPORTACAO, caminho_exportacao, exportar_ordens
+from paginas.comum import carregar_totais, conexao_leitura, consulta_em_cache
+
+# Página Consultar Dados: filtros, paginação por chave e exportação
+
+
+# Consulta detalhada: filtros, contagem e página atual, resolvidos no banco
+@consulta_em_cache
+def carregar_contagem_valores(coluna):
+    with conexao_leitura() as conn:
+        return contagem_valores(conn, coluna)
+
+# Rótulo de uma opção de filtro com a quantidade de ordens do valor ("Ativo (1.234)")
+def rotulo_com_quantidade(contagens):
+    def rotulo(valor):
+        if valor not in contagens:
+            return valor
+        return f"{valor} ({contagens[valor]:,})".replace(',', '.')
+    return rotulo
+
+@consulta_em_cache
+def carregar_contagem_ordens(filtros):
+    with conexao_leitura() as conn:
+        return contar_ordens(conn, filtros)
+
+@consulta_em_cache
+def carregar_pagina_ordens(filtros, ordenar_por, decrescente, tamanho, apos):
+    with conexao_leitura() as conn:
+        return pagina_ordens(conn, filtros, ordenar_por, decrescente, tamanho, apos)
+
+# Função para exibir a página
+def exibir():
+    st.header("🔍 Consulta Detalhada de Dados")
+    
+    totais = carregar_totais()
+    
+    if totais['total'] > 0:
+        # Filtros avançados
+        st.subheader("🎛️ Filtros")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            opcoes_status = carregar_contagem_valores('status')
+            filtro_status = st.multiselect(
+                "Status",
+                options=list(opcoes_status),
+                default=list(opcoes_status),
+                format_func=rotulo_com_quantidade(opcoes_status)
+            )
+        
+        with col2:
+            opcoes_status_cotacao = carregar_contagem_valores('status_cotacao')
+            filtro_status_cotacao = st.multiselect(
+                "Status Cotação",
+                options=list(opcoes_status_cotacao),
+                default=list(opcoes_status_cotacao),
+                format_func=rotulo_com_quantidade(opcoes_status_cotacao)
+            )
+        
+        with col3:
+            opcoes_produto = carregar_contagem_valores('denominacao_produto')
+            filtro_produto = st.selectbox(
+                "Produto",
+                options=['Todos'] + list(opcoes_produto),
+                index=0,
+                format_func=rotulo_com_quantidade(opcoes_produto)
+            )
+        
+        with col4:
+            filtro_cliente = st.text_input(
+                "🔍 Buscar Cliente",
+                help="Busca por nome, operação, oportunidade, cotação ou circuito (aceita início de palavras)"
+            )
+        
+        # Filtros aplicados no banco (WHERE)
+        filtros = {
+            'status': filtro_status,
+            'status_cotacao': filtro_status_cotacao or None,
+            'produto': filtro_produto if filtro_produto != 'Todos' else None,
+            'cliente': filtro_cliente or None,
+        }
+        
+        # Exibir resultados
+        total_filtrado = carregar_contagem_ordens(filtros)
+        st.subheader(f"📊 Resultados: {total_filtrado} registros")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            # Com busca por cliente, os resultados mais relevantes vêm primeiro
+            rotulos_ordem = {'id': 'Mais recentes', 'relevancia': 'Relevância da busca'}
+            ordenar_por = st.selectbox(
+                "Ordenar por",
+                options=['id', 'relevancia'] + COLUNAS_CONSULTA,
+                index=1 if filtro_cliente else 0,
+                format_func=lambda coluna: rotulos_ordem.get(coluna, coluna)
+            )
+        with col2:
+            decrescente = st.radio("Ordem", ["Decrescente", "Crescente"], horizontal=True) == "Decrescente"
+        with col3:
+            tamanho_pagina = st.selectbox("Registros por página", [25, 50, 100, 200], index=1)
+        
+        # Paginação por chave: guarda o cursor do início de cada página visitada
+        chave_consulta = repr((filtros, ordenar_por, decrescente, tamanho_pagina))
+        if st.session_state.get('consulta_chave') != chave_consulta:
+            st.session_state.consulta_chave = chave_consulta
+            st.session_state.consulta_cursores = [None]
+        cursores = st.session_state.consulta_cursores
+        
+        pagina = carregar_pagina_ordens(filtros, ordenar_por, decrescente, tamanho_pagina + 1, cursores[-1])
+        tem_proxima = len(pagina) > tamanho_pagina
+        pagina = pagina.head(tamanho_pagina)
+        
+        with medir('consulta.tabela.envio', 'serializacao', linhas=len(pagina)):
+            st.dataframe(
+                pagina[COLUNAS_CONSULTA],
+                use_container_width=True,
+                height=400,
+                hide_index=True
+            )
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("◀ Anterior", disabled=len(cursores) == 1, use_container_width=True):
+                cursores.pop()
+                st.rerun()
+        with col2:
+            total_paginas = max(1, -(-total_filtrado // tamanho_pagina))
+            st.markdown(f"<div style='text-align: center'>Página {len(cursores)} de {total_paginas}</div>", unsafe_allow_html=True)
+        with col3:
+            if st.button("Próxima ▶", disabled=not tem_proxima, use_container_width=True):
+                cursores.append(cursor_da_pagina(pagina, ordenar_por))
+                st.rerun()
+        
+        # Download dos dados filtrados (gerado em disco e reaproveitado enquanto os dados não mudarem)
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            formato = st.selectbox(
+                "Formato",
+                options=list(FORMATOS_EXPORTACAO),
+                format_func=lambda formato: FORMATOS_EXPORTACAO[formato][0]
+            )
+        rotulo, mime = FORMATOS_EXPORTACAO[formato]
+        with conexao_leitura() as conn:
+            caminho = caminho_exportacao(conn, filtros, formato)
+        
+        with col2:
+            if not os.path.exists(caminho) and st.button(f"📥 Gerar Dados Filtrados ({rotulo})"):
+                progresso_exportacao = st.progress(0)
+                
+                def atualizar_exportacao(escritas):
+                    progresso_exportacao.progress(min(escritas / total_filtrado, 1.0) if total_filtrado else 1.0)
+                
+                with conexao_leitura() as conn:
+                    exportar_ordens(conn, filtros, formato, progresso=atualizar_exportacao)
+                st.rerun()
+            
+            if os.path.exists(caminho):
+                # O arquivo só é lido quando o botão é clicado (não a cada rerun da página)
+                def ler_exportacao():
+                    with open(caminho, 'rb') as arquivo:
+                        return arquivo.read()
+                
+                st.download_button(
+                    label=f"📥 Baixar {rotulo}",
+                    data=ler_exportacao,
+                    file_name=f"dados_filtrados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}",
+                    mime=mime
+                )
+    else:
+        st.info("📋 Nenhum dado encontrado.")
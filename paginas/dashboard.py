@@ -0,0 +1,142 @@
+import plotly.express as px
+import streamlit as st
+
+from consultas import contar_por_status, mais_frequentes, ordens_por_mes, valor_por_status_cotacao
+from desempenho import medir
+from graficos import limitar_categorias, reduzir_serie
+from paginas.comum import carregar_totais, conexao_leitura, consulta_em_cache, figura_em_cache
+
+# Página Dashboard Executivo: métricas e gráficos (o Plotly só é carregado com esta página)
+
+
+# Agregações do painel, calculadas no banco
+@consulta_em_cache
+def carregar_contagem_status():
+    with conexao_leitura() as conn:
+        return contar_por_status(conn)
+
+@consulta_em_cache
+def carregar_valor_por_status_cotacao():
+    with conexao_leitura() as conn:
+        return valor_por_status_cotacao(conn)
+
+@consulta_em_cache
+def carregar_ordens_por_mes():
+    with conexao_leitura() as conn:
+        return ordens_por_mes(conn)
+
+@consulta_em_cache
+def carregar_mais_frequentes(coluna, limite=10):
+    with conexao_leitura() as conn:
+        return mais_frequentes(conn, coluna, limite)
+
+# Figuras dos gráficos, montadas uma vez por geração dos dados, com os pontos limitados (graficos.py)
+@figura_em_cache
+def figura_status():
+    status_counts = limitar_categorias(carregar_contagem_status(), 'status', 'quantidade')
+    return px.pie(
+        values=status_counts['quantidade'],
+        names=status_counts['status'],
+        title="Distribuição por Status",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+@figura_em_cache
+def figura_valor_por_status_cotacao():
+    valor_por_status = limitar_categorias(carregar_valor_por_status_cotacao(), 'status_cotacao', 'valor_total')
+    return px.bar(
+        x=valor_por_status['status_cotacao'],
+        y=valor_por_status['valor_total'],
+        title="Valor Total por Status de Cotação",
+        labels={'y': 'Valor (R$)', 'x': 'Status da Cotação'}
+    )
+
+# None se não houver ordens com data de criação
+@figura_em_cache
+def figura_timeline():
+    timeline_data = reduzir_serie(carregar_ordens_por_mes(), 'mes_ano', 'quantidade')
+    if timeline_data.empty:
+        return None
+    fig_timeline = px.line(
+        timeline_data,
+        x='mes_ano',
+        y='quantidade',
+        title="Ordens Criadas por Mês",
+        markers=True
+    )
+    fig_timeline.update_xaxes(tickangle=45)
+    return fig_timeline
+
+# Função para exibir a página
+def exibir():
+    st.header("📊 Dashboard Executivo")
+    
+    totais = carregar_totais()
+    
+    if totais['total'] > 0:
+        status_counts = carregar_contagem_status().set_index('status')['quantidade']
+        
+        # Métricas principais
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Total de Ordens", totais['total'])
+        
+        with col2:
+            concluidas = int(status_counts.get('Concluído', 0))
+            st.metric("Concluídas", concluidas)
+        
+        with col3:
+            pendentes = int(status_counts.get('Pendente', 0))
+            st.metric("Pendentes", pendentes)
+        
+        with col4:
+            valor_total = totais['valor_total']
+            st.metric("Valor Total", f"R$ {valor_total:,.2f}")
+        
+        with col5:
+            ultima_atualizacao = totais['ultima_importacao'] or 'N/A'
+            st.metric("Última Atualização", str(ultima_atualizacao)[:10] if ultima_atualizacao != 'N/A' else 'N/A')
+        
+        # Gráficos
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("📊 Status das Ordens")
+            with medir('dashboard.status.figura', 'plotly'):
+                fig_pie = figura_status()
+            with medir('dashboard.status.envio', 'serializacao'):
+                st.plotly_chart(fig_pie, use_container_width=True)
+        
+        with col2:
+            st.subheader("💰 Valor por Status de Cotação")
+            with medir('dashboard.valor_status_cotacao.figura', 'plotly'):
+                fig_bar = figura_valor_por_status_cotacao()
+            with medir('dashboard.valor_status_cotacao.envio', 'serializacao'):
+                st.plotly_chart(fig_bar, use_container_width=True)
+        
+        # Timeline de criação
+        with medir('dashboard.timeline.figura', 'plotly'):
+            fig_timeline = figura_timeline()
+        if fig_timeline is not None:
+            st.subheader("📅 Timeline de Criação das Ordens")
+            
+            with medir('dashboard.timeline.envio', 'serializacao'):
+                st.plotly_chart(fig_timeline, use_container_width=True)
+        
+        # Top clientes/produtos
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("🏢 Top 10 Clientes")
+            top_clientes = carregar_mais_frequentes('nome_emissor_ordem')
+            with medir('dashboard.top_clientes.envio', 'serializacao'):
+                st.dataframe(top_clientes, use_container_width=True, hide_index=True)
+        
+        with col2:
+            st.subheader("📦 Top 10 Produtos")
+            top_produtos = carregar_mais_frequentes('denominacao_produto')
+            with medir('dashboard.top_produtos.envio', 'serializacao'):
+                st.dataframe(top_produtos, use_container_width=True, hide_index=True)
+    else:
+        st.info("📋 Nenhum dado encontrado. Faça a importação da planilha primeiro.")
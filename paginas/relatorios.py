@@ -0,0 +1,173 @@
+from datetime import date
+
+import plotly.express as px
+import streamlit as st
+
+from analise import executar_relatorio
+from desempenho import medir
+from graficos import agregar_por_periodo, escolher_granularidade, reduzir_serie
+from historico import listar_importacoes, mudancas_entre, resumo_mudancas, transicoes
+from paginas.comum import carregar_totais, conexao_leitura, consulta_em_cache, figura_em_cache
+
+# Página Relatórios: relatório por período, performance por status e mudanças
+# entre importações (o Plotly só é carregado com esta página e o Dashboard)
+
+# Linhas exibidas na tabela de mudanças entre importações
+LIMITE_MUDANCAS_EXIBIDAS = 5000
+
+# Período de cada ponto no título do gráfico de evolução
+ROTULOS_GRANULARIDADE = {'dia': 'por dia', 'semana': 'por semana', 'mes': 'por mês'}
+
+
+# Relatórios, calculados pelo motor de análise (analise.py: resumos do SQLite ou duckdb)
+@consulta_em_cache
+def carregar_periodo_disponivel():
+    with conexao_leitura() as conn:
+        return executar_relatorio(conn, 'periodo_disponivel')
+
+@consulta_em_cache
+def carregar_resumo_periodo(data_inicio, data_fim):
+    with conexao_leitura() as conn:
+        return executar_relatorio(conn, 'resumo_periodo', data_inicio, data_fim)
+
+@consulta_em_cache
+def carregar_evolucao_diaria(data_inicio, data_fim):
+    with conexao_leitura() as conn:
+        return executar_relatorio(conn, 'evolucao_diaria', data_inicio, data_fim)
+
+@consulta_em_cache
+def carregar_performance_por_status():
+    with conexao_leitura() as conn:
+        return executar_relatorio(conn, 'performance_por_status')
+
+# Gráfico de evolução: dias agrupados em semanas ou meses quando o período passaria do limite de pontos
+@figura_em_cache
+def figura_evolucao(data_inicio, data_fim):
+    granularidade = escolher_granularidade(data_inicio, data_fim)
+    df_evolucao = agregar_por_periodo(
+        carregar_evolucao_diaria(data_inicio, data_fim), 'criado_em', ['quantidade', 'valor_total'], granularidade
+    )
+    df_evolucao = reduzir_serie(df_evolucao, 'criado_em', 'quantidade')
+    return px.line(
+        df_evolucao,
+        x='criado_em',
+        y='quantidade',
+        title=f"Evolução de Ordens no Período ({ROTULOS_GRANULARIDADE[granularidade]})",
+        labels={'quantidade': 'Quantidade de Ordens', 'criado_em': 'Data'}
+    )
+
+# Histórico das importações (mudanças entre duas importações)
+@consulta_em_cache
+def carregar_importacoes():
+    with conexao_leitura() as conn:
+        return listar_importacoes(conn)
+
+@consulta_em_cache
+def carregar_mudancas(de, ate):
+    with conexao_leitura() as conn:
+        return mudancas_entre(conn, de, ate)
+
+# Função para exibir a página
+def exibir():
+    st.header("📈 Relatórios Gerenciais")
+    
+    totais = carregar_totais()
+    
+    if totais['total'] > 0:
+        # Relatório por período
+        st.subheader("📅 Relatório por Período")
+        
+        primeiro_dia, ultimo_dia = carregar_periodo_disponivel()
+        if primeiro_dia:
+            col1, col2 = st.columns(2)
+            with col1:
+                data_inicio = st.date_input("Data Início", value=date.fromisoformat(primeiro_dia))
+            with col2:
+                data_fim = st.date_input("Data Fim", value=date.fromisoformat(ultimo_dia))
+            
+            # Filtrar por período
+            resumo = carregar_resumo_periodo(data_inicio, data_fim)
+            
+            if resumo['quantidade'] > 0:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Ordens no Período", resumo['quantidade'])
+                with col2:
+                    valor_periodo = resumo['valor_total']
+                    st.metric("Valor Total", f"R$ {valor_periodo:,.2f}")
+                with col3:
+                    ticket_medio = resumo['ticket_medio']
+                    st.metric("Ticket Médio", f"R$ {ticket_medio:,.2f}")
+                
+                # Gráfico de evolução
+                with medir('relatorios.evolucao.figura', 'plotly'):
+                    fig_evolucao = figura_evolucao(data_inicio, data_fim)
+                with medir('relatorios.evolucao.envio', 'serializacao'):
+                    st.plotly_chart(fig_evolucao, use_container_width=True)
+        
+        # Relatório de performance
+        st.subheader("🎯 Performance por Status")
+        
+        performance = carregar_performance_por_status()
+        
+        with medir('relatorios.performance.envio', 'serializacao'):
+            st.dataframe(performance.round(2), use_container_width=True)
+    else:
+        st.info("📋 Nenhum dado para relatórios.")
+    
+    # Mudanças entre importações (histórico de versões)
+    st.subheader("🗓️ Mudanças entre Importações")
+    
+    importacoes = carregar_importacoes()
+    if importacoes.empty:
+        st.info("📋 O histórico começa na próxima importação.")
+    else:
+        # Importação 0: dados anteriores ao histórico
+        rotulos = {0: "0 - antes do histórico"}
+        for _, importacao in importacoes.iloc[::-1].iterrows():
+            rotulos[int(importacao['id'])] = (
+                f"{importacao['id']} - {importacao['realizada_em']} ({importacao['modo']}"
+                + (f": {importacao['origem']}" if importacao['origem'] else "") + ")"
+            )
+        numeros = list(rotulos)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            de = st.selectbox("De", numeros, index=len(numeros) - 2, format_func=rotulos.get)
+        with col2:
+            ate = st.selectbox("Até", numeros, index=len(numeros) - 1, format_func=rotulos.get)
+        
+        mudancas = carregar_mudancas(de, ate)
+        resumo_semana = resumo_mudancas(mudancas)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Novas", resumo_semana['nova'])
+        with col2:
+            st.metric("Alteradas", resumo_semana['alterada'])
+        with col3:
+            st.metric("Removidas", resumo_semana['removida'])
+        with col4:
+            st.metric("Variação do Valor", f"R$ {resumo_semana['variacao_valor']:,.2f}")
+        
+        if mudancas.empty:
+            st.info("Nenhuma mudança entre as importações selecionadas.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("**Transições de Status**")
+                st.dataframe(transicoes(mudancas, 'status'), use_container_width=True, hide_index=True)
+            with col2:
+                st.write("**Transições de Status Cotação**")
+                st.dataframe(transicoes(mudancas, 'status_cotacao'), use_container_width=True, hide_index=True)
+            
+            tipos = st.multiselect(
+                "Tipos de mudança", ['nova', 'alterada', 'removida'], default=['nova', 'alterada', 'removida']
+            )
+            selecionadas = mudancas[mudancas['tipo'].isin(tipos)]
+            if len(selecionadas) > LIMITE_MUDANCAS_EXIBIDAS:
+                st.caption(f"Exibindo {LIMITE_MUDANCAS_EXIBIDAS} de {len(selecionadas)} mudanças.")
+            with medir('relatorios.mudancas.envio', 'serializacao', linhas=len(selecionadas)):
+                st.dataframe(
+                    selecionadas.head(LIMITE_MUDANCAS_EXIBIDAS), use_container_width=True, hide_index=True
+                )
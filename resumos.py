@@ -0,0 +1,231 @@
+# Tabelas de resumo (rollups) mantidas a cada importação.
+# Os gráficos leem destas tabelas, cujo tamanho depende do número de
+# dias/grupos e não do número de ordens.
+
+# Estrutura de cada tabela de resumo
+TABELAS_RESUMO = {
+    'resumo_diario': '''
+        dia DATE,
+        status TEXT,
+        status_cotacao TEXT,
+        quantidade INTEGER NOT NULL,
+        quantidade_valor INTEGER NOT NULL,
+        valor_total REAL NOT NULL
+    ''',
+    'resumo_mensal': '''
+        mes TEXT,
+        status TEXT,
+        status_cotacao TEXT,
+        quantidade INTEGER NOT NULL,
+        quantidade_valor INTEGER NOT NULL,
+        valor_total REAL NOT NULL
+    ''',
+    'resumo_clientes': '''
+        nome_emissor_ordem TEXT,
+        quantidade INTEGER NOT NULL,
+        valor_total REAL NOT NULL
+    ''',
+    'resumo_produtos': '''
+        denominacao_produto TEXT,
+        quantidade INTEGER NOT NULL,
+        valor_total REAL NOT NULL
+    ''',
+    # Dicionário dos valores das colunas de filtro, com a quantidade de ordens de cada um
+    'resumo_valores': '''
+        coluna TEXT NOT NULL,
+        valor TEXT NOT NULL,
+        quantidade INTEGER NOT NULL
+    ''',
+}
+
+# Consulta que recalcula cada resumo (na ordem: o mensal e o dicionário de valores partem dos anteriores)
+CONSULTAS_RESUMO = {
+    'resumo_diario': '''
+        SELECT criado_em, status, status_cotacao,
+               COUNT(*), COUNT(valor_pedido_bruto), COALESCE(SUM(valor_pedido_bruto), 0)
+        FROM ordens_servico
+        GROUP BY criado_em, status, status_cotacao
+    ''',
+    'resumo_mensal': '''
+        SELECT substr(dia, 1, 7), status, status_cotacao,
+               SUM(quantidade), SUM(quantidade_valor), SUM(valor_total)
+        FROM resumo_diario
+        GROUP BY substr(dia, 1, 7), status, status_cotacao
+    ''',
+    'resumo_clientes': '''
+        SELECT nome_emissor_ordem, COUNT(*), COALESCE(SUM(valor_pedido_bruto), 0)
+        FROM ordens_servico
+        WHERE nome_emissor_ordem IS NOT NULL
+        GROUP BY nome_emissor_ordem
+    ''',
+    'resumo_produtos': '''
+        SELECT denominacao_produto, COUNT(*), COALESCE(SUM(valor_pedido_bruto), 0)
+        FROM ordens_servico
+        WHERE denominacao_produto IS NOT NULL
+        GROUP BY denominacao_produto
+    ''',
+    # Parte dos resumos já calculados: não percorre as ordens de novo
+    'resumo_valores': '''
+        SELECT 'status', status, SUM(quantidade)
+        FROM resumo_diario
+        WHERE status IS NOT NULL
+        GROUP BY status
+        UNION ALL
+        SELECT 'status_cotacao', status_cotacao, SUM(quantidade)
+        FROM resumo_diario
+        WHERE status_cotacao IS NOT NULL
+        GROUP BY status_cotacao
+        UNION ALL
+        SELECT 'denominacao_produto', denominacao_produto, quantidade
+        FROM resumo_produtos
+    ''',
+}
+
+# Resumos lidos direto das ordens: coluna do grupo no resumo -> coluna nas ordens, e as ordens
+# que entram no resumo. A importação os atualiza pela diferença entre as versões novas e as
+# antigas das ordens que mudaram (ver atualizar_resumos); os demais partem destes e são
+# recalculados, com custo pelo número de grupos
+GRUPOS_RESUMO = {
+    'resumo_diario': ({'dia': 'criado_em', 'status': 'status', 'status_cotacao': 'status_cotacao'}, '1'),
+    'resumo_clientes': ({'nome_emissor_ordem': 'nome_emissor_ordem'}, 'nome_emissor_ordem IS NOT NULL'),
+    'resumo_produtos': ({'denominacao_produto': 'denominacao_produto'}, 'denominacao_produto IS NOT NULL'),
+}
+
+# Variação de cada coluna somada dos resumos, pelo sinal da versão (+1 gravada, -1 encerrada)
+VARIACOES_RESUMO = {
+    'quantidade': 'SUM(sinal)',
+    'quantidade_valor': 'SUM(sinal * (valor_pedido_bruto IS NOT NULL))',
+    'valor_total': 'SUM(sinal * COALESCE(valor_pedido_bruto, 0))',
+}
+
+# Tolerância na verificação dos valores somados: atualizado pelas diferenças, o total soma as
+# mesmas parcelas em outra ordem e pode mudar no último dígito (diferença relativa)
+TOLERANCIA_VALOR = 1e-12
+
+INDICES_RESUMO = {
+    'idx_resumo_diario_dia': 'resumo_diario (dia)',
+    'idx_resumo_mensal_mes': 'resumo_mensal (mes)',
+    'idx_resumo_clientes_quantidade': 'resumo_clientes (quantidade DESC)',
+    'idx_resumo_produtos_quantidade': 'resumo_produtos (quantidade DESC)',
+    'idx_resumo_valores_coluna': 'resumo_valores (coluna, valor)',
+}
+
+
+# Função para criar as tabelas de resumo
+def criar_tabelas_resumo(conn):
+    criadas = False
+    for tabela, colunas in TABELAS_RESUMO.items():
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)
+        ).fetchone()
+        if not existe:
+            conn.execute(f"CREATE TABLE {tabela} ({colunas})")
+            criadas = True
+
+    for nome, definicao in INDICES_RESUMO.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao}")
+
+    # Bancos que já tinham ordens antes da existência dos resumos
+    if criadas:
+        reconstruir_resumos(conn)
+
+# Função para recalcular todos os resumos (na transação de quem chama)
+def reconstruir_resumos(conn):
+    for tabela, consulta in CONSULTAS_RESUMO.items():
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.execute(f"INSERT INTO {tabela} {consulta}")
+
+# Função para atualizar os resumos com as ordens que mudaram (na transação de quem chama)
+# origens: (tabela, condição, sinal) das versões gravadas (+1) e encerradas (-1) das ordens;
+# o custo acompanha o número de ordens que mudaram, não o total de ordens
+def atualizar_resumos(conn, origens, parametros=()):
+    colunas = ['valor_pedido_bruto'] + list(dict.fromkeys(
+        coluna for grupo, _ in GRUPOS_RESUMO.values() for coluna in grupo.values()
+    ))
+    conn.execute("DROP TABLE IF EXISTS temp.ordens_afetadas")
+    conn.execute(
+        "CREATE TEMP TABLE ordens_afetadas AS "
+        + ' UNION ALL '.join(
+            f"SELECT {sinal} AS sinal, {', '.join(colunas)} FROM {tabela} WHERE {condicao}"
+            for tabela, condicao, sinal in origens
+        ),
+        parametros
+    )
+    try:
+        for tabela, consulta in CONSULTAS_RESUMO.items():
+            if tabela not in GRUPOS_RESUMO:
+                conn.execute(f"DELETE FROM {tabela}")
+                conn.execute(f"INSERT INTO {tabela} {consulta}")
+                continue
+
+            grupo, filtro = GRUPOS_RESUMO[tabela]
+            somadas = [
+                linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})") if linha[1] in VARIACOES_RESUMO
+            ]
+            conn.execute("DROP TABLE IF EXISTS temp.variacao_resumo")
+            conn.execute(f'''
+                CREATE TEMP TABLE variacao_resumo AS
+                SELECT {', '.join(f'{coluna_ordens} AS {coluna}' for coluna, coluna_ordens in grupo.items())},
+                       {', '.join(f'{VARIACOES_RESUMO[coluna]} AS {coluna}' for coluna in somadas)}
+                FROM temp.ordens_afetadas
+                WHERE {filtro}
+                GROUP BY {', '.join(grupo.values())}
+            ''')
+
+            # Grupos que já existem recebem a variação; os novos são inseridos
+            mesmo_grupo = ' AND '.join(f'v.{coluna} IS {tabela}.{coluna}' for coluna in grupo)
+            conn.execute(f'''
+                UPDATE {tabela} SET {', '.join(f'{coluna} = {tabela}.{coluna} + v.{coluna}' for coluna in somadas)}
+                FROM temp.variacao_resumo v WHERE {mesmo_grupo}
+            ''')
+            conn.execute(f'''
+                INSERT INTO {tabela} ({', '.join(list(grupo) + somadas)})
+                SELECT {', '.join(f'v.{coluna}' for coluna in list(grupo) + somadas)} FROM temp.variacao_resumo v
+                WHERE NOT EXISTS (SELECT 1 FROM {tabela} WHERE {mesmo_grupo})
+            ''')
+            # Grupo sem nenhuma ordem sai do resumo, como no recálculo
+            conn.execute(f"DELETE FROM {tabela} WHERE quantidade = 0")
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.variacao_resumo")
+        conn.execute("DROP TABLE IF EXISTS temp.ordens_afetadas")
+
+# Função para esvaziar os resumos (na transação de quem chama)
+def limpar_resumos(conn):
+    for tabela in TABELAS_RESUMO:
+        conn.execute(f"DELETE FROM {tabela}")
+
+# Função para verificar se os resumos batem com as ordens e reconstruí-los se necessário
+def verificar_resumos(conn):
+    divergencias = {}
+    for tabela, consulta in CONSULTAS_RESUMO.items():
+        # O mensal e o dicionário são comparados com os resumos já reconstruídos, se for o caso
+        divergencias[tabela] = _linhas_divergentes(conn, tabela, consulta)
+        if divergencias[tabela]:
+            conn.execute(f"DELETE FROM {tabela}")
+            conn.execute(f"INSERT INTO {tabela} {consulta}")
+    conn.commit()
+    return divergencias
+
+# Conta as linhas do resumo sem par no recalculado e vice-versa (como um EXCEPT nos dois sentidos):
+# o par tem os mesmos grupos e contagens e valores somados iguais até TOLERANCIA_VALOR
+def _linhas_divergentes(conn, tabela, consulta):
+    colunas = conn.execute(f"PRAGMA table_info({tabela})").fetchall()
+    exatas = ', '.join(nome for _, nome, tipo, *_ in colunas if tipo != 'REAL')
+    somadas = [nome for _, nome, tipo, *_ in colunas if tipo == 'REAL']
+    extremos = ''.join(f", MIN({nome}) AS min_{nome}, MAX({nome}) AS max_{nome}" for nome in somadas)
+    diferentes = ' OR '.join(
+        f"max_{nome} - min_{nome} > {TOLERANCIA_VALOR} * max(abs(min_{nome}), abs(max_{nome}))" for nome in somadas
+    ) or '0'
+    # Lado 1: resumo gravado; lado 2: recalculado. Cada par ideal vira um grupo de duas linhas
+    return conn.execute(f'''
+        SELECT COALESCE(SUM(CASE WHEN linhas = 2 AND lados = 3 THEN 2 * ({diferentes}) ELSE linhas END), 0)
+        FROM (
+            SELECT COUNT(*) AS linhas, SUM(lado) AS lados{extremos}
+            FROM (
+                SELECT 1 AS lado, {', '.join(nome for _, nome, *_ in colunas)} FROM {tabela}
+                UNION ALL
+                SELECT 2, * FROM ({consulta})
+            )
+            GROUP BY {exatas}
+        )
+    ''').fetchone()[0]
@@ -0,0 +1,166 @@
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+from banco import CAMINHO_BANCO, conectar
+from manutencao import manter_banco
+from snapshot import gravar_snapshot
+from tarefas import (
+    atualizar_tarefa,
+    criar_tarefa,
+    finalizar_tarefa,
+    iniciar_tarefa,
+    obter_tarefa,
+    proxima_tarefa,
+    retomar_tarefas_interrompidas,
+)
+
+# Serviço de importação em segundo plano: as planilhas enviadas pela página
+# são salvas em disco e entram na fila de tarefas (tarefas.py); uma thread
+# do próprio processo as executa uma a uma, com conexões próprias ao banco.
+# A sessão do usuário só acompanha o progresso, então fechar ou recarregar
+# a página não interrompe a carga.
+
+# Pasta onde as planilhas aguardam a importação
+PASTA_IMPORTACOES = 'importacoes'
+
+# Tempo máximo (segundos) entre duas verificações da fila
+INTERVALO_FILA = 5
+
+_trava = threading.Lock()
+_aviso = threading.Event()
+_trabalhador = None
+_log = logging.getLogger(__name__)
+
+
+# Função para salvar a planilha enviada e colocá-la na fila de importação
+def enfileirar_importacao(conn, arquivo, nome_arquivo, modo, pasta=PASTA_IMPORTACOES):
+    os.makedirs(pasta, exist_ok=True)
+    # O nome original é mantido no final: ler_planilha usa a extensão
+    caminho = os.path.join(pasta, f"{uuid.uuid4().hex}_{os.path.basename(nome_arquivo)}")
+
+    arquivo.seek(0)
+    with open(caminho, 'wb') as destino:
+        shutil.copyfileobj(arquivo, destino)
+
+    try:
+        id_tarefa = criar_tarefa(conn, nome_arquivo, caminho, modo)
+    except Exception:
+        # Sem tarefa (por exemplo, banco travado pela gravação de outra importação), a cópia não serve
+        os.remove(caminho)
+        raise
+    _aviso.set()
+    return id_tarefa
+
+# Função para iniciar a thread do serviço (uma por processo)
+# ao_concluir() é chamada após cada tarefa, por exemplo para limpar caches
+def iniciar_servico(caminho_banco=CAMINHO_BANCO, ao_concluir=None):
+    global _trabalhador
+    with _trava:
+        if _trabalhador is not None and _trabalhador.is_alive():
+            return _trabalhador
+        _trabalhador = threading.Thread(
+            target=_executar_fila,
+            args=(caminho_banco, ao_concluir),
+            name='servico_importacao',
+            daemon=True,
+        )
+        _trabalhador.start()
+        return _trabalhador
+
+# Laço do serviço: executa as tarefas pendentes e espera por novas
+# Um erro fora de executar_tarefa (banco travado ao consultar a fila, falha em ao_concluir...)
+# não encerra a thread: é registrado no log, a tarefa em execução fica com erro e o laço continua
+def _executar_fila(caminho_banco, ao_concluir):
+    # Conexão da carga e conexão das tarefas: o progresso é gravado fora da transação da carga
+    conn = conectar(caminho_banco)
+    conn_tarefas = conectar(caminho_banco)
+    retomar_tarefas_interrompidas(conn_tarefas)
+
+    while True:
+        tarefa = None
+        try:
+            tarefa = proxima_tarefa(conn_tarefas)
+            if tarefa is None:
+                _aviso.wait(INTERVALO_FILA)
+                _aviso.clear()
+                continue
+
+            executar_tarefa(conn, conn_tarefas, tarefa)
+            if ao_concluir:
+                ao_concluir()
+        except Exception as e:
+            _log.exception("Erro no serviço de importação")
+            _registrar_falha(conn, conn_tarefas, tarefa, e)
+            # Espera antes de tentar de novo (com o banco travado, o erro se repetiria em seguida)
+            _aviso.wait(INTERVALO_FILA)
+
+# Função para desfazer a transação interrompida e marcar com erro a tarefa que ficou em execução
+def _registrar_falha(conn, conn_tarefas, tarefa, erro):
+    try:
+        for conexao in (conn, conn_tarefas):
+            if conexao.in_transaction:
+                conexao.rollback()
+        # Uma tarefa já finalizada (erro em ao_concluir) ou ainda pendente (não assumida) fica como está
+        if tarefa is not None and obter_tarefa(conn_tarefas, tarefa['id'])['situacao'] == 'executando':
+            finalizar_tarefa(conn_tarefas, tarefa['id'], 'erro', f"Erro no serviço de importação: {erro}")
+    except Exception:
+        _log.exception("Não foi possível registrar a falha da tarefa de importação")
+
+# Função para executar uma tarefa de importação e registrar o resultado
+def executar_tarefa(conn, conn_tarefas, tarefa):
+    # Importado só quando há planilha na fila: o painel parte sem carregar o openpyxl
+    from importacao import inserir_blocos, ler_planilha
+
+    id_tarefa = tarefa['id']
+    if not iniciar_tarefa(conn_tarefas, id_tarefa):
+        # Outra execução já assumiu a tarefa
+        return
+
+    try:
+        colunas_encontradas, cabecalho, total_linhas, blocos = ler_planilha(tarefa['caminho_arquivo'])
+        atualizar_tarefa(conn_tarefas, id_tarefa, total=total_linhas)
+
+        # O total só é conhecido antes da leitura quando a planilha informa suas dimensões
+        def atualizar_progresso(processados, total):
+            atualizar_tarefa(conn_tarefas, id_tarefa, processados=processados, total=total_linhas)
+
+        def iniciar_gravacao(processados):
+            atualizar_tarefa(
+                conn_tarefas, id_tarefa, processados=processados, total=processados,
+                mensagem=f"Gravando {processados} registros no banco..."
+            )
+
+        resumo, erros = inserir_blocos(
+            conn, blocos, colunas_encontradas,
+            modo=tarefa['modo'],
+            progresso=atualizar_progresso,
+            total_linhas=total_linhas,
+            ao_aplicar=iniciar_gravacao,
+            nome_carga=tarefa['nome_arquivo']
+        )
+        finalizar_tarefa(conn_tarefas, id_tarefa, 'concluida', (
+            f"Importação concluída! {resumo['inseridos']} inseridos, {resumo['atualizados']} atualizados, "
+            f"{resumo['inalterados']} inalterados, {resumo['removidos']} removidos. Erros: {len(erros)}"
+        ), resumo, erros)
+    except Exception as e:
+        finalizar_tarefa(conn_tarefas, id_tarefa, 'erro', f"Erro ao processar arquivo: {str(e)}")
+        return
+    finally:
+        if os.path.exists(tarefa['caminho_arquivo']):
+            os.remove(tarefa['caminho_arquivo'])
+
+    # Os dados já estão no banco; o snapshot só acelera a próxima partida do painel
+    # (se falhar, o painel carrega do banco e grava um novo)
+    try:
+        gravar_snapshot(conn)
+    except Exception:
+        pass
+
+    # Estatísticas do planejador e vacuum incremental (registrados em manutencao_banco)
+    try:
+        manter_banco(conn)
+    except Exception:
+        pass
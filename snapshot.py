@@ -0,0 +1,88 @@
+import os
+import threading
+
+from banco import versao_dados
+from compactacao import carregar_ordens_compactas
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = ipc = None
+
+# Snapshot colunar (Arrow IPC) das ordens, gravado ao lado do banco após cada
+# importação e marcado com a versão dos dados. Na partida, o DataFrame compacto
+# é lido do arquivo mapeado em memória, sem converter linha a linha do SQLite;
+# se o snapshot não existir ou for de outra versão, a carga volta ao banco.
+
+# Chave da versão dos dados nos metadados do arquivo
+CHAVE_VERSAO = b'versao_dados'
+
+
+# Função para obter o caminho do snapshot do banco aberto na conexão
+def caminho_snapshot(conn):
+    caminho_banco = conn.execute("PRAGMA database_list").fetchone()[2]
+    if not caminho_banco:
+        # Banco em memória: sem snapshot
+        return None
+    return f"{os.path.splitext(caminho_banco)[0]}.arrow"
+
+# Função para gravar o snapshot das ordens com a versão atual dos dados
+def gravar_snapshot(conn):
+    # A versão é lida antes das ordens: se uma importação terminar no meio da leitura,
+    # o snapshot sai com a versão anterior e é tratado como desatualizado
+    versao = versao_dados(conn)
+    df = carregar_ordens_compactas(conn)
+    salvar_snapshot(conn, df, versao)
+    return df
+
+# Função para salvar um DataFrame de ordens como snapshot de uma versão
+def salvar_snapshot(conn, df, versao):
+    caminho = caminho_snapshot(conn)
+    if pa is None or caminho is None:
+        return None
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        CHAVE_VERSAO: str(versao).encode(),
+    })
+
+    # Grava em um arquivo temporário e troca de uma vez: quem já mapeou o anterior continua lendo
+    # (o nome inclui processo e thread: o serviço e o painel podem gravar ao mesmo tempo)
+    temporario = f"{caminho}.{os.getpid()}_{threading.get_ident()}.parcial"
+    with pa.OSFile(temporario, 'wb') as arquivo:
+        with ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(temporario, caminho)
+    return caminho
+
+# Função para ler o snapshot como tabela Arrow mapeada em memória, sem copiar os dados
+# (None se não existir ou estiver desatualizado)
+def ler_tabela_snapshot(conn):
+    caminho = caminho_snapshot(conn)
+    if pa is None or caminho is None or not os.path.exists(caminho):
+        return None
+
+    try:
+        leitor = ipc.open_file(pa.memory_map(caminho))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    versao = (leitor.schema.metadata or {}).get(CHAVE_VERSAO)
+    if versao is None or int(versao) != versao_dados(conn):
+        return None
+    return leitor.read_all()
+
+# Função para carregar o DataFrame do snapshot (None se não existir ou estiver desatualizado)
+def carregar_snapshot(conn):
+    tabela = ler_tabela_snapshot(conn)
+    if tabela is None:
+        return None
+    return tabela.to_pandas()
+
+# Função para carregar as ordens pelo snapshot ou, se desatualizado, pelo banco (regravando o snapshot)
+def carregar_ordens(conn):
+    df = carregar_snapshot(conn)
+    if df is None:
+        df = gravar_snapshot(conn)
+    return df
@@ -0,0 +1,125 @@
+import pandas as pd
+
+# Tarefas de importação executadas em segundo plano (ver servico_importacao.py).
+# Cada tarefa guarda a situação, o progresso, as contagens e os erros da carga,
+# para que a página acompanhe a importação mesmo depois de recarregada.
+
+# Situações de uma tarefa
+# pendente: na fila, aguardando o serviço
+# executando: planilha sendo lida e aplicada ao banco
+# concluida / erro: finalizada
+SITUACOES_FINAIS = ('concluida', 'erro')
+
+
+# Função para criar a tabela de tarefas
+def criar_tabela_tarefas(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_importacao (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_arquivo TEXT,
+            caminho_arquivo TEXT,
+            modo TEXT,
+            situacao TEXT NOT NULL DEFAULT 'pendente',
+            processados INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            inseridos INTEGER,
+            atualizados INTEGER,
+            inalterados INTEGER,
+            removidos INTEGER,
+            erros TEXT,
+            mensagem TEXT,
+            criada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            iniciada_em DATETIME,
+            concluida_em DATETIME
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_situacao ON tarefas_importacao (situacao, id)")
+
+# Função para registrar uma nova tarefa na fila
+def criar_tarefa(conn, nome_arquivo, caminho_arquivo, modo):
+    id_tarefa = conn.execute('''
+        INSERT INTO tarefas_importacao (nome_arquivo, caminho_arquivo, modo)
+        VALUES (?, ?, ?)
+    ''', (nome_arquivo, caminho_arquivo, modo)).lastrowid
+    conn.commit()
+    return id_tarefa
+
+# Função para atualizar campos de uma tarefa
+def atualizar_tarefa(conn, id_tarefa, **campos):
+    atribuicoes = ', '.join(f'{campo} = ?' for campo in campos)
+    conn.execute(
+        f"UPDATE tarefas_importacao SET {atribuicoes} WHERE id = ?",
+        list(campos.values()) + [id_tarefa]
+    )
+    conn.commit()
+
+# Função para assumir uma tarefa pendente (False se ela já foi assumida)
+def iniciar_tarefa(conn, id_tarefa):
+    assumida = conn.execute('''
+        UPDATE tarefas_importacao
+        SET situacao = 'executando', processados = 0, mensagem = NULL, iniciada_em = CURRENT_TIMESTAMP
+        WHERE id = ? AND situacao = 'pendente'
+    ''', (id_tarefa,)).rowcount
+    conn.commit()
+    return assumida == 1
+
+# Função para finalizar a tarefa (situacao: 'concluida' ou 'erro')
+def finalizar_tarefa(conn, id_tarefa, situacao, mensagem, resumo=None, erros=None):
+    resumo = resumo or {}
+    conn.execute('''
+        UPDATE tarefas_importacao
+        SET situacao = ?, mensagem = ?, inseridos = ?, atualizados = ?, inalterados = ?,
+            removidos = ?, erros = ?, concluida_em = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (
+        situacao, mensagem,
+        resumo.get('inseridos'), resumo.get('atualizados'),
+        resumo.get('inalterados'), resumo.get('removidos'),
+        '\n'.join(erros) if erros else None,
+        id_tarefa,
+    ))
+    conn.commit()
+
+# Função para obter uma tarefa como dicionário (None se não existir)
+def obter_tarefa(conn, id_tarefa):
+    cursor = conn.execute("SELECT * FROM tarefas_importacao WHERE id = ?", (id_tarefa,))
+    linha = cursor.fetchone()
+    if linha is None:
+        return None
+    return dict(zip([coluna[0] for coluna in cursor.description], linha))
+
+# Função para obter a próxima tarefa da fila (a mais antiga pendente)
+def proxima_tarefa(conn):
+    linha = conn.execute(
+        "SELECT id FROM tarefas_importacao WHERE situacao = 'pendente' ORDER BY id LIMIT 1"
+    ).fetchone()
+    return obter_tarefa(conn, linha[0]) if linha else None
+
+# Função para devolver à fila as tarefas interrompidas (processo encerrado no meio da carga)
+# A carga só é aplicada no commit final, então nada delas chegou ao banco.
+def retomar_tarefas_interrompidas(conn):
+    retomadas = conn.execute('''
+        UPDATE tarefas_importacao SET situacao = 'pendente', processados = 0, mensagem = NULL
+        WHERE situacao = 'executando'
+    ''').rowcount
+    conn.commit()
+    return retomadas
+
+# Função para obter a tarefa ainda não finalizada mais recente (None se não houver)
+def tarefa_em_andamento(conn):
+    linha = conn.execute('''
+        SELECT id FROM tarefas_importacao
+        WHERE situacao IN ('pendente', 'executando')
+        ORDER BY id DESC LIMIT 1
+    ''').fetchone()
+    return linha[0] if linha else None
+
+# Função para listar as últimas tarefas
+def tarefas_recentes(conn, limite=10):
+    return pd.read_sql_query('''
+        SELECT id, nome_arquivo, modo, situacao, processados, total,
+               inseridos, atualizados, inalterados, removidos, criada_em, concluida_em
+        FROM tarefas_importacao
+        ORDER BY id DESC
+        LIMIT ?
+    ''', conn, params=(limite,))
@@ -0,0 +1,103 @@
+import pytest
+
+pytest.importorskip('duckdb')
+pytest.importorskip('pyarrow')
+
+import analise
+from analise import SNAPSHOT_INDISPONIVEL, comparar_motores
+from banco import conectar, conectar_leitura
+from benchmark import gerar_dataframe
+from importacao import inserir_dataframe, mapear_colunas
+from snapshot import gravar_snapshot
+
+# Paridade dos relatórios gerenciais entre o SQLite (tabelas de resumo) e o
+# duckdb (snapshot Arrow), sobre uma planilha sintética com células sujas.
+
+
+@pytest.fixture
+def caminho_banco(tmp_path):
+    caminho = str(tmp_path / 'painel.db')
+    conectar(caminho).close()
+    return caminho
+
+def _importar(caminho_banco, df, modo='sincronizar'):
+    conn = conectar(caminho_banco)
+    try:
+        inserir_dataframe(conn, df, mapear_colunas(df.columns), modo=modo)
+    finally:
+        conn.close()
+
+def _comparar(caminho_banco):
+    conn = conectar_leitura(caminho_banco)
+    try:
+        return comparar_motores(conn)
+    finally:
+        conn.close()
+
+def test_motores_iguais(caminho_banco):
+    _importar(caminho_banco, gerar_dataframe(3000))
+    # Segunda carga no modo "adicionar": atualiza parte das ordens e insere outras
+    _importar(caminho_banco, gerar_dataframe(4000, semente=1), modo='adicionar')
+
+    diferencas = _comparar(caminho_banco)
+    assert set(diferencas) == set(analise.RELATORIOS)
+    assert diferencas == {relatorio: None for relatorio in diferencas}
+
+def test_motores_sem_ordens(caminho_banco):
+    assert _comparar(caminho_banco) == {'periodo_disponivel': None, 'performance_por_status': None}
+
+def test_divergencia_detectada(caminho_banco):
+    _importar(caminho_banco, gerar_dataframe(2000))
+    conn = conectar(caminho_banco)
+    try:
+        # Resumo alterado à mão: o SQLite passa a divergir do snapshot
+        conn.execute('''
+            UPDATE resumo_diario SET quantidade = quantidade + 1
+            WHERE rowid = (SELECT MIN(rowid) FROM resumo_diario WHERE dia IS NOT NULL)
+        ''')
+        conn.commit()
+    finally:
+        conn.close()
+
+    diferencas = _comparar(caminho_banco)
+    assert diferencas['resumo_periodo'] is not None
+    assert diferencas['evolucao_diaria'] is not None
+
+def test_divergencia_de_um_centavo_detectada(caminho_banco):
+    _importar(caminho_banco, gerar_dataframe(2000))
+    conn = conectar(caminho_banco)
+    try:
+        conn.execute('''
+            UPDATE resumo_diario SET valor_total = valor_total + 0.01
+            WHERE rowid = (
+                SELECT MIN(rowid) FROM resumo_diario
+                WHERE status IS NOT NULL AND status_cotacao IS NOT NULL AND quantidade_valor > 0
+            )
+        ''')
+        conn.commit()
+    finally:
+        conn.close()
+
+    diferencas = _comparar(caminho_banco)
+    assert diferencas['performance_por_status'] is not None
+
+def test_snapshot_indisponivel(caminho_banco, monkeypatch):
+    _importar(caminho_banco, gerar_dataframe(500))
+
+    def falhar(conn):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(analise, 'gravar_snapshot', falhar)
+    assert _comparar(caminho_banco) == SNAPSHOT_INDISPONIVEL
+
+    # Snapshot gravado, mas de outra versão dos dados (uma importação terminou no meio)
+    monkeypatch.setattr(analise, 'gravar_snapshot', lambda conn: None)
+    assert _comparar(caminho_banco) == SNAPSHOT_INDISPONIVEL
+
+def test_snapshot_ja_gravado(caminho_banco):
+    _importar(caminho_banco, gerar_dataframe(500))
+    conn = conectar(caminho_banco)
+    try:
+        gravar_snapshot(conn)
+    finally:
+        conn.close()
+    assert all(diferenca is None for diferenca in _comparar(caminho_banco).values())
@@ -0,0 +1,35 @@
+from cache_consultas import CacheConsultas, em_cache
+
+
+# Cria uma função `carregar` como se tivesse sido definida no módulo informado
+def _funcao_do_modulo(modulo, resultado):
+    def carregar(filtro):
+        return (resultado, filtro)
+    carregar.__module__ = modulo
+    return carregar
+
+def test_funcoes_de_mesmo_nome_em_modulos_diferentes():
+    cache = CacheConsultas()
+    guardar = em_cache(lambda: cache, lambda: 1)
+    dashboard = guardar(_funcao_do_modulo('paginas.dashboard', 'dashboard'))
+    relatorios = guardar(_funcao_do_modulo('paginas.relatorios', 'relatorios'))
+
+    assert dashboard('x') == ('dashboard', 'x')
+    assert relatorios('x') == ('relatorios', 'x')
+    assert dashboard('x') == ('dashboard', 'x')
+
+def test_nova_geracao_recalcula():
+    cache = CacheConsultas()
+    geracao = [1]
+    chamadas = []
+
+    @em_cache(lambda: cache, lambda: geracao[0])
+    def consultar(valor):
+        chamadas.append(valor)
+        return valor * 2
+
+    assert consultar(3) == 6
+    assert consultar(3) == 6
+    geracao[0] = 2
+    assert consultar(3) == 6
+    assert chamadas == [3, 3]
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from compactacao import ESQUEMA_ORDENS, carregar_ordens_compactas
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE ordens_servico ({', '.join(ESQUEMA_ORDENS)})")
+    yield conn
+    conn.close()
+
+def _inserir(conn, linhas):
+    for linha in linhas:
+        colunas = ', '.join(linha)
+        conn.execute(
+            f"INSERT INTO ordens_servico ({colunas}) VALUES ({', '.join('?' for _ in linha)})",
+            list(linha.values())
+        )
+
+def test_bloco_com_categoria_toda_nula(conn):
+    # As linhas mais recentes (primeiro bloco) vieram de uma planilha sem "Tempo de Contrato"
+    _inserir(conn, [
+        {'id': 1, 'tempo_contrato': '24'},
+        {'id': 2, 'tempo_contrato': '12'},
+        {'id': 3, 'tempo_contrato': None},
+        {'id': 4, 'tempo_contrato': None},
+    ])
+    df = carregar_ordens_compactas(conn, tamanho_bloco=2)
+
+    assert isinstance(df['tempo_contrato'].dtype, pd.CategoricalDtype)
+    assert df['id'].tolist() == [4, 3, 2, 1]
+    assert df['tempo_contrato'].isna().tolist() == [True, True, False, False]
+    assert df['tempo_contrato'].iloc[2:].tolist() == ['12', '24']
+    assert sorted(df['tempo_contrato'].cat.categories) == ['12', '24']
+
+def test_categorias_de_blocos_diferentes_sao_unidas(conn):
+    _inserir(conn, [
+        {'id': 1, 'status': 'Aberto', 'item_sd': 10},
+        {'id': 2, 'status': 'Concluído', 'item_sd': '20'},
+        {'id': 3, 'status': 'Aberto', 'item_sd': None},
+    ])
+    df = carregar_ordens_compactas(conn, tamanho_bloco=1)
+
+    assert isinstance(df['status'].dtype, pd.CategoricalDtype)
+    assert df['status'].tolist() == ['Aberto', 'Concluído', 'Aberto']
+    assert df['item_sd'].iloc[1:].tolist() == ['20', '10']
+
+def test_sem_ordens(conn):
+    df = carregar_ordens_compactas(conn)
+    assert df.empty
+    assert list(df.columns) == list(ESQUEMA_ORDENS)
@@ -0,0 +1,51 @@
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+from banco import conectar
+from paginas import configuracoes
+
+# Limpeza dos dados pela página Configurações: tudo em uma transação.
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    conn = conectar(str(tmp_path / 'ordens.db'))
+    conn.executemany(
+        "INSERT INTO ordens_servico (numero_cotacao, item_sd, nome_emissor_ordem) VALUES (?, ?, ?)",
+        [('1', '10', 'Cliente A'), ('2', '10', 'Cliente B')]
+    )
+    conn.commit()
+
+    @contextmanager
+    def conexao_escrita():
+        yield conn
+
+    monkeypatch.setattr(configuracoes, 'conexao_escrita', conexao_escrita)
+    yield conn
+    conn.close()
+
+def _gatilhos(conn):
+    return conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'ordens_busca_%'").fetchone()[0]
+
+def test_limpeza_apaga_as_ordens(conn):
+    configuracoes.limpar_dados_antigos()
+
+    assert conn.execute("SELECT COUNT(*) FROM ordens_servico").fetchone()[0] == 0
+    assert _gatilhos(conn) == 3
+
+def test_falha_na_limpeza_mantem_ordens_e_gatilhos_da_busca(conn, monkeypatch):
+    def falhar(conn):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(configuracoes, 'limpar_resumos', falhar)
+    with pytest.raises(sqlite3.OperationalError):
+        configuracoes.limpar_dados_antigos()
+
+    assert conn.execute("SELECT COUNT(*) FROM ordens_servico").fetchone()[0] == 2
+    assert _gatilhos(conn) == 3
+    # O índice de busca continua acompanhando as ordens
+    conn.execute("INSERT INTO ordens_servico (numero_cotacao, item_sd, nome_emissor_ordem) VALUES ('3', '10', 'Zebra')")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM ordens_busca WHERE ordens_busca MATCH 'zebra'").fetchone()[0] == 1
@@ -0,0 +1,125 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from banco import COLUNAS_CONTROLE, conectar
+from consultas import colunas_exportacao
+from importacao import inserir_blocos, ler_planilha
+from resumos import TABELAS_RESUMO, reconstruir_resumos, verificar_resumos
+
+# Chaves gravadas pelos dois caminhos de leitura da planilha: o .xlsx em blocos
+# (openpyxl) e o pandas (usado no .xls, e aqui num arquivo sem extensão .xlsx).
+# Uma célula vazia faz o pandas ler a coluna numérica como float.
+
+LINHAS = [
+    [12345, 10, 1],
+    [777, 20, 2],
+    [888, None, 3],
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = conectar(str(tmp_path / 'ordens.db'))
+    yield conn
+    conn.close()
+
+def _planilha(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Número da Cotação', 'Item (SD)', 'Quantidade'])
+    for linha in LINHAS:
+        ws.append(linha)
+    caminho = tmp_path / 'CARGA_PAINEL.xlsx'
+    wb.save(caminho)
+    return caminho
+
+def _importar(conn, arquivo, modo='sincronizar'):
+    colunas_encontradas, _, _, blocos = ler_planilha(arquivo)
+    resumo, erros = inserir_blocos(conn, blocos, colunas_encontradas, modo=modo)
+    assert erros == []
+    return resumo
+
+def _chaves(conn):
+    return conn.execute("SELECT numero_cotacao, item_sd FROM ordens_servico ORDER BY numero_cotacao").fetchall()
+
+def test_chave_com_celula_vazia_igual_nos_dois_caminhos(conn, tmp_path):
+    caminho = _planilha(tmp_path)
+
+    _importar(conn, caminho)
+    chaves_blocos = _chaves(conn)
+    # Mesma planilha pelo pandas: as ordens com chave completa são reconhecidas e ficam inalteradas
+    # (a de chave incompleta nunca casa com a anterior e é trocada, como em qualquer importação)
+    resumo = _importar(conn, io.BytesIO(caminho.read_bytes()))
+
+    assert chaves_blocos == [('12345', '10'), ('777', '20'), ('888', None)]
+    assert _chaves(conn) == chaves_blocos
+    assert resumo == {'inseridos': 1, 'atualizados': 0, 'inalterados': 2, 'removidos': 1}
+
+def test_migracao_das_chaves_com_decimal(conn, tmp_path):
+    caminho_banco = str(tmp_path / 'ordens.db')
+    conn.executemany(
+        "INSERT INTO ordens_servico (id, numero_cotacao, item_sd, quantidade) VALUES (?, ?, ?, ?)",
+        [
+            (1, '12345.0', '10.0', 1),   # gravada pelo pandas antes da correção
+            (2, '777', '20.0', 2),
+            (3, '500.0', '1.0', 3),      # duplicada pela ordem 4, gravada depois pela leitura em blocos
+            (4, '500', '1', 4),
+            (5, '-3.0', None, 5),
+            (6, 'abc.0', '1.05', 6),     # não são números inteiros: ficam como estão
+        ]
+    )
+    conn.execute(
+        "INSERT INTO historico_ordens (valido_de, valido_ate, id, numero_cotacao, item_sd) VALUES (1, 2, 1, '12345.0', '10.0')"
+    )
+    reconstruir_resumos(conn)
+    # Banco de uma versão anterior: a migração ainda não foi feita
+    conn.execute("DELETE FROM controle WHERE chave = 'chaves_sem_decimal'")
+    conn.commit()
+
+    migrado = conectar(caminho_banco)
+    try:
+        assert migrado.execute("SELECT id, numero_cotacao, item_sd FROM ordens_servico ORDER BY id").fetchall() == [
+            (1, '12345', '10'),
+            (2, '777', '20'),
+            (4, '500', '1'),
+            (5, '-3', None),
+            (6, 'abc.0', '1.05'),
+        ]
+        assert migrado.execute("SELECT id FROM ordens_chave_duplicada").fetchall() == [(3,)]
+        assert migrado.execute("SELECT numero_cotacao, item_sd FROM historico_ordens").fetchall() == [('12345', '10')]
+        # Os resumos deixam de contar a ordem removida
+        assert verificar_resumos(migrado) == {tabela: 0 for tabela in TABELAS_RESUMO}
+
+        # Só uma vez: chaves gravadas depois da migração não são alteradas
+        migrado.execute("UPDATE ordens_servico SET numero_cotacao = '9.0' WHERE id = 6")
+        migrado.commit()
+        conectar(caminho_banco).close()
+        assert migrado.execute("SELECT numero_cotacao FROM ordens_servico WHERE id = 6").fetchone() == ('9.0',)
+    finally:
+        migrado.close()
+
+def test_importacao_reconhece_chaves_migradas(conn, tmp_path):
+    caminho_banco = str(tmp_path / 'ordens.db')
+    conn.executemany(
+        "INSERT INTO ordens_servico (numero_cotacao, item_sd, quantidade) VALUES (?, ?, ?)",
+        [('12345.0', '10.0', 1), ('777.0', '20.0', 2)]
+    )
+    conn.execute("DELETE FROM controle WHERE chave = 'chaves_sem_decimal'")
+    conn.commit()
+    conectar(caminho_banco).close()
+
+    resumo = _importar(conn, _planilha(tmp_path))
+
+    # As duas ordens antigas são atualizadas (não removidas e inseridas de novo)
+    assert resumo == {'inseridos': 1, 'atualizados': 2, 'inalterados': 0, 'removidos': 0}
+    assert _chaves(conn) == [('12345', '10'), ('777', '20'), ('888', None)]
+
+def test_exportacao_sem_colunas_de_controle(conn, tmp_path):
+    _importar(conn, _planilha(tmp_path))
+
+    colunas = [nome for nome, _ in colunas_exportacao(conn)]
+
+    assert not set(COLUNAS_CONTROLE) & set(colunas)
+    assert {'numero_cotacao', 'item_sd', 'quantidade'} <= set(colunas)
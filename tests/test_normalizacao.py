@@ -0,0 +1,125 @@
+import math
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from normalizacao import (
+    converter_data,
+    converter_quantidade,
+    converter_texto,
+    converter_valor,
+    mapear_status,
+    normalizar_datas,
+    normalizar_datas_iso,
+    normalizar_quantidade,
+    normalizar_status,
+    normalizar_texto,
+    normalizar_valor,
+)
+
+# Paridade da normalização por coluna com as funções escalares: para cada
+# coluna (só texto, tipos misturados, numérica...), o resultado de
+# normalizar_* tem de ser o mesmo de aplicar a função escalar valor a valor.
+
+DATAS_TEXTO = [
+    '01.02.2023 10:20:30', '1/2/2023', '2023-01-05', '05.01.2023', '', ' 01/02/2023', '31/02/2023',
+    'lixo', '2023-01-05T10:00', '01/01/1500', '01.01.2300 00:00:00', None, np.nan, '01/02/23',
+]
+DATAS_MISTAS = DATAS_TEXTO + [
+    45000, 45000.75, 0, -5.5, True, datetime(2023, 4, 5, 6), date(2021, 1, 2),
+    pd.Timestamp('2020-02-02'), 10 ** 7, float('inf'), pd.NaT,
+]
+STATUS = ['Concluído', ' concluido ', 'FINALIZADO', '', '  ', None, np.nan, 'liberada', 'Em andamento', 'xyz', 'Processando']
+NUMEROS = [
+    '5', ' 7 ', '5.0', '-3', '+4', 'abc', '', None, np.nan, '1e3', '12.5', ' -0.5 ', 'inf', '1,5',
+    'nan', 'NaN', ' nan ', '-inf', '٣', '١٢', '１２', '1_000', '0x10',
+]
+TEXTOS = [' a ', 'b', '', '  ', None, np.nan, 'Órgão  ']
+
+COLUNAS_DATA = [
+    pd.Series(DATAS_TEXTO),
+    pd.Series(DATAS_MISTAS, dtype=object),
+    pd.Series([45000, 1, 60, 61, 2958465, np.nan, -10.25]),
+    pd.Series([45000, 1, 60]),
+    pd.to_datetime(pd.Series(['2023-01-02 10:00', None])),
+    pd.Series(np.random.default_rng(0).choice(['01/02/2023', '2023-12-31', '5.6.2021'], 5000)),
+    # Valores iguais para o factorize, de tipos que o escalar converte de formas diferentes
+    pd.Series([1, True, 1.0, Decimal('1'), np.int64(1), np.float32(1), '01/02/2023'], dtype=object),
+    pd.Series([Decimal('1'), np.int64(1), 1, True, None], dtype=object),
+]
+COLUNAS_STATUS = [
+    pd.Series(STATUS),
+    pd.Series(STATUS + [1, 1.0, True, 0], dtype=object),
+    pd.Series([1.0, np.nan, 2.5]),
+    pd.Series([1, 2]),
+]
+COLUNAS_NUMERO = [
+    pd.Series(NUMEROS),
+    pd.Series(NUMEROS + [5, 5.7, -5.7, True, float('inf'), np.nan], dtype=object),
+    pd.Series([1.9, -1.9, np.nan, np.inf]),
+    pd.Series([3, 4]),
+    pd.Series([True, False]),
+    pd.Series(['', 'nan', '٣'] * 1000),
+]
+COLUNAS_TEXTO = [
+    pd.Series(TEXTOS),
+    pd.Series(TEXTOS + [0, 12, 12.0, 0.0, False, True, pd.Timestamp('2020-01-01')], dtype=object),
+    pd.Series([0, 12345, -1]),
+    pd.Series([0.0, 1.5, np.nan, 12345.0]),
+    pd.Series([True, False]),
+]
+
+
+def _data_iso(valor):
+    data = converter_data(valor)
+    return data.isoformat() if data is not None else None
+
+def _iguais(esperado, obtido):
+    if isinstance(esperado, float) and isinstance(obtido, float) and math.isnan(esperado):
+        return math.isnan(obtido)
+    if isinstance(esperado, (int, float)) and isinstance(obtido, (int, float, np.integer, np.floating)):
+        return esperado == obtido
+    return type(esperado) == type(obtido) and esperado == obtido
+
+def _diferencas(serie, escalar, vetorizada):
+    esperado = [escalar(valor) for valor in serie.tolist()]
+    obtido = vetorizada(serie).tolist()
+    assert len(obtido) == len(esperado)
+    return [
+        (valor, e, o) for valor, e, o in zip(serie.tolist(), esperado, obtido)
+        if not _iguais(e, o)
+    ]
+
+
+@pytest.mark.parametrize('serie', COLUNAS_DATA)
+@pytest.mark.parametrize('escalar, vetorizada', [
+    (converter_data, normalizar_datas),
+    (_data_iso, normalizar_datas_iso),
+])
+def test_datas(serie, escalar, vetorizada):
+    assert _diferencas(serie, escalar, vetorizada) == []
+
+@pytest.mark.parametrize('serie', COLUNAS_STATUS)
+def test_status(serie):
+    assert _diferencas(serie, mapear_status, normalizar_status) == []
+
+@pytest.mark.parametrize('serie', COLUNAS_NUMERO)
+@pytest.mark.parametrize('escalar, vetorizada', [
+    (converter_quantidade, normalizar_quantidade),
+    (converter_valor, normalizar_valor),
+])
+def test_numeros(serie, escalar, vetorizada):
+    assert _diferencas(serie, escalar, vetorizada) == []
+
+@pytest.mark.parametrize('serie', COLUNAS_TEXTO)
+def test_texto(serie):
+    assert _diferencas(serie, converter_texto, normalizar_texto) == []
+
+def test_valor_nan_em_texto_fica_ausente():
+    # 'nan' vira NULL no banco, como no caminho escalar; só o valor ausente vira 0.0
+    valores = normalizar_valor(pd.Series(['nan', None, '٣']))
+    assert math.isnan(valores[0])
+    assert valores[1:].tolist() == [0.0, 3.0]
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from banco import conectar
+from importacao import inserir_dataframe, mapear_colunas
+from resumos import TABELAS_RESUMO, verificar_resumos
+
+# Resumos atualizados só nos grupos que a importação mudou: depois de cada
+# importação, têm de ser iguais aos recalculados do zero (verificar_resumos
+# compara linha a linha, inclusive as somas de valores).
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = conectar(str(tmp_path / 'ordens.db'))
+    yield conn
+    conn.close()
+
+def _planilha(linhas, semente):
+    rng = np.random.default_rng(semente)
+    dias = pd.date_range('2024-01-01', periods=60).strftime('%d/%m/%Y').tolist() + [None]
+    return pd.DataFrame({
+        'Número da Cotação': [f"COT{i % (linhas // 2)}" for i in range(linhas)],
+        'Item (SD)': [str(10 * (i // (linhas // 2))) for i in range(linhas)],
+        'Status': rng.choice(['Aberto', 'Concluído', 'Pendente', None], linhas),
+        'Status cotação': rng.choice(['Aprovada', 'Recusada', None], linhas),
+        'Valor pedido bruto': np.where(rng.random(linhas) < 0.1, np.nan, rng.random(linhas) * 10000),
+        'Criado em': rng.choice(dias, linhas),
+        'Nome do Emissor da Ordem': rng.choice([f"Cliente {i}" for i in range(30)] + [None], linhas),
+        'Denominação produto': rng.choice([f"Produto {i}" for i in range(15)] + [None], linhas),
+    })
+
+def _importar(conn, df, modo):
+    return inserir_dataframe(conn, df, mapear_colunas(df.columns), modo=modo)
+
+def _resumos(conn):
+    return {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0] for tabela in TABELAS_RESUMO}
+
+@pytest.mark.parametrize('modo', ['adicionar', 'sincronizar'])
+def test_resumos_parciais_iguais_aos_recalculados(conn, modo):
+    df = _planilha(2000, 0)
+    mudadas = df.sample(300, random_state=1).index
+    # Cliente e dia que só existem nas versões que a importação seguinte substitui
+    df.loc[mudadas[:20], ['Nome do Emissor da Ordem', 'Criado em']] = ['Cliente Antigo', '01/01/2020']
+    _importar(conn, df, 'substituir')
+    assert all(_resumos(conn).values())
+
+    # Algumas ordens mudam de valor, status, dia e cliente; outras saem; chegam ordens novas
+    alterada = _planilha(2000, 1)
+    for coluna in ('Valor pedido bruto', 'Status', 'Criado em', 'Nome do Emissor da Ordem'):
+        df.loc[mudadas, coluna] = alterada.loc[mudadas, coluna]
+    df = df.drop(df.drop(mudadas).sample(200, random_state=2).index)
+    novas = _planilha(400, 3).assign(**{'Item (SD)': '99'})
+    df = pd.concat([df, novas.drop_duplicates('Número da Cotação')], ignore_index=True)
+
+    resumo, erros = _importar(conn, df, modo)
+    assert erros == []
+    assert resumo['atualizados'] > 0 and resumo['inseridos'] > 0
+    assert resumo['removidos'] == (200 if modo == 'sincronizar' else 0)
+    assert verificar_resumos(conn) == {tabela: 0 for tabela in TABELAS_RESUMO}
+    assert conn.execute("SELECT COUNT(*) FROM resumo_clientes WHERE nome_emissor_ordem = 'Cliente Antigo'").fetchone()[0] == 0
+
+    # Importação sem mudanças não altera nenhum grupo
+    _importar(conn, df, modo)
+    assert verificar_resumos(conn) == {tabela: 0 for tabela in TABELAS_RESUMO}
+
+def test_resumos_parciais_sem_ordens_restantes(conn):
+    _importar(conn, _planilha(100, 0), 'substituir')
+    # Só ordens novas, sem data: todas as anteriores saem
+    df = _planilha(50, 5).assign(**{'Item (SD)': '77', 'Criado em': None})
+    _importar(conn, df, 'sincronizar')
+
+    assert conn.execute("SELECT COUNT(*) FROM resumo_diario WHERE dia IS NOT NULL").fetchone()[0] == 0
+    assert verificar_resumos(conn) == {tabela: 0 for tabela in TABELAS_RESUMO}
+
+def test_verificacao_acusa_diferenca_de_um_centavo(conn):
+    _importar(conn, _planilha(500, 0), 'substituir')
+    conn.execute("UPDATE resumo_clientes SET valor_total = valor_total + 0.01 WHERE rowid = 1")
+    conn.execute("UPDATE resumo_diario SET quantidade = quantidade + 1 WHERE rowid = 1")
+    conn.commit()
+
+    divergencias = verificar_resumos(conn)
+
+    # Cada linha alterada fica sem par dos dois lados (a gravada e a recalculada)
+    assert divergencias['resumo_clientes'] == 2
+    assert divergencias['resumo_diario'] == 2
+    assert verificar_resumos(conn) == {tabela: 0 for tabela in TABELAS_RESUMO}
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+import servico_importacao
+from banco import conectar
+from tarefas import criar_tarefa, finalizar_tarefa, iniciar_tarefa, obter_tarefa
+
+# A thread do serviço continua atendendo a fila depois de um erro fora de executar_tarefa.
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    # Serviço novo, com verificações frequentes da fila
+    monkeypatch.setattr(servico_importacao, '_trabalhador', None)
+    monkeypatch.setattr(servico_importacao, 'INTERVALO_FILA', 0.05)
+    conn = conectar(str(tmp_path / 'ordens.db'))
+    yield conn
+    conn.close()
+
+def _aguardar(conn, id_tarefa, limite=10):
+    fim = time.monotonic() + limite
+    while obter_tarefa(conn, id_tarefa)['situacao'] in ('pendente', 'executando'):
+        assert time.monotonic() < fim, 'tarefa não finalizada'
+        time.sleep(0.05)
+    return obter_tarefa(conn, id_tarefa)
+
+def test_servico_continua_depois_de_um_erro(conn, tmp_path, monkeypatch):
+    executadas = []
+
+    # A primeira tarefa falha depois de assumida, sem ser finalizada
+    def executar_tarefa(conn, conn_tarefas, tarefa):
+        iniciar_tarefa(conn_tarefas, tarefa['id'])
+        executadas.append(tarefa['id'])
+        if len(executadas) == 1:
+            raise RuntimeError('falha inesperada')
+        finalizar_tarefa(conn_tarefas, tarefa['id'], 'concluida', 'ok')
+
+    monkeypatch.setattr(servico_importacao, 'executar_tarefa', executar_tarefa)
+    primeira = criar_tarefa(conn, 'a.xlsx', str(tmp_path / 'a.xlsx'), 'sincronizar')
+    segunda = criar_tarefa(conn, 'b.xlsx', str(tmp_path / 'b.xlsx'), 'sincronizar')
+
+    trabalhador = servico_importacao.iniciar_servico(str(tmp_path / 'ordens.db'))
+
+    assert _aguardar(conn, segunda)['situacao'] == 'concluida'
+    tarefa = obter_tarefa(conn, primeira)
+    assert tarefa['situacao'] == 'erro'
+    assert 'falha inesperada' in tarefa['mensagem']
+    assert executadas == [primeira, segunda]
+    assert trabalhador.is_alive()
+    # Chamado a cada execução do painel: reaproveita a thread em funcionamento
+    assert servico_importacao.iniciar_servico(str(tmp_path / 'ordens.db')) is trabalhador